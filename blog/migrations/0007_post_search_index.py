@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from utils.search import create_search_index, delete_search_index
+
+SEARCH_FIELDS = {
+    "es": ("title", "description", "content"),
+    "en": ("title", "description", "content"),
+}
+
+
+def create_index(apps, schema_editor):
+    """Create full text search index (GIN in Postgres, FTS5 in SQLite)"""
+    model = apps.get_model("blog", "Post")
+    create_search_index(schema_editor, model, SEARCH_FIELDS)
+
+
+def delete_index(apps, schema_editor):
+    """Delete full text search index"""
+    model = apps.get_model("blog", "Post")
+    delete_search_index(schema_editor, model, SEARCH_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0006_post_slug"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, delete_index),
+    ]
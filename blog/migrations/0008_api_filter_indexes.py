@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['lang', '-updated_at'], name='post_lang_updated_idx'),
+        ),
+    ]
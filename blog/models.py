@@ -1,13 +1,21 @@
 from django.db import models
-from django.utils.text import slugify
 
+from utils.images import ImageVariantsMixin
+from utils.slugs import UniqueSlugMixin
 
-class Post(models.Model):
+
+class Post(UniqueSlugMixin, models.Model):
     LANGS = (
         ("es", "Español"),
         ("en", "Inglés"),
     )
 
+    # Full text search fields for each language (see utils.search)
+    SEARCH_FIELDS = {
+        "es": ("title", "description", "content"),
+        "en": ("title", "description", "content"),
+    }
+
     id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=255, verbose_name="Título")
     slug = models.SlugField(
@@ -53,34 +61,31 @@ class Post(models.Model):
         verbose_name_plural = "Entradas"
         verbose_name = "Entrada"
 
+        # Access path of the api lang filter (posts sorted by date)
+        indexes = [
+            models.Index(fields=["lang", "-updated_at"], name="post_lang_updated_idx"),
+        ]
+
     def __str__(self):
         return f"{self.id} - {self.title} - {self.content[:35]}..."
 
-    def save(self, *args, **kwargs):
-
-        # Override slug if not set
-        if not self.slug:
-            slug = slugify(self.title)
-            
-            # Validate slug is unique
-            extra_slug = 1
-            while Post.objects.filter(slug=slug).exists():
-                slug = f"{slug}-{extra_slug}"
-                extra_slug += 1
-            
-            self.slug = slug
-            
-        super().save(*args, **kwargs)
 
-
-class Image(models.Model):
+class Image(ImageVariantsMixin, models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255, verbose_name="Nombre")
     image = models.ImageField(upload_to="blog/images", verbose_name="Imagen")
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes de la imagen",
+    )
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name="Fecha de creación"
     )
 
+    IMAGE_VARIANTS_FIELDS = {"image": "image_variants"}
+
     class Meta:
         verbose_name_plural = "Imágenes"
         verbose_name = "Imagen"
@@ -1,5 +1,12 @@
+from unittest import mock
+
 from blog import models
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from utils.slugs import backfill_slugs
 
 
 class PostTestCase(TestCase):
@@ -15,4 +22,99 @@ class PostTestCase(TestCase):
         post = models.Post.objects.create(title="Test Post")
         post.save()
         post = models.Post.objects.create(title="Test Post")
-        self.assertEqual(post.slug, "test-post-1")
\ No newline at end of file
+        self.assertEqual(post.slug, "test-post-1")
+
+    def test_save_slug_generation_next_suffix(self):
+        """ Test slug suffix is the max allocated suffix plus one, found in one query """
+        for _ in range(3):
+            models.Post.objects.create(title="Test Post")
+        models.Post.objects.create(title="Test Post 10")
+        post = models.Post(title="Test Post")
+        with CaptureQueriesContext(connection) as context:
+            post.save()
+        selects = [
+            query for query in context.captured_queries
+            if query["sql"].startswith("SELECT")
+        ]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(post.slug, "test-post-3")
+
+    def test_save_slug_generation_natural_number(self):
+        """ Test natural numbers of the titles are skipped but not counted """
+        models.Post.objects.create(title="Test Post")
+        models.Post.objects.create(title="Test Post 1")
+        models.Post.objects.create(title="Test Post 999999999999")
+        post = models.Post.objects.create(title="Test Post")
+        self.assertEqual(post.slug, "test-post-2")
+
+    def test_save_slug_conflict_retry(self):
+        """ Test slug taken by other save at the same time is retried """
+        models.Post.objects.create(title="Test Post")
+        post = models.Post(title="Test Post")
+        with mock.patch(
+            "utils.slugs.get_next_slug", side_effect=["test-post", "test-post-1"]
+        ):
+            post.save()
+        self.assertEqual(post.slug, "test-post-1")
+
+
+class BackfillSlugsTestCase(TestCase):
+    """ Test bulk slugs command """
+
+    def setUp(self):
+        self.posts = [
+            models.Post.objects.create(title="Test Post") for _ in range(3)
+        ]
+        models.Post.objects.filter(
+            id__in=[self.posts[1].id, self.posts[2].id]
+        ).update(slug=None)
+
+    def __get_slugs__(self) -> list:
+        return list(models.Post.objects.order_by("id").values_list("slug", flat=True))
+
+    def test_missing_slugs(self):
+        """ Test empty slugs are filled without collisions in one update per batch """
+        with CaptureQueriesContext(connection) as context:
+            backfill_slugs(models.Post, batch_size=1, stdout=lambda text: None)
+        updates = [
+            query for query in context.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(
+            self.__get_slugs__(), ["test-post", "test-post-1", "test-post-2"]
+        )
+
+    def test_dry_run(self):
+        """ Test dry run does not save the slugs """
+        output = []
+        updated = backfill_slugs(models.Post, dry_run=True, stdout=output.append)
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.__get_slugs__(), ["test-post", None, None])
+        self.assertIn(f"Post {self.posts[1].id}: test-post-1", output)
+
+    def test_regenerate(self):
+        """ Test changed titles get new slugs and others are kept """
+        backfill_slugs(models.Post, stdout=lambda text: None)
+        models.Post.objects.filter(id=self.posts[0].id).update(title="New title")
+        updated = backfill_slugs(
+            models.Post, mode="regenerate", stdout=lambda text: None
+        )
+        self.assertEqual(updated, 1)
+        self.assertEqual(
+            self.__get_slugs__(), ["new-title", "test-post-1", "test-post-2"]
+        )
+
+    def test_command_prefix_id(self):
+        """ Test posts slugs command with id prefix """
+        call_command("create_posts_slugs")
+        call_command("create_posts_slugs_with_id")
+        call_command("create_posts_slugs_with_id")
+        self.assertEqual(
+            self.__get_slugs__(),
+            [
+                f"{self.posts[0].id}-test-post",
+                f"{self.posts[1].id}-test-post-1",
+                f"{self.posts[2].id}-test-post-2",
+            ],
+        )
@@ -1,4 +1,5 @@
 from rest_framework import status
+from blog import models
 from core.test_base.test_views import TestPostsViewsBase
 
 
@@ -201,3 +202,44 @@ class PostViewSetTestCase(TestPostsViewsBase):
         # Check response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_lang_filter_uses_index(self):
+        """Validate lang filter does not scan the whole posts table"""
+
+        # Large catalog of posts in other language (bulk create skips signals)
+        models.Post.objects.bulk_create(
+            [
+                models.Post(
+                    title=f"English post {index}",
+                    slug=f"english-post-{index}",
+                    lang="en",
+                    description="Description",
+                    keywords="test",
+                    content="Content",
+                )
+                for index in range(500)
+            ]
+        )
+
+        self.validate_no_sequential_scan(
+            self.endpoint, ["blog_post"], HTTP_ACCEPT_LANGUAGE="es"
+        )
+
+    def test_cursor_pagination(self):
+        """Validate cursor pages follow the updated_at ordering
+        without count queries
+        """
+
+        for index in range(5):
+            self.create_post(title=f"Cursor post {index}")
+
+        expected = list(
+            models.Post.objects.filter(lang="es")
+            .order_by("-updated_at", "-id")
+            .values_list("id", flat=True)
+        )
+        self.validate_cursor_pagination(
+            f"{self.endpoint}?cursor=&page-size=3",
+            expected,
+            HTTP_ACCEPT_LANGUAGE="es",
+        )
@@ -2,13 +2,20 @@ from rest_framework import viewsets
 
 from blog import serializers
 from blog import models
+from core.views import CachedResponseMixin, ConditionalResponseMixin
 
 
-class PostViewSet(viewsets.ReadOnlyModelViewSet):
+class PostViewSet(
+    ConditionalResponseMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet
+):
     """ Api viewset for Post model """
     queryset = models.Post.objects.all()
     serializer_class = serializers.PostListItemSerializer
     lookup_field = "slug"
+    cache_models = [models.Post]
+
+    # Sort key of the cursor pagination (see core.pagination)
+    keyset_fields = ["updated_at", "id"]
 
     def get_queryset(self):
         """ filter with get parameters """
@@ -5,3 +5,7 @@ class ContentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'content'
     verbose_name = "Contenido"
+
+    def ready(self):
+        """Connect signals"""
+        import content.signals  # noqa: F401
@@ -0,0 +1,17 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from content.signals import SEARCH_MODELS
+from utils.search import rebuild_search_index
+
+BASE_FILE = os.path.basename(__file__)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full text search tables (SQLite FTS5) of searchable models"
+
+    def handle(self, *args, **kwargs):
+        for model in SEARCH_MODELS:
+            print(f"Rebuilding search index {model._meta.label}")
+            rebuild_search_index(model)
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_rename_searchlinks_searchlink'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bestdevelopmentsimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes de la imagen'),
+        ),
+        migrations.AddField(
+            model_name='searchlink',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes de la imagen'),
+        ),
+    ]
@@ -1,12 +1,20 @@
 from django.db import models
 from translations import models as translation_models
+from translations.cache import get_translation
+from utils.images import ImageVariantsMixin
 
 
-class BestDevelopmentsImage(models.Model):
+class BestDevelopmentsImage(ImageVariantsMixin, models.Model):
     id = models.AutoField(primary_key=True)
     image = models.ImageField(
         upload_to="best_developments_gallery_images/", verbose_name="Imagen"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes de la imagen",
+    )
     alt_text = models.ForeignKey(
         translation_models.Translation,
         on_delete=models.SET_NULL,
@@ -16,6 +24,8 @@ class BestDevelopmentsImage(models.Model):
         verbose_name="Texto alternativo",
     )
 
+    IMAGE_VARIANTS_FIELDS = {"image": "image_variants"}
+
     def __str__(self):
         return self.alt_text.key if self.alt_text.key else f"Image {self.id}"
 
@@ -32,10 +42,10 @@ class BestDevelopmentsImage(models.Model):
         Returns:
             str: Alt text in the specified language.
         """
-        return getattr(self.alt_text, language) if self.alt_text else ""
+        return get_translation(self.alt_text_id, language)
 
 
-class SearchLink(models.Model):
+class SearchLink(ImageVariantsMixin, models.Model):
     """
     Model to store additional search links for the SearchViewSet
     """
@@ -50,6 +60,12 @@ class SearchLink(models.Model):
         blank=True,
     )
     image = models.ImageField(upload_to="search_links_images/", verbose_name="Imagen")
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes de la imagen",
+    )
     description = models.ForeignKey(
         translation_models.Translation,
         on_delete=models.SET_NULL,
@@ -70,6 +86,8 @@ class SearchLink(models.Model):
         auto_now=True, verbose_name="Fecha de actualización"
     )
 
+    IMAGE_VARIANTS_FIELDS = {"image": "image_variants"}
+
     def __str__(self):
         return str(self.title)
 
@@ -86,7 +104,7 @@ class SearchLink(models.Model):
         Returns:
             str: Title in the specified language.
         """
-        return getattr(self.title, language) if self.title else ""
+        return get_translation(self.title_id, language)
 
     def get_description(self, language: str) -> str:
         """Retrieve description in the specified language.
@@ -97,4 +115,4 @@ class SearchLink(models.Model):
         Returns:
             str: Description in the specified language.
         """
-        return getattr(self.description, language) if self.description else ""
+        return get_translation(self.description_id, language)
@@ -9,10 +9,12 @@ class BestDevelopmentsImageSerializer(BaseModelTranslationsSerializer):
     """Serializer for BestDevelopmentsImage model"""
 
     alt_text = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+    image_metadata = serializers.SerializerMethodField()
 
     class Meta:
         model = models.BestDevelopmentsImage
-        fields = "__all__"
+        exclude = ["image_variants"]
 
     def get_alt_text(self, obj) -> str:
         """Retrieve alt text in the correct language
@@ -20,7 +22,23 @@ class BestDevelopmentsImageSerializer(BaseModelTranslationsSerializer):
         Returns:
             str: Alt text in the correct language
         """
-        return obj.get_alt_text(self.__get_language__()) if obj.alt_text else ""
+        return obj.get_alt_text(self.__get_language__())
+
+    def get_srcset(self, obj) -> list:
+        """Retrieve the resized variants of the image
+
+        Returns:
+            list: Variants urls by width
+        """
+        return obj.get_srcset("image")
+
+    def get_image_metadata(self, obj) -> dict:
+        """Retrieve the image size, dominant color and placeholder
+
+        Returns:
+            dict: Image metadata
+        """
+        return obj.get_metadata("image")
 
 
 class SearchLinkSearchSerializer(BaseSearchSerializer):
@@ -43,7 +61,7 @@ class SearchLinkSearchSerializer(BaseSearchSerializer):
         Returns:
             str: Title in the correct language
         """
-        return obj.get_title(self.__get_language__()) if obj.title else ""
+        return obj.get_title(self.__get_language__())
 
     def get_description(self, obj) -> str:
         """Retrieve description in the correct language
@@ -51,7 +69,7 @@ class SearchLinkSearchSerializer(BaseSearchSerializer):
         Returns:
             str: Description in the correct language
         """
-        return obj.get_description(self.__get_language__()) if obj.description else ""
+        return obj.get_description(self.__get_language__())
 
     def get_extra(self, obj) -> dict:
         """Retrieve extra fields (author) as dict"""
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blog.models import Post
+from properties.models import Property
+from translations.models import Translation
+from utils.search import delete_search_document, update_search_document
+
+# Models searched in the search endpoint
+SEARCH_MODELS = [Post, Property, Translation]
+
+
+@receiver(post_save)
+def update_search_index(sender, instance, **kwargs):
+    """Update the full text search document of searchable models"""
+    if sender in SEARCH_MODELS:
+        update_search_document(instance)
+
+
+@receiver(post_delete)
+def delete_search_index(sender, instance, **kwargs):
+    """Delete the full text search document of searchable models"""
+    if sender in SEARCH_MODELS:
+        delete_search_document(instance)
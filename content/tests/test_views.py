@@ -1,3 +1,6 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from content import models
 
 from core.test_base.test_views import TestContentViewsBase
@@ -9,6 +12,7 @@ from core.test_base.test_models import (
 
 from blog import models as blog_models
 from properties import models as properties_models
+from translations.cache import load_translations
 from utils.media import get_media_url
 
 
@@ -550,3 +554,129 @@ class SearchViewSetTestCase(
         # Validate pagination
         json_data = response.json()
         self.assertEqual(len(json_data["results"]), 8)
+
+    def test_get_filter_query_prefix(self):
+        """Validate words are matched by prefix and without accents"""
+
+        # Update first post title
+        first_post = blog_models.Post.objects.order_by("id").first()
+        first_post.title = "Departamentos en Mérida"
+        first_post.save()
+
+        # Query with partial words
+        response = self.client.get(self.endpoint, {"q": "departamento merida"})
+        self.assertEqual(response.status_code, 200)
+
+        # Validate first post is in results
+        results = response.json()["results"]
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["id"], first_post.id)
+
+    def test_get_filter_query_ranking(self):
+        """Validate most relevant results are returned first (before date)"""
+
+        # Update a post with the words in the title
+        posts = blog_models.Post.objects.order_by("id")
+        relevant_post = posts[0]
+        relevant_post.title = "Casa en la playa"
+        relevant_post.save()
+
+        # Update newer post with the words in a long content
+        other_post = posts[1]
+        other_post.content = "Casa " + "texto de relleno " * 50 + "playa"
+        other_post.save()
+
+        response = self.client.get(self.endpoint, {"q": "casa playa"})
+        self.assertEqual(response.status_code, 200)
+
+        # Validate relevant post is first
+        results = response.json()["results"]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]["id"], relevant_post.id)
+        self.assertEqual(results[1]["id"], other_post.id)
+
+    def test_get_query_count_constant(self):
+        """Validate only the rows of the page are loaded and serialized
+        (same number of queries with more results)
+        """
+
+        queries_count = []
+        for index in range(2):
+
+            # Create more results
+            for result_index in range(4):
+                self.create_post(title=f"casa {index} {result_index}")
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    self.endpoint, {"q": "casa", "page-size": 4}
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["count"], (index + 1) * 4)
+            self.assertEqual(len(response.json()["results"]), 4)
+            queries_count.append(len(queries))
+
+        # Validate same number of queries
+        self.assertEqual(queries_count[0], queries_count[1])
+
+    def test_get_query_budget(self):
+        """Validate search results are loaded without repeated queries"""
+
+        load_translations()
+        self.validate_query_budget(
+            self.endpoint, max_queries=10, HTTP_ACCEPT_LANGUAGE="es"
+        )
+        self.validate_query_budget(
+            f"{self.endpoint}?q=search", max_queries=10, HTTP_ACCEPT_LANGUAGE="es"
+        )
+
+    def test_get_cursor_pagination(self):
+        """Validate cursor pages follow the rank and date sorting of the
+        page number pagination, without count queries
+        """
+
+        response = self.client.get(self.endpoint, {"page-size": 100})
+        expected = [
+            (result["type"], result["id"]) for result in response.json()["results"]
+        ]
+        self.validate_cursor_pagination(
+            f"{self.endpoint}?cursor=&page-size=5",
+            expected,
+            result_key=lambda result: (result["type"], result["id"]),
+        )
+
+    def test_get_cursor_pagination_search(self):
+        """Validate cursor pages of search results with different ranks
+        (float cursor values) do not skip or repeat results
+        """
+
+        for index in range(6):
+            self.create_post(
+                title=" ".join(["casa"] * (index + 1)),
+                description=f"casa playa {index}",
+            )
+
+        response = self.client.get(self.endpoint, {"q": "casa", "page-size": 100})
+        expected = [
+            (result["type"], result["id"]) for result in response.json()["results"]
+        ]
+        self.assertEqual(len(expected), 6)
+        self.validate_cursor_pagination(
+            f"{self.endpoint}?q=casa&cursor=&page-size=2",
+            expected,
+            result_key=lambda result: (result["type"], result["id"]),
+        )
+
+    def test_get_cursor_pagination_invalid_cursor(self):
+        """Validate crafted cursors of the merged results return not found"""
+
+        date = "2024-01-01T00:00:00+00:00"
+        self.validate_invalid_cursors(
+            self.endpoint,
+            [
+                {"p": [0.5, date, 1], "r": False},
+                {"p": [0.5, date, 1, 2], "r": False},
+                {"p": [0.5, 20240101, 1, "post"], "r": False},
+                {"p": ["0.5", date, 1, "post"], "r": False},
+            ],
+        )
@@ -1,76 +1,105 @@
-from django.db.models import Q
-
 from rest_framework import viewsets
+from rest_framework.response import Response
 
+from core.cache import cache_response
+from core.views import CachedResponseMixin
 from content import models as content_models
 from blog import models as blog_models
 from properties import models as properties_models
+from translations.models import Translation
 from content import serializers
 from blog.serializers import PostSearchSerializer
 from properties.serializers import PropertySearchSerializer
 from content.serializers import SearchLinkSearchSerializer
+from utils.search import MergedSearchResults, search_queryset
 
 
-class BestDevelopmentsImageViewSet(viewsets.ReadOnlyModelViewSet):
+class BestDevelopmentsImageViewSet(
+    CachedResponseMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = content_models.BestDevelopmentsImage.objects.all()
     serializer_class = serializers.BestDevelopmentsImageSerializer
     pagination_class = None
+    cache_models = [content_models.BestDevelopmentsImage, Translation]
 
 
 class SearchViewSet(viewsets.ReadOnlyModelViewSet):
     """Api viewset for search endpoint (properties and posts)"""
 
+    # Model and serializer of each result type
+    search_types = {
+        "post": (blog_models.Post, PostSearchSerializer),
+        "property": (properties_models.Property, PropertySearchSerializer),
+        "link": (content_models.SearchLink, SearchLinkSearchSerializer),
+    }
+
+    # Models used to build the response (see core.cache)
+    cache_models = [
+        blog_models.Post,
+        properties_models.Property,
+        properties_models.ShortDescription,
+        properties_models.PropertyImage,
+        content_models.SearchLink,
+        Translation,
+    ]
+
+    # Sort key of the cursor pagination (see MergedSearchResults)
+    keyset_fields = ["search_rank", "updated_at", "id"]
+
+    @cache_response
     def list(self, request, *args, **kwargs):
 
         # Get lang from Accept-Language
         lang = request.headers.get("Accept-Language", "es")
         query = request.query_params.get("q", "")
 
-        # Fetch data from both models
-        posts = blog_models.Post.objects.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(content__icontains=query),
-            lang=lang,
+        # Fetch data from the models with the full text search index
+        posts = search_queryset(blog_models.Post.objects.filter(lang=lang), query)
+        properties = search_queryset(
+            properties_models.Property.objects.filter(active=True),
+            query,
+            related_fields=("short_description__description",),
         )
-        properties = properties_models.Property.objects.filter(
-            Q(name__icontains=query) |
-            Q(short_description__description__en__icontains=query) |
-            Q(short_description__description__es__icontains=query) |
-            Q(description_es__icontains=query) |
-            Q(description_en__icontains=query),
-            active=True,
+        search_links = search_queryset(
+            content_models.SearchLink.objects.all(),
+            query,
+            related_fields=("title", "description"),
         )
-        search_links = content_models.SearchLink.objects.filter(
-            Q(title__es__icontains=query) |
-            Q(title__en__icontains=query) |
-            Q(description__es__icontains=query) |
-            Q(description__en__icontains=query),
+
+        # Merge results sorted by rank and date, paginated in the database
+        results = MergedSearchResults(
+            {
+                "post": posts,
+                "property": properties,
+                "link": search_links,
+            }
         )
+        page = self.paginate_queryset(results)
+        if page is not None:
+            return self.get_paginated_response(self.serialize_results(page))
 
-        # Serialize them with request context
-        post_data = [
-            PostSearchSerializer(post, context={"request": request}).data
-            for post in posts
-        ]
-        property_data = [
-            PropertySearchSerializer(prop, context={"request": request}).data
-            for prop in properties
-        ]
-        search_link_data = [
-            SearchLinkSearchSerializer(link, context={"request": request}).data
-            for link in search_links
-        ]
+        return Response(self.serialize_results(results[:]))
 
-        # Merge and optionally sort
-        merged = post_data + property_data + search_link_data
+    def serialize_results(self, results: list) -> list:
+        """Load and serialize only the given search results
 
-        # sort by date field
-        merged.sort(key=lambda result: result.get("date"), reverse=True)
+        Args:
+            results (list): (type, id) tuples of the results
 
-        # Optional: manually apply pagination
-        page = self.paginate_queryset(merged)
-        if page is not None:
-            return self.get_paginated_response(page)
+        Returns:
+            list: Serialized results in the same order
+        """
+
+        context = {"request": self.request}
+        instances = {}
+        for type_name, (model, serializer_class) in self.search_types.items():
+            ids = [id for result_type, id in results if result_type == type_name]
+            queryset = serializer_class.setup_eager_loading(model.objects.all())
+            instances[type_name] = queryset.in_bulk(ids)
 
-        return merged
+        return [
+            self.search_types[type_name][1](
+                instances[type_name][id], context=context
+            ).data
+            for type_name, id in results
+        ]
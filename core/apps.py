@@ -5,3 +5,7 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'General'
+
+    def ready(self):
+        """Connect signals"""
+        import core.signals  # noqa: F401
@@ -0,0 +1,253 @@
+import time
+from functools import lru_cache, wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.urls import URLResolver, get_resolver
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY_PREFIX = "api-cache-version"
+MODIFIED_KEY_PREFIX = "api-cache-modified"
+RESPONSE_KEY_PREFIX = "api-cache-response"
+
+
+def get_model_version_key(model) -> str:
+    """Retrieve the cache key of the data version of the model
+
+    Args:
+        model (Model): Model class
+
+    Returns:
+        str: Cache key like "api-cache-version:properties.property"
+    """
+    return f"{VERSION_KEY_PREFIX}:{model._meta.label_lower}"
+
+
+def get_model_modified_key(model) -> str:
+    """Retrieve the cache key of the last change time of the model
+
+    Args:
+        model (Model): Model class
+
+    Returns:
+        str: Cache key like "api-cache-modified:properties.property"
+    """
+    return f"{MODIFIED_KEY_PREFIX}:{model._meta.label_lower}"
+
+
+@lru_cache(maxsize=None)
+def get_cache_models() -> frozenset:
+    """Retrieve the models used by the cached views (the "cache_models" of
+    the views of the url patterns), collected once
+
+    Returns:
+        frozenset: Model labels like "properties.property"
+    """
+    labels = set()
+    patterns = list(get_resolver().url_patterns)
+    while patterns:
+        pattern = patterns.pop()
+        if isinstance(pattern, URLResolver):
+            patterns.extend(pattern.url_patterns)
+            continue
+        view_class = getattr(pattern.callback, "cls", None)
+        for model in getattr(view_class, "cache_models", []):
+            labels.add(model._meta.label_lower)
+    return frozenset(labels)
+
+
+def is_cache_model(model) -> bool:
+    """Check if cached responses depend on the model (see get_cache_models)
+
+    Args:
+        model (Model): Model class
+
+    Returns:
+        bool: True if the model is used by a cached view
+    """
+    return model._meta.label_lower in get_cache_models()
+
+
+def bump_model_version(model):
+    """Invalidate the cached responses that depend on the model
+    and save the time of the change
+
+    Args:
+        model (Model): Model class changed
+    """
+    key = get_model_version_key(model)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key removed between add and incr
+        cache.set(key, 1, timeout=None)
+    cache.set(get_model_modified_key(model), time.time(), timeout=None)
+
+
+def get_models_version(models: list) -> str:
+    """Retrieve the current data version of the models (single cache query)
+
+    Args:
+        models (list): Model classes
+
+    Returns:
+        str: Versions joined like "3.0.12"
+    """
+    keys = [get_model_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    return ".".join(str(versions.get(key, 0)) for key in keys)
+
+
+def get_models_modified(models: list) -> float:
+    """Retrieve the last time any of the models changed (single cache query)
+
+    Args:
+        models (list): Model classes
+
+    Returns:
+        float: Timestamp of the last change, or None if unknown
+    """
+    keys = [get_model_modified_key(model) for model in models]
+    return max(cache.get_many(keys).values(), default=None)
+
+
+def get_response_cache_key(view, request) -> str:
+    """Build the cache key of the response: view, path, query params,
+    language and data version of the models used by the view
+
+    Args:
+        view (APIView): View with "cache_models" attribute
+        request (Request): Current request
+
+    Returns:
+        str: Cache key
+    """
+
+    request_hash = get_request_hash(request)
+    version = get_models_version(view.cache_models)
+    return f"{RESPONSE_KEY_PREFIX}:{view.__class__.__name__}:{request_hash}:{version}"
+
+
+def get_request_hash(request) -> str:
+    """Identify the response content: path, sorted query params and language
+
+    Args:
+        request (Request): Current request
+
+    Returns:
+        str: md5 hash of the request data
+    """
+    query_params = sorted(request.query_params.lists())
+    language = request.headers.get("Accept-Language", "es")
+    request_id = f"{request.path}|{query_params}|{language}"
+    return md5(request_id.encode()).hexdigest()
+
+
+def cache_response(handler):
+    """Decorator for viewset actions: return the cached data of the
+    response when available, and cache successful responses
+
+    Responses include "X-Cache" header with HIT or MISS. Disabled without
+    a shared cache (API_CACHE_ENABLED)
+    """
+
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        if not settings.API_CACHE_ENABLED:
+            return handler(view, request, *args, **kwargs)
+
+        key = get_response_cache_key(view, request)
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = handler(view, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
+
+
+def get_response_validators(view, request, **kwargs) -> tuple:
+    """Calculate the ETag and Last-Modified of the response with a single
+    aggregate query (count and Max(date field)) over the filtered queryset,
+    plus the request data and the version of the models used by the view
+
+    Args:
+        view (GenericViewSet): View with "cache_models" and
+            "conditional_date_field" attributes
+        request (Request): Current request
+        kwargs (dict): Url kwargs (lookup value in detail routes)
+
+    Returns:
+        tuple:
+            str: ETag value, None if the object is not found
+            int: Last modified timestamp
+    """
+
+    # Filter the queryset like the list or detail route
+    queryset = view.filter_queryset(view.get_queryset())
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    if lookup_url_kwarg in kwargs:
+        queryset = queryset.filter(**{view.lookup_field: kwargs[lookup_url_kwarg]})
+
+    aggregates = {"total": Count("pk")}
+    if view.conditional_date_field:
+        aggregates["last_modified"] = Max(view.conditional_date_field)
+    data = queryset.order_by().aggregate(**aggregates)
+    if lookup_url_kwarg in kwargs and not data["total"]:
+        return None, None
+
+    # Last change of the objects or the related models
+    timestamps = [get_models_modified(view.cache_models)]
+    if data.get("last_modified"):
+        timestamps.append(data["last_modified"].timestamp())
+    last_modified = int(max(filter(None, timestamps), default=0))
+
+    version = get_models_version(view.cache_models)
+    etag_data = (
+        f"{get_request_hash(request)}|{data['total']}|"
+        f"{data.get('last_modified')}|{version}"
+    )
+    etag = quote_etag(md5(etag_data.encode()).hexdigest())
+    return etag, last_modified
+
+
+def conditional_response(handler):
+    """Decorator for viewset actions: return 304 Not Modified when the
+    request ETag (If-None-Match) or date (If-Modified-Since) are still valid,
+    without serializing the response. Add ETag and Last-Modified headers
+    to successful responses. Disabled without a shared cache for the
+    models versions (API_CACHE_ENABLED)
+    """
+
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        if not settings.API_CACHE_ENABLED:
+            return handler(view, request, *args, **kwargs)
+
+        etag, last_modified = get_response_validators(view, request, **kwargs)
+        if etag is not None:
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                return not_modified
+
+        response = handler(view, request, *args, **kwargs)
+        if etag is not None and response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    return wrapper
@@ -0,0 +1,55 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from utils.slugs import backfill_slugs
+
+# Models with slugs (app_label.ModelName)
+SLUG_MODELS = ["blog.Post", "properties.Property", "properties.Company"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill, regenerate or prefix with the id the slugs of posts, "
+        "properties and companies in bulk (collisions resolved in memory)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--models",
+            nargs="+",
+            default=SLUG_MODELS,
+            choices=SLUG_MODELS,
+            help="Models to update",
+        )
+        parser.add_argument(
+            "--mode",
+            default="missing",
+            choices=["missing", "regenerate", "prefix-id"],
+            help=(
+                "missing: only empty slugs, regenerate: all slugs from the "
+                "name or title, prefix-id: slugs like <id>-<slug>"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of instances updated per transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only show the new slugs",
+        )
+
+    def handle(self, *args, **kwargs):
+        for model_label in kwargs["models"]:
+            model = apps.get_model(model_label)
+            updated = backfill_slugs(
+                model,
+                mode=kwargs["mode"],
+                batch_size=kwargs["batch_size"],
+                dry_run=kwargs["dry_run"],
+            )
+            action = "to update" if kwargs["dry_run"] else "updated"
+            print(f"{model.__name__}: {updated} slugs {action}")
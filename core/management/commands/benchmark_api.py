@@ -0,0 +1,97 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency, query count and peak memory of the api endpoints "
+        "and save a json report (optionally creating a synthetic catalog)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--create-catalog",
+            action="store_true",
+            help="Create a synthetic catalog before measuring (disposable database)",
+        )
+        parser.add_argument(
+            "--keep-catalog",
+            action="store_true",
+            help="Keep the synthetic catalog after measuring (for other runs)",
+        )
+        parser.add_argument(
+            "--i-know-this-is-disposable",
+            action="store_true",
+            dest="disposable",
+            help="Allow writing in a database that is not sqlite",
+        )
+        parser.add_argument("--properties", type=int, default=50000)
+        parser.add_argument("--images-per-property", type=int, default=4)
+        parser.add_argument("--posts", type=int, default=10000)
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Times to send each request",
+        )
+        parser.add_argument(
+            "--use-cache",
+            action="store_true",
+            help="Keep the api responses cache between iterations",
+        )
+        parser.add_argument(
+            "--output",
+            default="benchmark-report.json",
+            help="Path of the json report",
+        )
+        parser.add_argument(
+            "--compare",
+            default=None,
+            help="Path of a previous json report to compare with",
+        )
+
+    def handle(self, *args, **kwargs):
+
+        # The benchmark writes synthetic rows and invalidates the api cache
+        if not kwargs["disposable"] and not benchmark.is_disposable_database():
+            raise CommandError(
+                "Use a disposable database: use sqlite, set "
+                "BENCHMARK_DISPOSABLE_DATABASE=True or pass "
+                "--i-know-this-is-disposable"
+            )
+
+        try:
+            if kwargs["create_catalog"]:
+                counts = benchmark.create_catalog(
+                    properties_num=kwargs["properties"],
+                    images_per_property=kwargs["images_per_property"],
+                    posts_num=kwargs["posts"],
+                    stdout=self.stdout.write,
+                )
+                self.stdout.write(f"Catalog created: {counts}")
+
+            report = benchmark.run_benchmark(
+                iterations=kwargs["iterations"],
+                use_cache=kwargs["use_cache"],
+                stdout=self.stdout.write,
+            )
+        finally:
+            if kwargs["create_catalog"] and not kwargs["keep_catalog"]:
+                benchmark.delete_catalog(stdout=self.stdout.write)
+
+        benchmark.save_report(report, kwargs["output"])
+        self.stdout.write(f"Report saved: {kwargs['output']}")
+
+        if kwargs["compare"]:
+            with open(kwargs["compare"]) as file:
+                previous_report = json.load(file)
+            for change in benchmark.compare_reports(report, previous_report):
+                self.stdout.write(
+                    f"{change['name']} ({change['language']}): "
+                    f"p50 {change['p50_ms']:+}ms p95 {change['p95_ms']:+}ms "
+                    f"queries {change['queries']:+} "
+                    f"memory {change['peak_memory_kb']:+}kb"
+                )
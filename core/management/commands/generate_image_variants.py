@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from utils.images import ImageVariantsMixin
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the missing resized webp variants and metadata (size, "
+        "dominant color and placeholder) of the images of all the models "
+        "with image variants"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Threads used to process the images",
+        )
+
+    def handle(self, *args, **kwargs):
+        for model in apps.get_models():
+            if not issubclass(model, ImageVariantsMixin):
+                continue
+            updated = model.update_missing_image_variants(workers=kwargs["workers"])
+            print(f"{model.__name__}: {updated} images updated")
@@ -0,0 +1,62 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from utils import snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the api responses (properties, companies, locations, posts "
+        "and best developments images) in es and en to a versioned folder "
+        "of json files, only re-rendering the details whose data changed "
+        "since the last snapshot"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default="snapshots",
+            help="Snapshots folder (each run creates a version subfolder)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes used to render the responses",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=snapshot.SNAPSHOT_PAGE_SIZE,
+            help="Results per page of the list endpoints",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help=(
+                "Render all the details (use after deploys that change the "
+                "responses format)"
+            ),
+        )
+        parser.add_argument(
+            "--archive",
+            action="store_true",
+            help="Also save the version as a .tar.gz file",
+        )
+
+    def handle(self, *args, **kwargs):
+
+        summary = snapshot.create_snapshot(
+            output=kwargs["output"],
+            workers=kwargs["workers"],
+            page_size=kwargs["page_size"],
+            full=kwargs["full"],
+            archive=kwargs["archive"],
+        )
+        print(
+            f"Snapshot {summary['version']} created: "
+            f"{summary['rendered']} files rendered, {summary['reused']} reused"
+        )
+        if summary["archive"]:
+            print(f"Archive saved: {summary['archive']}")
@@ -0,0 +1,194 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from core.queries import QueryRecorder, get_repeated_queries
+
+logger = logging.getLogger("performance")
+queries_logger = logging.getLogger("queries")
+
+
+class RequestMetrics:
+    """Timings of a sampled request (see PerformanceMiddleware)"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.view_start = None
+        self.view_sql_time = 0.0
+        self.view_end = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper: count queries and their time"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+
+class PerformanceMiddleware:
+    """Record the view name, query count, sql time, serializer time,
+    response size and api cache status of a sample of the requests
+    (PERFORMANCE_SAMPLE_RATE), returned in the "Server-Timing" header
+    and logged as json lines by the "performance" logger
+
+    Serializer time is the view time outside sql queries (querysets are
+    evaluated by the serializers), before the response is rendered
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = settings.PERFORMANCE_SAMPLE_RATE
+        if sample_rate <= 0 or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        request._performance_metrics = metrics
+        with connection.execute_wrapper(metrics):
+            response = self.get_response(request)
+
+        data = self.get_metrics_data(request, response, metrics)
+        response["Server-Timing"] = self.get_server_timing(data)
+        logger.info(json.dumps(data))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Start the view timer"""
+        metrics = getattr(request, "_performance_metrics", None)
+        if metrics is not None:
+            metrics.view_start = time.perf_counter()
+            metrics.view_sql_time = metrics.sql_time
+
+    def process_template_response(self, request, response):
+        """Stop the view timer (api responses are rendered later)"""
+        metrics = getattr(request, "_performance_metrics", None)
+        if metrics is not None:
+            metrics.view_end = time.perf_counter()
+            metrics.view_sql_time = metrics.sql_time - metrics.view_sql_time
+        return response
+
+    def get_metrics_data(self, request, response, metrics: RequestMetrics) -> dict:
+        """Build the metrics of the request
+
+        Args:
+            request (HttpRequest): Sampled request
+            response (HttpResponse): Response of the request
+            metrics (RequestMetrics): Request timings
+
+        Returns:
+            dict: Metrics (times in milliseconds)
+        """
+
+        end = time.perf_counter()
+        serializer_time = None
+        render_time = None
+        if metrics.view_start is not None and metrics.view_end is not None:
+            view_time = metrics.view_end - metrics.view_start
+            serializer_time = max(view_time - metrics.view_sql_time, 0)
+            render_time = end - metrics.view_end
+
+        resolver_match = request.resolver_match
+        size = None
+        if not response.streaming:
+            size = len(response.content)
+
+        return {
+            "method": request.method,
+            "path": request.path,
+            "view": resolver_match.view_name if resolver_match else None,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "sql_ms": round(metrics.sql_time * 1000, 2),
+            "serializer_ms": (
+                round(serializer_time * 1000, 2)
+                if serializer_time is not None
+                else None
+            ),
+            "render_ms": (
+                round(render_time * 1000, 2) if render_time is not None else None
+            ),
+            "total_ms": round((end - metrics.start) * 1000, 2),
+            "size": size,
+            "cache": response.get("X-Cache", "").lower() or None,
+        }
+
+    def get_server_timing(self, data: dict) -> str:
+        """Format the metrics as a Server-Timing header value
+
+        Args:
+            data (dict): Request metrics
+
+        Returns:
+            str: Header like 'db;dur=1.2;desc="3 queries", total;dur=5.1'
+        """
+
+        timings = [f'db;dur={data["sql_ms"]};desc="{data["queries"]} queries"']
+        if data["serializer_ms"] is not None:
+            timings.append(f"serializer;dur={data['serializer_ms']}")
+            timings.append(f"render;dur={data['render_ms']}")
+        if data["cache"]:
+            timings.append(f'cache;desc="{data["cache"]}"')
+        timings.append(f"total;dur={data['total_ms']}")
+        return ", ".join(timings)
+
+
+class QueryBudgetMiddleware:
+    """Staging helper (QUERY_BUDGET_ENABLED): log warnings for requests
+    with more queries than QUERY_BUDGET_MAX_QUERIES, the same query
+    (with other params) repeated more than QUERY_BUDGET_MAX_REPEATS
+    times (N+1 queries) or queries slower than QUERY_BUDGET_SLOW_MS
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_BUDGET_ENABLED:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        self.check_queries(request, recorder.queries)
+        return response
+
+    def check_queries(self, request, queries: list):
+        """Log the budget violations of the request queries
+
+        Args:
+            request (HttpRequest): Request checked
+            queries (list): Executed queries (see QueryRecorder)
+        """
+
+        name = f"{request.method} {request.get_full_path()}"
+        max_queries = settings.QUERY_BUDGET_MAX_QUERIES
+        if len(queries) > max_queries:
+            queries_logger.warning(
+                f"{name}: {len(queries)} queries (budget {max_queries})"
+            )
+
+        repeated_queries = get_repeated_queries(
+            [query["sql"] for query in queries],
+            settings.QUERY_BUDGET_MAX_REPEATS,
+        )
+        for template, times in repeated_queries:
+            queries_logger.warning(
+                f"{name}: query repeated {times} times: {template}"
+            )
+
+        for query in queries:
+            if query["duration_ms"] > settings.QUERY_BUDGET_SLOW_MS:
+                queries_logger.warning(
+                    f"{name}: slow query ({query['duration_ms']:.1f}ms): "
+                    f"{query['sql']}"
+                )
@@ -1,7 +1,251 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_keyset_filter(
+    fields: list, values: list, reverse: bool = False, inclusive: bool = False
+) -> Q:
+    """Build the filter of the rows after a position in descending order
+    of the fields (before the position if reverse)
+
+    Args:
+        fields (list): Fields of the sort key, like ["updated_at", "id"]
+        values (list): Values of the fields in the position
+        reverse (bool): Get the rows before the position
+        inclusive (bool): Include rows equal in the last field
+
+    Returns:
+        Q: Filter like (updated_at < x) | (updated_at = x & id < y)
+    """
+
+    lookup = "gt" if reverse else "lt"
+    keyset_filter = Q()
+    for index, field in enumerate(fields):
+        field_lookup = lookup
+        if inclusive and index == len(fields) - 1:
+            field_lookup += "e"
+        keyset_filter |= Q(
+            **dict(zip(fields[:index], values[:index])),
+            **{f"{field}__{field_lookup}": values[index]},
+        )
+    return keyset_filter
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination keyed on the view "keyset_fields" (descending),
+    like (updated_at, id). Deep pages cost the same as the first one and
+    no count query is done. Returns opaque next and previous cursors
+
+    Object lists with a "get_keyset_page" method (like search results)
+    paginate themselves, with the position fields of their "keyset_fields"
+    """
+
+    page_size = 8
+    page_size_query_param = "page-size"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None) -> list:
+        """Retrieve the items of the page of the request cursor"""
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        fields = getattr(queryset, "keyset_fields", view.keyset_fields)
+        position, reverse = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param, ""), fields
+        )
+
+        # Fetch one extra row to know if there are more pages
+        if hasattr(queryset, "get_keyset_page"):
+            rows = queryset.get_keyset_page(position, page_size + 1, reverse)
+        else:
+            rows = self.get_queryset_page(
+                queryset, fields, position, page_size + 1, reverse
+            )
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Positions of the first and last items for the cursors
+        self.previous_position = rows[0][1] if rows else None
+        self.next_position = rows[-1][1] if rows else None
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = has_more if reverse else position is not None
+        return [item for item, _ in rows]
+
+    def get_queryset_page(
+        self, queryset, fields: list, position, limit: int, reverse: bool
+    ) -> list:
+        """Retrieve the rows after (or before) the position
+
+        Args:
+            queryset (QuerySet): Rows to paginate
+            fields (list): Fields of the sort key (descending)
+            position (list): Values of the fields of the cursor (None: start)
+            limit (int): Max rows
+            reverse (bool): Get the rows before the position (ascending)
+
+        Returns:
+            list: (instance, position) tuples
+        """
+
+        if position is not None:
+            queryset = queryset.filter(get_keyset_filter(fields, position, reverse))
+        ordering = fields if reverse else [f"-{field}" for field in fields]
+        instances = queryset.order_by(*ordering)[:limit]
+        return [
+            (instance, [getattr(instance, field) for field in fields])
+            for instance in instances
+        ]
+
+    def get_page_size(self, request) -> int:
+        """Retrieve the page size from the query params"""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, position: list, reverse: bool) -> str:
+        """Build the opaque cursor of a position
+
+        Args:
+            position (list): Sort key values
+            reverse (bool): Cursor to the previous page
+
+        Returns:
+            str: Base64 cursor
+        """
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in position
+        ]
+        data = json.dumps({"p": values, "r": reverse}).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def parse_position_value(self, field: str, value):
+        """Validate a value of the cursor position
+
+        Args:
+            field (str): Sort key field ("*_at" dates, "id", "type" or rank)
+            value (str|int|float): Value read from the cursor
+
+        Returns:
+            datetime|str|int|float: Value used in the keyset filter
+
+        Raises:
+            ValueError: The value type does not match the field
+        """
+        if field.endswith("_at"):
+            date = parse_datetime(value) if isinstance(value, str) else None
+            if date is None:
+                raise ValueError(f"Invalid {field}")
+            return date
+        if field == "type":
+            valid = isinstance(value, str)
+        elif field == "id":
+            valid = isinstance(value, int) and not isinstance(value, bool)
+        else:
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if not valid:
+            raise ValueError(f"Invalid {field}")
+        return value
+
+    def decode_cursor(self, cursor: str, fields: list) -> tuple:
+        """Read and validate the position of the cursor
+
+        Args:
+            cursor (str): Base64 cursor (empty for the first page)
+            fields (list): Fields of the sort key
+
+        Returns:
+            tuple:
+                list: Sort key values (None for the first page)
+                bool: Cursor to the previous page
+
+        Raises:
+            NotFound: Malformed cursor or values that do not match the fields
+        """
+
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            values, reverse = data["p"], data["r"]
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError("Invalid position")
+            if not isinstance(reverse, bool):
+                raise ValueError("Invalid direction")
+            position = [
+                self.parse_position_value(field, value)
+                for field, value in zip(fields, values)
+            ]
+            return position, reverse
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound("Invalid cursor")
+
+    def get_cursor_link(self, position: list, reverse: bool) -> str:
+        """Build the url of the page after (or before) the position"""
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(position, reverse)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self) -> str:
+        if not self.has_next or self.next_position is None:
+            return None
+        return self.get_cursor_link(self.next_position, False)
+
+    def get_previous_link(self) -> str:
+        if not self.has_previous:
+            return None
+        if self.previous_position is None:
+            url = self.request.build_absolute_uri()
+            return replace_query_param(url, self.cursor_query_param, "")
+        return self.get_cursor_link(self.previous_position, True)
+
+    def get_paginated_response(self, data) -> Response:
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 8
     page_size_query_param = 'page-size'
     max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Use keyset pagination when the request has a "cursor" query param
+        (empty for the first page) and the view defines "keyset_fields"
+        """
+
+        self.keyset_pagination = None
+        cursor_query_param = KeysetPagination.cursor_query_param
+        if cursor_query_param in request.query_params and getattr(
+            view, "keyset_fields", None
+        ):
+            self.keyset_pagination = KeysetPagination()
+            return self.keyset_pagination.paginate_queryset(queryset, request, view)
+
+        # Page number links without cursor
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset_pagination:
+            return self.keyset_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
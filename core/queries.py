@@ -0,0 +1,61 @@
+import re
+import time
+from collections import Counter
+
+# Literals replaced in the sql templates
+SQL_STRING_REGEX = re.compile(r"'(?:[^']|'')*'")
+SQL_NUMBER_REGEX = re.compile(r"\b\d+(?:\.\d+)?\b")
+SQL_IN_LIST_REGEX = re.compile(r"\bIN \((?:\s*(?:\?|%s)\s*,?)+\)", re.IGNORECASE)
+
+
+def normalize_sql(sql: str) -> str:
+    """Build the template of a query, replacing the literal values, so
+    the same query with other params has the same template
+
+    Args:
+        sql (str): Executed query (with or without params)
+
+    Returns:
+        str: Query template like 'SELECT ... WHERE "id" = ?'
+    """
+    sql = SQL_STRING_REGEX.sub("?", sql)
+    sql = SQL_NUMBER_REGEX.sub("?", sql)
+    sql = SQL_IN_LIST_REGEX.sub("IN (...)", sql)
+    return " ".join(sql.split())
+
+
+def get_repeated_queries(queries: list, max_repeats: int) -> list:
+    """Group the queries by template and retrieve the ones executed more
+    than max_repeats times (like N+1 queries)
+
+    Args:
+        queries (list): Executed sql queries
+        max_repeats (int): Max times the same template can be executed
+
+    Returns:
+        list: (template, times) tuples, most repeated first
+    """
+    templates = Counter(normalize_sql(sql) for sql in queries)
+    return [
+        (template, times)
+        for template, times in templates.most_common()
+        if times > max_repeats
+    ]
+
+
+class QueryRecorder:
+    """Database execute wrapper that saves the executed queries and
+    their duration (see connection.execute_wrapper)
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {"sql": sql, "duration_ms": (time.perf_counter() - start) * 1000}
+            )
@@ -32,6 +32,19 @@ class CustomTokenRefreshSerializer(TokenRefreshSerializer):
 # BASE SERIALIZERS
 
 class BaseModelTranslationsSerializer(serializers.ModelSerializer):
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Apply the select_related / prefetch_related plan required
+        by the serializer fields (override in child classes)
+
+        Args:
+            queryset (QuerySet): Queryset to optimize
+
+        Returns:
+            QuerySet: Queryset with the related data loaded
+        """
+        return queryset
     
     def __get_language__(self) -> str:
         """Retrieve language from the request context or default to 'es'
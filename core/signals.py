@@ -0,0 +1,31 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import bump_model_version, is_cache_model
+
+
+@receiver(post_save)
+def invalidate_cache_on_save(sender, **kwargs):
+    """Invalidate cached api responses that depend on the model saved
+    (other models, like sessions or leads, are skipped)
+    """
+    if is_cache_model(sender):
+        bump_model_version(sender)
+
+
+@receiver(post_delete)
+def invalidate_cache_on_delete(sender, **kwargs):
+    """Invalidate cached api responses that depend on the model deleted"""
+    if is_cache_model(sender):
+        bump_model_version(sender)
+
+
+@receiver(m2m_changed)
+def invalidate_cache_on_m2m_change(sender, instance, action, model, **kwargs):
+    """Invalidate cached api responses that depend on both sides of the
+    many to many relation changed
+    """
+    if action in ["post_add", "post_remove", "post_clear"]:
+        for changed_model in [type(instance), model]:
+            if is_cache_model(changed_model):
+                bump_model_version(changed_model)
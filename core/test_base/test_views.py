@@ -1,6 +1,12 @@
+import base64
+import json
+from contextlib import contextmanager
 from time import sleep
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
@@ -10,9 +16,65 @@ from core.test_base.test_models import (
     TestContentModelBase,
 )
 from core.test_base.test_admin import TestAdminBase
+from core.queries import get_repeated_queries
 
 
-class TestApiViewsMethods(APITestCase, TestAdminBase):
+class QueryBudgetMixin:
+    """Test mixin to detect endpoints with too many queries or the same
+    query repeated with other params (N+1 queries)
+    """
+
+    @contextmanager
+    def query_budget(self, max_queries: int = None, max_repeats: int = 1):
+        """Fail if the code in the block executes more than max_queries
+        queries or the same query template more than max_repeats times
+
+        Args:
+            max_queries (int): Max queries (None: no limit)
+            max_repeats (int): Max times each query template can be executed
+        """
+
+        with CaptureQueriesContext(connection) as context:
+            yield context
+
+        queries = [query["sql"] for query in context.captured_queries]
+        if max_queries is not None:
+            self.assertLessEqual(
+                len(queries),
+                max_queries,
+                "Too many queries:\n" + "\n".join(queries),
+            )
+        repeated_queries = get_repeated_queries(queries, max_repeats)
+        repeated_lines = [
+            f"{times}x {template}" for template, times in repeated_queries
+        ]
+        self.assertEqual(
+            repeated_queries, [], "Repeated queries:\n" + "\n".join(repeated_lines)
+        )
+
+    def validate_query_budget(
+        self,
+        endpoint: str,
+        max_queries: int = None,
+        max_repeats: int = 1,
+        **kwargs,
+    ):
+        """Validate the queries of an endpoint are in the budget
+        (see query_budget)
+
+        Args:
+            endpoint (str): Endpoint to request (with query params)
+            max_queries (int): Max queries (None: no limit)
+            max_repeats (int): Max times each query template can be executed
+            kwargs (dict): Extra request data (like headers)
+        """
+
+        with self.query_budget(max_queries, max_repeats):
+            response = self.client.get(endpoint, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestApiViewsMethods(QueryBudgetMixin, APITestCase, TestAdminBase):
     """Base class for testing api views that only allows get views"""
 
     def setUp(
@@ -31,6 +93,9 @@ class TestApiViewsMethods(APITestCase, TestAdminBase):
         restricted_delete (bool): If the delete method is restricted
         """
 
+        # Clean cached api responses
+        cache.clear()
+
         # Create user and login
         username = "admin"
         password = "test pass"
@@ -58,6 +123,117 @@ class TestApiViewsMethods(APITestCase, TestAdminBase):
         response = getattr(self.client, method)(self.endpoint)
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    def get_query_plan(self, sql: str) -> list:
+        """Retrieve the database query plan (EXPLAIN) of a query
+
+        Args:
+            sql (str): Query executed (with params)
+
+        Returns:
+            list: Plan lines
+        """
+
+        if connection.vendor == "sqlite":
+            explain = f"EXPLAIN QUERY PLAN {sql}"
+        else:
+            explain = f"EXPLAIN {sql}"
+        with connection.cursor() as cursor:
+            cursor.execute(explain)
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def validate_no_sequential_scan(self, endpoint: str, tables: list, **kwargs):
+        """Validate the queries of the endpoint read the tables using indexes
+        (no full table scans). Create enough rows before calling it,
+        so the database planner prefers the indexes
+
+        Args:
+            endpoint (str): Endpoint to request (with query params)
+            tables (list): Tables names that must not be fully scanned
+            kwargs (dict): Extra request data (like headers)
+        """
+
+        # Update planner statistics
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(endpoint, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT"):
+                continue
+            for table in tables:
+                if f'"{table}"' not in sql:
+                    continue
+                for line in self.get_query_plan(sql):
+                    self.assertNotRegex(
+                        line,
+                        rf"^SCAN (TABLE )?{table}( AS \w+)?$|Seq Scan on {table}\b",
+                        f"Sequential scan in: {sql}",
+                    )
+
+    def validate_cursor_pagination(
+        self, endpoint: str, expected: list, result_key=None, **kwargs
+    ):
+        """Validate the cursor pagination of the endpoint walking all
+        the pages forward and backward, without count queries
+
+        Args:
+            endpoint (str): Endpoint to request (with "cursor" and
+                "page-size" query params)
+            expected (list): Keys of all the results in order
+            result_key (callable): Get the key of a result (default: id)
+            kwargs (dict): Extra request data (like headers)
+        """
+
+        if result_key is None:
+            result_key = lambda result: result["id"]
+
+        # Walk forward
+        pages = []
+        url = endpoint
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, **kwargs)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            json_data = response.json()
+            self.assertNotIn("count", json_data)
+            for query in queries.captured_queries:
+                self.assertNotIn('AS "__count"', query["sql"])
+            pages.append([result_key(result) for result in json_data["results"]])
+            url = json_data["next"]
+        self.assertGreater(len(pages), 1)
+        self.assertEqual([key for page in pages for key in page], expected)
+
+        # Walk backward from the last page
+        previous_pages = []
+        url = response.json()["previous"]
+        while url:
+            json_data = self.client.get(url, **kwargs).json()
+            previous_pages.insert(
+                0, [result_key(result) for result in json_data["results"]]
+            )
+            url = json_data["previous"]
+        self.assertEqual(previous_pages, pages[:-1])
+
+    def validate_invalid_cursors(self, endpoint: str, positions: list, **kwargs):
+        """Validate crafted cursors (wrong number or types of values)
+        return not found
+
+        Args:
+            endpoint (str): Endpoint with cursor pagination
+            positions (list): Cursor data like {"p": [...], "r": False}
+            kwargs (dict): Extra request data (like headers)
+        """
+        for data in positions:
+            cursor = base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+            response = self.client.get(endpoint, {"cursor": cursor}, **kwargs)
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND, data
+            )
+
     def test_authenticated_user_post(self):
         """Test that authenticated users can not post to the endpoint"""
 
@@ -106,23 +282,25 @@ class TestPropertiesViewsBase(TestApiViewsMethods, TestPropertiesModelsBase):
         self.tag2 = self.create_tag(
             name="Test tag 2", es="Etiqueta de prueba 2", en="Test tag 2"
         )
-        self.property_1 = self.create_property(
-            name="Test property 1",
-            company=self.company,
-            location=self.location,
-            category=self.category,
-            seller=self.seller,
-        )
-        self.property_1.tags.add(self.tag1, self.tag2)
-        self.property_1.save()
-        sleep(0.1)
-        self.property_2 = self.create_property(
-            name="Test property 2",
-            company=self.company,
-            location=self.location,
-            category=self.category,
-            seller=self.seller,
-        )
+        # Related properties are indexed on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property_1 = self.create_property(
+                name="Test property 1",
+                company=self.company,
+                location=self.location,
+                category=self.category,
+                seller=self.seller,
+            )
+            self.property_1.tags.add(self.tag1, self.tag2)
+            self.property_1.save()
+            sleep(0.1)
+            self.property_2 = self.create_property(
+                name="Test property 2",
+                company=self.company,
+                location=self.location,
+                category=self.category,
+                seller=self.seller,
+            )
 
         # Update restricted methods
         self.restricted_get = False
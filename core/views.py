@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from core.cache import cache_response, conditional_response
 from core.serializers import (
     CustomTokenObtainPairSerializer,
     CustomTokenRefreshSerializer,
@@ -28,4 +29,53 @@ class ValidateRefreshView(APIView):
                 "data": {}
             },
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+
+class EagerLoadingMixin:
+    """Apply the eager loading plan declared by the serializer class
+    (setup_eager_loading) to the viewset queryset
+    """
+
+    def filter_queryset(self, queryset):
+        """Load related data required by the current serializer class"""
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, "setup_eager_loading"):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
+
+
+class CachedResponseMixin:
+    """Cache list and retrieve responses by path, query params and language.
+    Cached responses are invalidated when any of the "cache_models" changes
+    """
+
+    # Models used to build the response
+    cache_models = []
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+class ConditionalResponseMixin:
+    """Support conditional GET (ETag / Last-Modified) in list and retrieve.
+    Unchanged responses return 304 after a single aggregate query,
+    without serializing the data. Requires "cache_models" (CachedResponseMixin)
+    """
+
+    # Date field of the model updated on each change (None to only count rows)
+    conditional_date_field = "updated_at"
+
+    @conditional_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
@@ -1,7 +1,9 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 
 from leads import models
+from utils.export import export_csv, export_ndjson
 
 
 @admin.register(models.Lead)
@@ -20,6 +22,7 @@ class LeadAdmin(admin.ModelAdmin):
     list_per_page = 10
     list_filter = ["property", "company", "created_at", "updated_at"]
     readonly_fields = ["created_at", "updated_at"]
+    actions = [export_csv, export_ndjson]
 
     # Custom fields
     def whatsapp_link(self, obj):
@@ -29,4 +32,32 @@ class LeadAdmin(admin.ModelAdmin):
     
     # Names for custom fields
     whatsapp_link.short_description = "WhatsApp"
-    whatsapp_link.ordering_field = "phone"
\ No newline at end of file
+    whatsapp_link.ordering_field = "phone"
+
+@admin.register(models.LeadNotification)
+class LeadNotificationAdmin(admin.ModelAdmin):
+    list_display = [
+        "lead",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+        "created_at",
+    ]
+    search_fields = ["lead__name", "lead__email", "last_error"]
+    list_per_page = 10
+    list_filter = ["status", "created_at"]
+    readonly_fields = [
+        "lead",
+        "digest_leads",
+        "attempts",
+        "last_error",
+        "sent_at",
+        "created_at",
+    ]
+    actions = ["retry_notifications"]
+
+    @admin.action(description="Reintentar notificaciones seleccionadas")
+    def retry_notifications(self, request, queryset):
+        """Send the selected notifications again in the next worker run"""
+        queryset.update(status="pending", next_attempt_at=timezone.now())
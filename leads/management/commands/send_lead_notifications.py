@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from leads import models
+
+
+class Command(BaseCommand):
+    help = "Send pending lead notification emails (retrying failed ones)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Notifications sent per email connection",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and check new notifications every interval",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=10,
+            help="Seconds to wait between checks in loop mode",
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs["batch_size"]
+
+        while True:
+
+            # Send batches until no notifications are ready
+            while True:
+                results = models.LeadNotification.send_pending(batch_size)
+                if any(results.values()):
+                    print(
+                        f"Notifications sent: {results['sent']}, "
+                        f"retried: {results['retried']}, failed: {results['failed']}"
+                    )
+                if sum(results.values()) < batch_size:
+                    break
+
+            if not kwargs["loop"]:
+                break
+            time.sleep(kwargs["interval"])
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0006_alter_lead_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadNotification',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('sent', 'Enviado'), ('failed', 'Fallido')], default='pending', max_length=10, verbose_name='Estado')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Intentos')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Siguiente intento')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último error')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado')),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='leads.lead', verbose_name='Lead')),
+            ],
+            options={
+                'verbose_name': 'Notificación de lead',
+                'verbose_name_plural': 'Notificaciones de leads',
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt_at'], name='lead_notification_pending_idx')],
+            },
+        ),
+    ]
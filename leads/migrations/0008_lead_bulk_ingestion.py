@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0007_leadnotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leadnotification',
+            name='digest_leads',
+            field=models.ManyToManyField(blank=True, help_text='Leads creados en bulk, notificados en un solo correo', related_name='digest_notifications', to='leads.lead', verbose_name='Leads del resumen'),
+        ),
+        migrations.AlterField(
+            model_name='leadnotification',
+            name='lead',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='leads.lead', verbose_name='Lead'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['email', 'phone', 'property', 'created_at'], name='lead_duplicates_idx'),
+        ),
+    ]
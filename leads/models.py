@@ -1,12 +1,34 @@
-from django.db import models
-from django.core.mail import send_mail
+import atexit
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, models, transaction
+from django.core.mail import get_connection, send_mail
 from django.conf import settings
+from django.utils import timezone
 
 from properties import models as property_models
 from utils.whatsapp import get_whatsapp_link
 
+logger = logging.getLogger(__name__)
+
 
 class Lead(models.Model):
+
+    # Fields of the csv / ndjson exports (see utils.export)
+    EXPORT_FIELDS = [
+        "id",
+        "name",
+        "email",
+        "phone",
+        "message",
+        "property__name",
+        "company__name",
+        "done",
+        "created_at",
+    ]
+
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100, verbose_name="Nombre")
     email = models.EmailField(verbose_name="Correo Electrónico")
@@ -30,9 +52,22 @@ class Lead(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creado")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizado")
 
+    # Bulk ingestion settings (see LeadView.bulk)
+    BULK_CHUNK_SIZE = 500
+    BULK_MAX_ROWS = 10000
+
+    # Leads with the same email, phone and property in this time are duplicated
+    DUPLICATES_WINDOW = timedelta(hours=24)
+
     class Meta:
         verbose_name_plural = "Leads"
         verbose_name = "Lead"
+        indexes = [
+            models.Index(
+                fields=["email", "phone", "property", "created_at"],
+                name="lead_duplicates_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.email}"
@@ -41,18 +76,51 @@ class Lead(models.Model):
 
         is_new = not self.id
 
-        if is_new:
-            # Send message to whatsapp
-            self.send_notification_email()
+        # Save lead and queue its notification in the same transaction
+        # (sent by the send_lead_notifications worker)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                LeadNotification.objects.create(lead=self)
+
+        if is_new and settings.LEADS_NOTIFICATIONS_THREAD:
+            transaction.on_commit(LeadNotification.send_pending_in_thread)
+
+    @classmethod
+    def get_duplicated_keys(cls, keys: set) -> set:
+        """Find the (email, phone, property id) keys of the leads
+        already created in the duplicates window (single query)
+
+        Args:
+            keys (set): (email, phone, property id) tuples to check
 
-        super().save(*args, **kwargs)
+        Returns:
+            set: Keys already saved
+        """
+
+        if not keys:
+            return set()
+
+        since = timezone.now() - cls.DUPLICATES_WINDOW
+        saved_keys = cls.objects.filter(
+            created_at__gte=since,
+            email__in={email for email, _, _ in keys},
+        ).values_list("email", "phone", "property_id")
+        return keys & set(saved_keys)
 
     def get_whatsapp_link(self):
 
         # Add 521 at the start of the number
         return get_whatsapp_link(self.phone)
 
-    def send_notification_email(self):
+    def send_notification_email(self, email_connection=None):
+        """Send the new lead email to the admins
+
+        Args:
+            email_connection (BaseEmailBackend): Connection to reuse
+                (default creates a new one)
+        """
+
         # Send email to admins
         # http://127.0.0.1:8000/admin/leads/lead/9/change/
         admin_lead_link = f"{settings.HOST}/admin/leads/lead/"
@@ -66,4 +134,223 @@ class Lead(models.Model):
             from_email=settings.EMAIL_HOST_USER,
             recipient_list=settings.EMAILS_LEADS_NOTIFICATIONS,
             fail_silently=False,
+            connection=email_connection,
+        )
+
+    @classmethod
+    def send_digest_email(cls, leads: list, email_connection=None):
+        """Send a single email to the admins with several new leads
+        (created in bulk)
+
+        Args:
+            leads (list): Leads to include
+            email_connection (BaseEmailBackend): Connection to reuse
+                (default creates a new one)
+        """
+
+        admin_lead_link = f"{settings.HOST}/admin/leads/lead/"
+        message = f"Nuevos Leads: {len(leads)}\n"
+        for lead in leads:
+            message += f"\n{lead.name} - {lead.email} - {lead.phone}"
+        message += f"\n\nVer todos los leads: {admin_lead_link}"
+
+        send_mail(
+            subject=f"Nuevos Leads ({len(leads)})",
+            message=message,
+            from_email=settings.EMAIL_HOST_USER,
+            recipient_list=settings.EMAILS_LEADS_NOTIFICATIONS,
+            fail_silently=False,
+            connection=email_connection,
+        )
+
+
+
+# Worker used to send notifications after the request (LEADS_NOTIFICATIONS_THREAD).
+# A single thread per process, shut down at exit after the queued sends
+# finish (notifications not sent stay pending for send_lead_notifications)
+notifications_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="lead-notifications"
+)
+atexit.register(notifications_executor.shutdown)
+
+
+class LeadNotification(models.Model):
+    """Outbox of lead notification emails, sent by a background worker
+    with retries and exponential backoff
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pendiente"),
+        ("sent", "Enviado"),
+        ("failed", "Fallido"),
+    ]
+
+    # Retry settings
+    MAX_ATTEMPTS = 5
+    RETRY_DELAY = timedelta(minutes=1)
+    MAX_RETRY_DELAY = timedelta(hours=1)
+
+    # Time a worker owns the notifications it took (retried after it)
+    LEASE_TIME = timedelta(minutes=5)
+
+    id = models.AutoField(primary_key=True)
+    lead = models.ForeignKey(
+        Lead,
+        on_delete=models.CASCADE,
+        related_name="notifications",
+        null=True,
+        blank=True,
+        verbose_name="Lead",
+    )
+    digest_leads = models.ManyToManyField(
+        Lead,
+        blank=True,
+        related_name="digest_notifications",
+        verbose_name="Leads del resumen",
+        help_text="Leads creados en bulk, notificados en un solo correo",
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default="pending",
+        verbose_name="Estado",
+    )
+    attempts = models.IntegerField(default=0, verbose_name="Intentos")
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Siguiente intento"
+    )
+    last_error = models.TextField(blank=True, default="", verbose_name="Último error")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Enviado")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creado")
+
+    class Meta:
+        verbose_name_plural = "Notificaciones de leads"
+        verbose_name = "Notificación de lead"
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="lead_notification_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        if self.lead_id:
+            return f"{self.lead} - {self.status}"
+        return f"Resumen de leads {self.id} - {self.status}"
+
+    def send_email(self, email_connection=None):
+        """Send the lead email, or the digest email of the bulk leads
+
+        Args:
+            email_connection (BaseEmailBackend): Connection to reuse
+        """
+
+        if self.lead_id:
+            self.lead.send_notification_email(email_connection)
+        else:
+            Lead.send_digest_email(list(self.digest_leads.all()), email_connection)
+
+    def get_retry_delay(self) -> timedelta:
+        """Calculate the wait before the next attempt (exponential backoff)
+
+        Returns:
+            timedelta: Delay after the current failed attempts
+        """
+        delay = self.RETRY_DELAY * 2 ** max(self.attempts - 1, 0)
+        return min(delay, self.MAX_RETRY_DELAY)
+
+    @classmethod
+    def claim_pending(cls, batch_size: int) -> list:
+        """Take the pending notifications ready to be sent, locking them
+        for the current worker during the lease time
+
+        Args:
+            batch_size (int): Max notifications to take
+
+        Returns:
+            list: Notifications taken, with their leads
+        """
+
+        now = timezone.now()
+        with transaction.atomic():
+            notifications = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status="pending", next_attempt_at__lte=now)
+                .order_by("next_attempt_at", "id")[:batch_size]
+            )
+            cls.objects.filter(
+                id__in=[notification.id for notification in notifications]
+            ).update(next_attempt_at=now + cls.LEASE_TIME)
+
+        return list(
+            cls.objects.filter(
+                id__in=[notification.id for notification in notifications]
+            )
+            .select_related("lead")
+            .prefetch_related("digest_leads")
+            .order_by("id")
         )
+
+    @classmethod
+    def send_pending(cls, batch_size: int = 50) -> dict:
+        """Send a batch of pending notifications with a single email
+        connection. Failed notifications are retried later, until MAX_ATTEMPTS
+
+        Args:
+            batch_size (int): Max notifications to send
+
+        Returns:
+            dict: Number of notifications sent, retried and failed
+        """
+
+        results = {"sent": 0, "retried": 0, "failed": 0}
+        notifications = cls.claim_pending(batch_size)
+        if not notifications:
+            return results
+
+        # Reuse the email connection (errors opening it are also saved
+        # in each notification when sending)
+        email_connection = get_connection(fail_silently=False)
+        try:
+            email_connection.open()
+        except Exception:
+            logger.exception("Error opening the lead notifications email connection")
+
+        try:
+            for notification in notifications:
+                notification.attempts += 1
+                try:
+                    notification.send_email(email_connection)
+                except Exception as error:
+                    notification.last_error = str(error)
+                    if notification.attempts >= cls.MAX_ATTEMPTS:
+                        notification.status = "failed"
+                        results["failed"] += 1
+                    else:
+                        notification.next_attempt_at = (
+                            timezone.now() + notification.get_retry_delay()
+                        )
+                        results["retried"] += 1
+                else:
+                    notification.status = "sent"
+                    notification.sent_at = timezone.now()
+                    notification.last_error = ""
+                    results["sent"] += 1
+                notification.save()
+        finally:
+            email_connection.close()
+
+        return results
+
+    @classmethod
+    def send_pending_in_thread(cls):
+        """Send the pending notifications in the background thread"""
+
+        def send():
+            try:
+                cls.send_pending()
+            finally:
+                connection.close()
+
+        notifications_executor.submit(send)
@@ -0,0 +1,31 @@
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline delimited json (one object per line) lazily,
+    so big streams are read in chunks
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Return a generator of the objects in the stream"""
+
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+
+        def read_lines():
+            for line_number, line in enumerate(stream, start=1):
+                line = line.decode(encoding).strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as error:
+                    raise ParseError(
+                        f"NDJSON parse error in line {line_number}: {error}"
+                    )
+
+        return read_lines()
@@ -5,4 +5,16 @@ from leads import models
 class LeadSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Lead
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+class LeadBulkSerializer(serializers.ModelSerializer):
+    """Validate a lead of a bulk request. Property and company ids are
+    validated for the whole chunk in the view (single query)
+    """
+
+    property = serializers.IntegerField(required=False, allow_null=True)
+    company = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = models.Lead
+        fields = ["name", "email", "phone", "message", "property", "company"]
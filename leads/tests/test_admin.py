@@ -32,4 +32,57 @@ class LeadAdminTestCase(TestAdminBase):
         
         # Validate whatsapp link
         self.assertContains(response, self.lead.phone)
-        self.assertContains(response, self.lead.get_whatsapp_link())
\ No newline at end of file
+        self.assertContains(response, self.lead.get_whatsapp_link())
+
+    def test_export_action(self):
+        """ Validate selected leads exported as csv """
+
+        response = self.client.post(
+            self.endpoint,
+            {"action": "export_csv", "_selected_action": [self.lead.id]},
+        )
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn(self.lead.email, content)
+
+
+class LeadNotificationAdminTestCase(TestAdminBase):
+
+    def setUp(self):
+
+        # Create user and login
+        super().setUp()
+
+        # Save endpoint
+        self.endpoint = "/admin/leads/leadnotification/"
+
+        # Create lead (and its notification)
+        self.lead = models.Lead.objects.create(
+            name="John Doe",
+            email="test@gmail.com",
+            message="Hello, World!",
+            phone="+1(123)456-7890",
+        )
+        self.notification = self.lead.notifications.get()
+
+    def test_search_bar(self):
+        """Validate search bar working"""
+
+        self.submit_search_bar(self.endpoint)
+
+    def test_retry_action(self):
+        """Validate failed notifications are pending again after retry"""
+
+        self.notification.status = "failed"
+        self.notification.save()
+
+        self.client.post(
+            self.endpoint,
+            {
+                "action": "retry_notifications",
+                "_selected_action": [self.notification.id],
+            },
+        )
+
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, "pending")
@@ -1,6 +1,11 @@
+from datetime import timedelta
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.core import mail
+from django.core.management import call_command
 from django.conf import settings
+from django.utils import timezone
 
 from leads import models
 
@@ -55,19 +60,29 @@ class LeadTestCase(TestCase):
         )
         self.assertIn("/admin/leads/lead/", email_data.body)
         
-    def test_save_send_notification_email(self):
-        """Test auto send notification email method when creating a lead"""
+    def test_save_queue_notification_email(self):
+        """Test notification is queued (not sent) when creating a lead"""
 
         # Create lead
-        models.Lead.objects.create(
+        lead = models.Lead.objects.create(
             name="John Doe",
             email="test@gmail.com",
             phone="+1 (123) 456- 78.90",
             message="Hello, World!",
         )
-        
-        # Validate email was sent
+
+        # Validate email was queued
+        self.assertEqual(len(mail.outbox), 0)
+        notification = lead.notifications.get()
+        self.assertEqual(notification.status, "pending")
+
+        # Send queued email
+        results = models.LeadNotification.send_pending()
+        self.assertEqual(results, {"sent": 1, "retried": 0, "failed": 0})
         self.assertEqual(len(mail.outbox), 1)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, "sent")
+        self.assertIsNotNone(notification.sent_at)
         
     def test_save_no_send_notification_email_if_exists(self):
         """Test no send notification email method if lead already exists"""
@@ -86,5 +101,107 @@ class LeadTestCase(TestCase):
         # save lead
         lead.save()
         
-        # validate email was not sent
+        # validate email was not queued again
         self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(lead.notifications.count(), 1)
+
+
+class LeadNotificationTestCase(TestCase):
+    """Test lead notifications outbox"""
+
+    def create_lead(self, name: str = "John Doe") -> models.Lead:
+        """Create a lead (and its pending notification)"""
+
+        return models.Lead.objects.create(
+            name=name,
+            email="test@gmail.com",
+            phone="+1 (123) 456- 78.90",
+            message="Hello, World!",
+        )
+
+    def test_send_pending_batch(self):
+        """Test pending notifications are sent in batches"""
+
+        for index in range(3):
+            self.create_lead(f"John Doe {index}")
+
+        results = models.LeadNotification.send_pending(batch_size=2)
+        self.assertEqual(results["sent"], 2)
+        self.assertEqual(len(mail.outbox), 2)
+
+        results = models.LeadNotification.send_pending(batch_size=2)
+        self.assertEqual(results["sent"], 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+        # No notifications left
+        results = models.LeadNotification.send_pending(batch_size=2)
+        self.assertEqual(results["sent"], 0)
+
+    def test_send_pending_retry_backoff(self):
+        """Test failed emails are retried later with a bigger delay,
+        until the max attempts
+        """
+
+        lead = self.create_lead()
+        notification = lead.notifications.get()
+
+        with patch.object(
+            models.Lead,
+            "send_notification_email",
+            side_effect=ConnectionError("SMTP down"),
+        ):
+            delays = []
+            for _ in range(models.LeadNotification.MAX_ATTEMPTS):
+                start = timezone.now()
+                results = models.LeadNotification.send_pending()
+                notification.refresh_from_db()
+                delays.append(notification.next_attempt_at - start)
+
+                # Make the notification ready again
+                models.LeadNotification.objects.update(next_attempt_at=timezone.now())
+
+        self.assertEqual(results["failed"], 1)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, "failed")
+        self.assertEqual(notification.attempts, models.LeadNotification.MAX_ATTEMPTS)
+        self.assertEqual(notification.last_error, "SMTP down")
+        self.assertGreater(delays[1], delays[0])
+        self.assertGreaterEqual(delays[0], timedelta(minutes=1))
+
+        # Failed notifications are not sent again
+        models.LeadNotification.send_pending()
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_send_pending_connection_error(self):
+        """Test errors opening the email connection are logged"""
+
+        self.create_lead()
+        with patch(
+            "django.core.mail.backends.locmem.EmailBackend.open",
+            side_effect=ConnectionError("SMTP down"),
+        ):
+            with self.assertLogs("leads.models", level="ERROR") as logs:
+                models.LeadNotification.send_pending()
+
+        self.assertIn("SMTP down", logs.output[0])
+
+    def test_send_pending_not_ready(self):
+        """Test notifications waiting for a retry are not sent"""
+
+        lead = self.create_lead()
+        lead.notifications.update(next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        models.LeadNotification.send_pending()
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_command(self):
+        """Test management command sends all pending notifications"""
+
+        for index in range(3):
+            self.create_lead(f"John Doe {index}")
+
+        call_command("send_lead_notifications", "--batch-size", "2")
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(
+            models.LeadNotification.objects.filter(status="pending").exists()
+        )
@@ -1,3 +1,7 @@
+import csv
+import json
+
+from django.core import mail
 from rest_framework import status
 
 from core.test_base.test_views import TestPropertiesViewsBase
@@ -143,3 +147,168 @@ class LeadViewTestCase(TestPropertiesViewsBase):
         )
         
     
+
+    def test_post_queue_notification(self):
+        """ Validate notification is queued instead of sent in the request """
+
+        del self.data["company"]
+        response = self.client.post(self.endpoint, self.data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Validate no email sent and notification pending
+        self.assertEqual(len(mail.outbox), 0)
+        lead = models.Lead.objects.get()
+        self.assertEqual(lead.notifications.get().status, "pending")
+
+
+class LeadBulkViewTestCase(TestPropertiesViewsBase):
+
+    def setUp(self):
+        """ Initialize test data """
+
+        # Create admin user + properties data
+        super().setUp(endpoint="/api/leads/bulk/")
+
+        # Set restricted methods to test
+        self.restricted_post = False
+
+        self.rows = [
+            {
+                "name": f"John Doe {index}",
+                "email": f"test{index}@gmail.com",
+                "message": "Hello, World!",
+                "property": self.property_1.id,
+                "phone": f"+1(123)456-789{index}",
+            }
+            for index in range(3)
+        ]
+
+    def test_post_json_array(self):
+        """ Validate leads created in bulk with a single digest notification """
+
+        # Invalid, duplicated and not found property rows
+        rows = self.rows + [
+            {**self.rows[0], "email": "invalid"},
+            self.rows[1],
+            {**self.rows[2], "email": "other@gmail.com", "property": 0},
+        ]
+        response = self.client.post(self.endpoint, rows, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = response.json()["data"]
+        self.assertEqual(data["created"], 3)
+        self.assertEqual(data["duplicates"], 1)
+        self.assertEqual([error["index"] for error in data["errors"]], [3, 5])
+        self.assertIn("email", data["errors"][0]["errors"])
+        self.assertIn("property", data["errors"][1]["errors"])
+        self.assertEqual(models.Lead.objects.count(), 3)
+
+        # Validate single digest email
+        notification = models.LeadNotification.objects.get()
+        self.assertEqual(notification.digest_leads.count(), 3)
+        models.LeadNotification.send_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Nuevos Leads (3)")
+        self.assertIn("John Doe 2 - test2@gmail.com", mail.outbox[0].body)
+
+    def test_post_ndjson(self):
+        """ Validate leads created from a NDJSON stream """
+
+        body = "\n".join(json.dumps(row) for row in self.rows) + "\n"
+        response = self.client.post(
+            self.endpoint, body, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["data"]["created"], 3)
+        self.assertEqual(models.Lead.objects.count(), 3)
+
+        # Invalid line
+        response = self.client.post(
+            self.endpoint, "{invalid", content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_post_duplicated_in_database(self):
+        """ Validate leads saved recently are not created again """
+
+        self.client.post(self.endpoint, self.rows[:1], format="json")
+        response = self.client.post(self.endpoint, self.rows, format="json")
+
+        data = response.json()["data"]
+        self.assertEqual(data["created"], 2)
+        self.assertEqual(data["duplicates"], 1)
+        self.assertEqual(models.Lead.objects.count(), 3)
+
+    def test_post_invalid_body(self):
+        """ Validate error when the body is not a list """
+
+        response = self.client.post(self.endpoint, self.rows[0], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["status"], "error")
+        self.assertEqual(models.Lead.objects.count(), 0)
+
+        # Json scalars
+        for body in ["leads", 10, True, None]:
+            response = self.client.post(
+                self.endpoint, json.dumps(body), content_type="application/json"
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, body
+            )
+        self.assertEqual(models.Lead.objects.count(), 0)
+
+
+class LeadExportViewTestCase(TestPropertiesViewsBase):
+
+    def setUp(self):
+        """ Initialize test data """
+
+        # Create admin user + properties data
+        super().setUp(endpoint="/api/leads/export/")
+
+        for index in range(3):
+            models.Lead.objects.create(
+                name=f"John Doe {index}",
+                email=f"test{index}@gmail.com",
+                phone="+1(123)456-7890",
+                message="Hello, World!",
+                property=self.property_1 if index else None,
+                done=index == 2,
+            )
+
+    def test_export_csv(self):
+        """ Validate leads streamed as csv """
+
+        response = self.client.get(self.endpoint)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = list(csv.reader(lines))
+        self.assertEqual(rows[0], models.Lead.EXPORT_FIELDS)
+        names = [row[1] for row in rows[1:]]
+        self.assertEqual(names, ["John Doe 0", "John Doe 1", "John Doe 2"])
+
+    def test_export_ndjson_filters(self):
+        """ Validate leads streamed as ndjson with filters """
+
+        response = self.client.get(
+            self.endpoint,
+            {
+                "export-format": "ndjson",
+                "propiedad": self.property_1.id,
+                "done": "false",
+            },
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["name"], "John Doe 1")
+        self.assertEqual(rows[0]["property__name"], self.property_1.name)
+
+    def test_list_not_allowed(self):
+        """ Validate leads can not be listed """
+
+        response = self.client.get("/api/leads/")
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
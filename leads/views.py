@@ -1,12 +1,171 @@
-from rest_framework import viewsets
+from itertools import islice
+from types import GeneratorType
 
+from django.conf import settings
+from django.db import transaction
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 
 from leads import models
 from leads import serializers
+from leads.parsers import NDJSONParser
+from properties import models as property_models
+from utils.export import get_export_format, get_export_response
 
 
-class LeadView(viewsets.ModelViewSet):
+class LeadView(mixins.CreateModelMixin, viewsets.GenericViewSet):
     # JTW authentication is required
     queryset = models.Lead.objects.all()
     serializer_class = serializers.LeadSerializer
-    http_method_names = ['post']
\ No newline at end of file
+    http_method_names = ['get', 'post']
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream the leads as csv or ndjson (admins only), filtered by
+        "done", "propiedad" and "empresa" query params
+        """
+
+        queryset = models.Lead.objects.order_by("id")
+        done = request.query_params.get("done", None)
+        if done is not None:
+            queryset = queryset.filter(done=done.lower() == "true")
+        property = request.query_params.get("propiedad", None)
+        if property is not None:
+            queryset = queryset.filter(property__id=property)
+        company = request.query_params.get("empresa", None)
+        if company is not None:
+            queryset = queryset.filter(company__id=company)
+
+        return get_export_response(
+            queryset, models.Lead.EXPORT_FIELDS, get_export_format(request), "leads"
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[JSONParser, NDJSONParser],
+    )
+    def bulk(self, request):
+        """Create many leads from a json array or a NDJSON stream.
+        Rows are validated and inserted in chunks, invalid and duplicated
+        rows are skipped, and a single digest notification is queued
+        """
+
+        # Json array or the lazy rows of the NDJSON parser
+        rows = request.data
+        if not isinstance(rows, (list, GeneratorType)):
+            raise ValidationError({"leads": ["Se esperaba una lista de leads."]})
+
+        created = []
+        duplicates = 0
+        errors = []
+        keys = set()
+        rows = iter(rows)
+        row_index = 0
+        with transaction.atomic():
+            while True:
+                chunk = list(islice(rows, models.Lead.BULK_CHUNK_SIZE))
+                if not chunk:
+                    break
+                if row_index + len(chunk) > models.Lead.BULK_MAX_ROWS:
+                    raise ValidationError(
+                        {"leads": [f"Máximo {models.Lead.BULK_MAX_ROWS} leads."]}
+                    )
+
+                # Validate fields and foreign keys of the chunk
+                leads = []
+                for index, row in enumerate(chunk, start=row_index):
+                    serializer = serializers.LeadBulkSerializer(data=row)
+                    if serializer.is_valid():
+                        leads.append((index, serializer.validated_data))
+                    else:
+                        errors.append({"index": index, "errors": serializer.errors})
+                row_index += len(chunk)
+                leads = self.__validate_foreign_keys__(leads, errors)
+
+                # Skip leads duplicated in the request or in the database
+                chunk_keys = {
+                    (data["email"], data["phone"], data.get("property"))
+                    for _, data in leads
+                }
+                saved_keys = models.Lead.get_duplicated_keys(chunk_keys - keys)
+                new_leads = []
+                for _, data in leads:
+                    key = (data["email"], data["phone"], data.get("property"))
+                    if key in keys or key in saved_keys:
+                        duplicates += 1
+                        continue
+                    keys.add(key)
+                    new_leads.append(
+                        models.Lead(
+                            name=data["name"],
+                            email=data["email"],
+                            phone=data["phone"],
+                            message=data["message"],
+                            property_id=data.get("property"),
+                            company_id=data.get("company"),
+                        )
+                    )
+                created += models.Lead.objects.bulk_create(new_leads)
+
+            # Single notification for all the leads
+            if created:
+                notification = models.LeadNotification.objects.create()
+                notification.digest_leads.add(*created)
+                if settings.LEADS_NOTIFICATIONS_THREAD:
+                    transaction.on_commit(
+                        models.LeadNotification.send_pending_in_thread
+                    )
+
+        return Response(
+            {
+                "status": "ok",
+                "message": "Leads created",
+                "data": {
+                    "created": len(created),
+                    "duplicates": duplicates,
+                    "errors": errors,
+                },
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def __validate_foreign_keys__(self, leads: list, errors: list) -> list:
+        """Validate the property and company ids of the leads
+        (a single query per model)
+
+        Args:
+            leads (list): (index, validated data) tuples
+            errors (list): Errors list to add the invalid leads
+
+        Returns:
+            list: (index, validated data) tuples with valid foreign keys
+        """
+
+        related_models = {
+            "property": property_models.Property,
+            "company": property_models.Company,
+        }
+        valid_ids = {}
+        for field, model in related_models.items():
+            ids = {data[field] for _, data in leads if data.get(field) is not None}
+            valid_ids[field] = set(
+                model.objects.filter(id__in=ids).values_list("id", flat=True)
+            )
+
+        valid_leads = []
+        for index, data in leads:
+            invalid_fields = {
+                field: [f'Clave primaria "{data[field]}" inválida - objeto no existe.']
+                for field in related_models
+                if data.get(field) is not None and data[field] not in valid_ids[field]
+            }
+            if invalid_fields:
+                errors.append({"index": index, "errors": invalid_fields})
+            else:
+                valid_leads.append((index, data))
+        return valid_leads
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     "corsheaders",
     "rest_framework",
     "rest_framework.authtoken",
+    "django_filters",
     # Django apps
     "django.contrib.admin",
     "django.contrib.auth",
@@ -56,6 +57,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Timings of a sample of the requests (first to measure all the others)
+    "core.middleware.PerformanceMiddleware",
+    # Query budget warnings (staging)
+    "core.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     # Manage static files
@@ -240,6 +245,7 @@ JAZZMIN_SETTINGS = {
         "translations.TranslationGroup": "fas fa-bookmark",
         "translations.Translation": "fas fa-language",
         "leads.lead": "fas fa-envelope",
+        "leads.leadnotification": "fas fa-paper-plane",
         "blog.Post": "fas fa-newspaper",
         "blog.Image": "fas fa-image",
         "content.BestDevelopmentsImage": "fas fa-image",
@@ -297,6 +303,11 @@ LOGGING = {
             "class": "logging.StreamHandler",
             "formatter": "simple",
         },
+        "performance": {
+            "level": "INFO",
+            "class": "logging.StreamHandler",
+            "formatter": "message",
+        },
     },
     "formatters": {
         "verbose": {
@@ -307,13 +318,44 @@ LOGGING = {
             "format": "{levelname} {message}",
             "style": "{",
         },
+        # Json lines (structured logs)
+        "message": {
+            "format": "{message}",
+            "style": "{",
+        },
     },
     "root": {
         "handlers": ["file", "console"],
         "level": "DEBUG",
     },
+    "loggers": {
+        "performance": {
+            "handlers": ["performance"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
 }
 
+# Fraction of the requests measured by core.middleware.PerformanceMiddleware
+# (Server-Timing header and "performance" json logs). 0 disables it
+PERFORMANCE_SAMPLE_RATE = (
+    0.0 if IS_TESTING else float(os.getenv("PERFORMANCE_SAMPLE_RATE", "0.05"))
+)
+
+# Log warnings of requests with too many, repeated (N+1) or slow queries
+# (core.middleware.QueryBudgetMiddleware, for staging)
+QUERY_BUDGET_ENABLED = os.getenv("QUERY_BUDGET_ENABLED", "False") == "True"
+QUERY_BUDGET_MAX_QUERIES = int(os.getenv("QUERY_BUDGET_MAX_QUERIES", "30"))
+QUERY_BUDGET_MAX_REPEATS = int(os.getenv("QUERY_BUDGET_MAX_REPEATS", "3"))
+QUERY_BUDGET_SLOW_MS = float(os.getenv("QUERY_BUDGET_SLOW_MS", "200"))
+
+# Allow the api benchmark (utils.benchmark) to write synthetic rows and
+# invalidate the api cache in a database that is not sqlite
+BENCHMARK_DISPOSABLE_DATABASE = (
+    os.getenv("BENCHMARK_DISPOSABLE_DATABASE", "False") == "True"
+)
+
 # Cors
 if os.getenv("CORS_ALLOWED_ORIGINS") != "None":
     CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS").split(",")
@@ -368,6 +410,39 @@ if STORAGE_AWS:
     MEDIA_ROOT = None
 
 
+# Cache (redis in production if CACHE_REDIS_URL is set, local memory otherwise)
+# Redis is required to cache api responses: each gunicorn worker has its
+# own local memory cache, so data changes would only invalidate the
+# responses of the worker that saved them (see API_CACHE_ENABLED)
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+if CACHE_REDIS_URL and not IS_TESTING:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Cache api responses and answer conditional requests (core.cache) only
+# with a cache shared by all the workers (or in tests, single process)
+API_CACHE_ENABLED = IS_TESTING or bool(CACHE_REDIS_URL)
+
+# Seconds to keep api responses in cache (invalidated when data changes)
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# Max seconds to keep the translations in the memory of each process
+# (translations.cache). Changes are also detected by the shared version
+# with redis, so without it they are reloaded more often
+TRANSLATIONS_MAX_AGE = int(
+    os.getenv("TRANSLATIONS_MAX_AGE", 600 if CACHE_REDIS_URL else 30)
+)
+
 # Setup drf
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
@@ -397,3 +472,15 @@ EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS") == "True"
 EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL") == "True"
 EMAIL_FROM = EMAIL_HOST_USER
 EMAILS_LEADS_NOTIFICATIONS = os.getenv("EMAILS_LEADS_NOTIFICATIONS").split(",")
+
+# Send lead notifications in a background thread after each lead is saved.
+# Pending and failed notifications are also sent by "send_lead_notifications"
+LEADS_NOTIFICATIONS_THREAD = (
+    os.getenv("LEADS_NOTIFICATIONS_THREAD", "True") == "True" and not IS_TESTING
+)
+
+# Create resized webp variants of the uploaded images in a background thread.
+# Missing variants are also created by "generate_image_variants"
+IMAGE_VARIANTS_THREAD = (
+    os.getenv("IMAGE_VARIANTS_THREAD", "True") == "True" and not IS_TESTING
+)
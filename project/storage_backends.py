@@ -5,6 +5,7 @@ from storages.backends.s3boto3 import S3Boto3Storage
 class StaticStorage(S3Boto3Storage):
     location = settings.STATIC_LOCATION
     default_acl = "public-read"
+    querystring_auth = False
 
 
 class PublicMediaStorage(S3Boto3Storage):
@@ -12,6 +13,10 @@ class PublicMediaStorage(S3Boto3Storage):
     default_acl = "public-read"
     file_overwrite = False
 
+    # Public files: unsigned urls never expire, so they are memoized
+    # (see utils.media.get_storage_url)
+    querystring_auth = False
+
 
 class PrivateMediaStorage(S3Boto3Storage):
     location = settings.PRIVATE_MEDIA_LOCATION
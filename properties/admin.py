@@ -1,5 +1,6 @@
 from django.contrib import admin, messages
 from properties import models
+from utils.export import export_csv, export_ndjson
 
 
 @admin.register(models.Company)
@@ -95,6 +96,7 @@ class PropertyAdmin(admin.ModelAdmin):
         "created_at",
         "updated_at",
     )
+    actions = [export_csv, export_ndjson]
     fieldsets = (
         (
             "Información de la propiedad",
@@ -5,3 +5,7 @@ class PropertiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'properties'
     verbose_name = "Propiedades"
+
+    def ready(self):
+        """Connect signals"""
+        import properties.signals  # noqa: F401
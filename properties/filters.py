@@ -0,0 +1,95 @@
+import django_filters
+from django.db.models import Count
+from rest_framework.exceptions import ValidationError
+
+from properties import models
+from utils.geo import filter_radius, get_bbox_filter
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    """Comma separated numbers, like "1,2,3" """
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """Comma separated values, like "house,condo" """
+
+
+class PropertyFilter(django_filters.FilterSet):
+    """Api filters of the properties (query params in spanish, like the
+    frontend urls). Lists are comma separated and ranges can be open.
+    "featured" only returns featured properties with any value (even empty)
+
+    Map searches: "bbox=<min lng>,<min lat>,<max lng>,<max lat>" and
+    "cerca=<lat>,<lng>,<radius km>" (see utils.geo)
+    """
+
+    ubicacion = NumberInFilter(field_name="location_id")
+    categoria = NumberInFilter(field_name="category_id")
+    empresa = NumberInFilter(field_name="company_id")
+    tipo_empresa = CharInFilter(field_name="company__type")
+    etiquetas = NumberInFilter(method="filter_tags_any")
+    etiquetas_todas = NumberInFilter(method="filter_tags_all")
+    precio_desde = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
+    precio_hasta = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
+    metros_desde = django_filters.NumberFilter(field_name="meters", lookup_expr="gte")
+    metros_hasta = django_filters.NumberFilter(field_name="meters", lookup_expr="lte")
+    bbox = NumberInFilter(method="filter_bbox")
+    cerca = NumberInFilter(method="filter_near")
+
+    class Meta:
+        model = models.Property
+        fields = []
+
+    def __init__(self, data=None, *args, **kwargs):
+        super().__init__(data, *args, **kwargs)
+
+        # Query params use dashes, like "precio-desde"
+        self.filters = {
+            name.replace("_", "-"): filter for name, filter in self.filters.items()
+        }
+
+    def filter_queryset(self, queryset):
+        """Apply the filters, and "featured" when present in the query
+        params (django-filter skips empty values, like "?featured")
+        """
+        queryset = super().filter_queryset(queryset)
+        if "featured" in self.data:
+            queryset = queryset.filter(featured=True)
+        return queryset
+
+    def filter_tags_any(self, queryset, name: str, value: list):
+        """Properties with any of the tags (subquery, without duplicates)"""
+        property_ids = models.Property.tags.through.objects.filter(
+            tag_id__in=value
+        ).values("property_id")
+        return queryset.filter(id__in=property_ids)
+
+    def filter_tags_all(self, queryset, name: str, value: list):
+        """Properties with all the tags (single grouped subquery)"""
+        tag_ids = set(value)
+        property_ids = (
+            models.Property.tags.through.objects.filter(tag_id__in=tag_ids)
+            .values("property_id")
+            .annotate(tags_count=Count("tag_id", distinct=True))
+            .filter(tags_count=len(tag_ids))
+            .values("property_id")
+        )
+        return queryset.filter(id__in=property_ids)
+
+    def filter_bbox(self, queryset, name: str, value: list):
+        """Properties inside the map area (without crossing longitude 180)"""
+        if len(value) != 4:
+            raise ValidationError({name: "Use: min lng,min lat,max lng,max lat"})
+        min_longitude, min_latitude, max_longitude, max_latitude = map(float, value)
+        return queryset.filter(
+            get_bbox_filter(
+                (min_latitude, min_longitude, max_latitude, max_longitude)
+            )
+        )
+
+    def filter_near(self, queryset, name: str, value: list):
+        """Properties in the radius (km) of a point"""
+        if len(value) != 3 or value[2] <= 0:
+            raise ValidationError({name: "Use: lat,lng,radius km"})
+        latitude, longitude, radius_km = map(float, value)
+        return filter_radius(queryset, latitude, longitude, radius_km)
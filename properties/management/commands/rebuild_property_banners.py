@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from properties import models
+
+
+class Command(BaseCommand):
+    help = "Copy the first image of each property to its banner columns"
+
+    def handle(self, *args, **kwargs):
+        models.Property.update_banners()
+        print(f"Banners updated: {models.Property.objects.count()} properties")
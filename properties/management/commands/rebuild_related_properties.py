@@ -0,0 +1,31 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from properties import models
+
+BASE_FILE = os.path.basename(__file__)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the related properties index of all properties"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of properties rebuilt per transaction",
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs["batch_size"]
+        property_ids = list(
+            models.Property.objects.order_by("id").values_list("id", flat=True)
+        )
+
+        for start in range(0, len(property_ids), batch_size):
+            batch_ids = property_ids[start:start + batch_size]
+            progress = f"{start + len(batch_ids)}/{len(property_ids)}"
+            print(f"Rebuilding related properties {progress}")
+            models.RelatedProperty.rebuild(batch_ids)
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:44
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+# Related properties of each property (RelatedProperty.LIMIT)
+RELATED_LIMIT = 6
+
+
+def fill_related_properties(apps, schema_editor):
+    """Build the related properties of the active properties, like
+    RelatedProperty.rebuild (the historical models have no classmethods)
+    """
+    Property = apps.get_model("properties", "Property")
+    RelatedProperty = apps.get_model("properties", "RelatedProperty")
+    Tags = Property.tags.through
+
+    entries = []
+    for property in Property.objects.filter(active=True):
+        tag_ids = list(
+            Tags.objects.filter(property_id=property.id).values_list(
+                "tag_id", flat=True
+            )
+        )
+        shared_tags = (
+            Tags.objects.filter(property_id=OuterRef("pk"), tag_id__in=tag_ids)
+            .values("property_id")
+            .annotate(total=Count("tag_id"))
+            .values("total")
+        )
+        same_company = Case(
+            When(company_id=property.company_id, then=Value(1)),
+            default=Value(0),
+        )
+        ranked = (
+            Property.objects.filter(active=True)
+            .exclude(id=property.id)
+            .annotate(shared_tags=Coalesce(Subquery(shared_tags), Value(0)))
+            .filter(Q(company_id=property.company_id) | Q(shared_tags__gt=0))
+            .annotate(score=F("shared_tags") + same_company)
+            .order_by("-score", "-updated_at", "-id")
+            .values_list("id", "score")[:RELATED_LIMIT]
+        )
+        for position, (related_id, score) in enumerate(ranked):
+            entries.append(
+                RelatedProperty(
+                    property_id=property.id,
+                    related_id=related_id,
+                    score=score,
+                    position=position,
+                )
+            )
+    RelatedProperty.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0039_property_review_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProperty',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('score', models.PositiveIntegerField(default=0, help_text='Etiquetas en común más 1 si es de la misma empresa', verbose_name='Puntuación')),
+                ('position', models.PositiveSmallIntegerField(default=0, verbose_name='Posición')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_index', to='properties.property', verbose_name='Propiedad')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_index_entries', to='properties.property', verbose_name='Propiedad relacionada')),
+            ],
+            options={
+                'verbose_name': 'Propiedad relacionada',
+                'verbose_name_plural': 'Propiedades relacionadas',
+                'ordering': ['property', 'position'],
+                'unique_together': {('property', 'related')},
+            },
+        ),
+        migrations.RunPython(fill_related_properties, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from utils.search import create_search_index, delete_search_index
+
+SEARCH_FIELDS = {
+    "es": ("name", "description_es"),
+    "en": ("name", "description_en"),
+}
+
+
+def create_index(apps, schema_editor):
+    """Create full text search index (GIN in Postgres, FTS5 in SQLite)"""
+    model = apps.get_model("properties", "Property")
+    create_search_index(schema_editor, model, SEARCH_FIELDS)
+
+
+def delete_index(apps, schema_editor):
+    """Delete full text search index"""
+    model = apps.get_model("properties", "Property")
+    delete_search_index(schema_editor, model, SEARCH_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0040_relatedproperty"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, delete_index),
+    ]
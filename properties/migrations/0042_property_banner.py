@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:09
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_banners(apps, schema_editor):
+    """Copy the first image (by id) of each property to the banner columns"""
+    Property = apps.get_model("properties", "Property")
+    PropertyImage = apps.get_model("properties", "PropertyImage")
+    first_image = PropertyImage.objects.filter(
+        property=OuterRef("pk")
+    ).order_by("id")[:1]
+    Property.objects.update(
+        banner_image=Coalesce(Subquery(first_image.values("image")), Value("")),
+        banner_alt_es=Coalesce(
+            Subquery(first_image.values("alt_text__es")), Value("")
+        ),
+        banner_alt_en=Coalesce(
+            Subquery(first_image.values("alt_text__en")), Value("")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0041_property_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='banner_alt_en',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='Texto alternativo de portada en inglés'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='banner_alt_es',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='Texto alternativo de portada en español'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='banner_image',
+            field=models.ImageField(blank=True, default='', editable=False, upload_to='property-images/', verbose_name='Imagen de portada'),
+        ),
+        migrations.RunPython(fill_banners, migrations.RunPython.noop),
+    ]
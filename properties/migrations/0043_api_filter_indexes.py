@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0042_property_banner'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['active', '-updated_at'], name='property_active_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('active', True)), fields=['featured', '-updated_at'], name='property_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('active', True)), fields=['location', '-updated_at'], name='property_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('active', True)), fields=['meters'], name='property_meters_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('active', True)), fields=['price'], name='property_price_idx'),
+        ),
+    ]
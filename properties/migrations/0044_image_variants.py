@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0043_api_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='banner_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes del banner'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes del logo'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='banner_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes de la imagen de portada'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes de la imagen'),
+        ),
+    ]
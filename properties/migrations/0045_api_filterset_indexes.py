@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0044_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['type'], name='company_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('active', True)), fields=['category', '-updated_at'], name='property_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('active', True)), fields=['company', '-updated_at'], name='property_company_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+from utils.geo import get_geo_cell
+from utils.google_maps import get_maps_coordinates
+
+
+def fill_coordinates(apps, schema_editor):
+    """Read the coordinates of the maps src of companies and properties"""
+    for model_name in ["Company", "Property"]:
+        model = apps.get_model("properties", model_name)
+        instances = []
+        for instance in model.objects.exclude(google_maps_src__isnull=True).only(
+            "id", "google_maps_src"
+        ):
+            coordinates = get_maps_coordinates(instance.google_maps_src)
+            if coordinates is None:
+                continue
+            instance.latitude, instance.longitude = coordinates
+            instance.geo_cell = get_geo_cell(*coordinates)
+            instances.append(instance)
+        model.objects.bulk_update(
+            instances, ["latitude", "longitude", "geo_cell"], batch_size=500
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0045_api_filterset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, editable=False, help_text='Celda de la cuadrícula del mapa (ver utils.geo)', null=True, verbose_name='Celda del mapa'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Latitud'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Longitud'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, editable=False, help_text='Celda de la cuadrícula del mapa (ver utils.geo)', null=True, verbose_name='Celda del mapa'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Latitud'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Longitud'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['geo_cell'], name='company_geo_cell_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('active', True)), fields=['geo_cell'], name='property_geo_cell_idx'),
+        ),
+        migrations.RunPython(fill_coordinates, migrations.RunPython.noop),
+    ]
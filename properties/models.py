@@ -1,11 +1,27 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from translations.cache import get_translation
 from translations.models import Translation
 from slugify import slugify
 
+from utils.geo import GeoPointMixin
 from utils.google_maps import get_maps_src
+from utils.images import ImageVariantsMixin
+from utils.slugs import UniqueSlugMixin, is_slug_variant
 
 
-class Company(models.Model):
+class Company(ImageVariantsMixin, GeoPointMixin, UniqueSlugMixin, models.Model):
 
     # Options
     PROPERTY_TYPE_CHOICES = [
@@ -78,6 +94,18 @@ class Company(models.Model):
         blank=True,
         verbose_name="Banner de la empresa",
     )
+    logo_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes del logo",
+    )
+    banner_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes del banner",
+    )
     location = models.ForeignKey(
         "Location",
         on_delete=models.SET_NULL,
@@ -101,6 +129,19 @@ class Company(models.Model):
         verbose_name="src de Google Maps",
         help_text="Puedes insertar el iframe completo",
     )
+    latitude = models.FloatField(
+        null=True, blank=True, editable=False, verbose_name="Latitud"
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, editable=False, verbose_name="Longitud"
+    )
+    geo_cell = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Celda del mapa",
+        help_text="Celda de la cuadrícula del mapa (ver utils.geo)",
+    )
     phone = models.CharField(
         max_length=255,
         verbose_name="Teléfono de la empresa",
@@ -130,18 +171,42 @@ class Company(models.Model):
         help_text="Indica si la empresa tiene una promoción activa",
     )
 
+    IMAGE_VARIANTS_FIELDS = {
+        "logo": "logo_variants",
+        "banner": "banner_variants",
+    }
+
     class Meta:
         verbose_name_plural = "Empresas"
         verbose_name = "Empresa"
 
+        # Properties api filter by company type and map searches
+        indexes = [
+            models.Index(fields=["type"], name="company_type_idx"),
+            models.Index(fields=["geo_cell"], name="company_geo_cell_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
+    def get_base_slug(self) -> str:
+        """Build the slug of the company from its name
+
+        Returns:
+            str: Company slug
+        """
+        return slugify(self.name)
+
     def save(self, *args, **kwargs):
         """Custom save method"""
 
-        # Generate slug
-        self.slug = slugify(self.name)
+        # Allocate a new slug when the name changes (deduplicated or with
+        # the id prefix slugs of the same name are kept)
+        base_slug = self.get_base_slug()
+        if not is_slug_variant(self.slug, base_slug) and not is_slug_variant(
+            self.slug, f"{self.id}-{base_slug}"
+        ):
+            self.slug = None
 
         # get src from google maps iframe
         if self.google_maps_src:
@@ -189,7 +254,7 @@ class Location(models.Model):
         Returns:
             str: Location name in the correct language
         """
-        return getattr(self.name, language)
+        return get_translation(self.name_id, language)
 
 
 class Category(models.Model):
@@ -219,7 +284,7 @@ class Category(models.Model):
         Returns:
             str: Category name in the correct language
         """
-        return getattr(self.name, language)
+        return get_translation(self.name_id, language)
 
 
 class Tag(models.Model):
@@ -246,7 +311,7 @@ class Tag(models.Model):
         Returns:
             str: tag name in the correct language
         """
-        return getattr(self.name, language)
+        return get_translation(self.name_id, language)
 
 
 class ShortDescription(models.Model):
@@ -275,7 +340,7 @@ class ShortDescription(models.Model):
             str: Short description in the correct language
         """
 
-        return getattr(self.description, language)
+        return get_translation(self.description_id, language)
 
 
 class Seller(models.Model):
@@ -305,7 +370,31 @@ class Seller(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
-class Property(models.Model):
+class Property(GeoPointMixin, UniqueSlugMixin, models.Model):
+
+    # Full text search fields for each language (see utils.search)
+    SEARCH_FIELDS = {
+        "es": ("name", "description_es"),
+        "en": ("name", "description_en"),
+    }
+
+    # Fields of the csv / ndjson exports (see utils.export)
+    EXPORT_FIELDS = [
+        "id",
+        "name",
+        "slug",
+        "company__name",
+        "location__name__es",
+        "category__name__es",
+        "seller__email",
+        "price",
+        "meters",
+        "active",
+        "featured",
+        "created_at",
+        "updated_at",
+    ]
+
     id = models.AutoField(primary_key=True)
     name = models.CharField(
         max_length=255, verbose_name="Nombre del desarrollo o propiedad", unique=True
@@ -361,6 +450,19 @@ class Property(models.Model):
         verbose_name="src de Google Maps",
         help_text="Puedes insertar el iframe completo",
     )
+    latitude = models.FloatField(
+        null=True, blank=True, editable=False, verbose_name="Latitud"
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, editable=False, verbose_name="Longitud"
+    )
+    geo_cell = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Celda del mapa",
+        help_text="Celda de la cuadrícula del mapa (ver utils.geo)",
+    )
     review_name = models.CharField(
         max_length=255,
         verbose_name="Nombre de review",
@@ -382,6 +484,36 @@ class Property(models.Model):
     )
     description_es = models.TextField(verbose_name="Descripción en español")
     description_en = models.TextField(verbose_name="Descripción en inglés")
+
+    # Banner (first image by id) copied by signals, see update_banners
+    banner_image = models.ImageField(
+        upload_to="property-images/",
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Imagen de portada",
+    )
+    banner_alt_es = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Texto alternativo de portada en español",
+    )
+    banner_alt_en = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Texto alternativo de portada en inglés",
+    )
+    banner_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes de la imagen de portada",
+    )
+
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name="Fecha de creación"
     )
@@ -393,24 +525,58 @@ class Property(models.Model):
         verbose_name_plural = "Propiedades"
         verbose_name = "Propiedad"
 
+        # Access paths of the api filters (active properties sorted by date)
+        indexes = [
+            models.Index(
+                fields=["active", "-updated_at"], name="property_active_updated_idx"
+            ),
+            models.Index(
+                fields=["featured", "-updated_at"],
+                condition=Q(active=True),
+                name="property_featured_idx",
+            ),
+            models.Index(
+                fields=["location", "-updated_at"],
+                condition=Q(active=True),
+                name="property_location_idx",
+            ),
+            models.Index(
+                fields=["category", "-updated_at"],
+                condition=Q(active=True),
+                name="property_category_idx",
+            ),
+            models.Index(
+                fields=["company", "-updated_at"],
+                condition=Q(active=True),
+                name="property_company_idx",
+            ),
+            models.Index(
+                fields=["meters"], condition=Q(active=True), name="property_meters_idx"
+            ),
+            models.Index(
+                fields=["price"], condition=Q(active=True), name="property_price_idx"
+            ),
+            models.Index(
+                fields=["geo_cell"],
+                condition=Q(active=True),
+                name="property_geo_cell_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.location}"
 
+    def get_base_slug(self) -> str:
+        """Build the slug of the property from its name (without deduplication)
+
+        Returns:
+            str: Property slug
+        """
+        return slugify(self.name)
+
     def save(self, *args, **kwargs):
         """Custom save method"""
 
-        # Override slug if not set
-        if not self.slug:
-            slug = slugify(self.name)
-            
-            # Validate slug is unique
-            extra_slug = 1
-            while Property.objects.filter(slug=slug).exists():
-                slug = f"{slug}-{extra_slug}"
-                extra_slug += 1
-            
-            self.slug = slug
-
         # get src from google maps iframe
         if self.google_maps_src:
             self.google_maps_src = get_maps_src(self.google_maps_src)
@@ -446,13 +612,61 @@ class Property(models.Model):
         """
         return self.short_description.get_description(language)
 
+    def get_banner_alt(self, language: str) -> str:
+        """Retrieve banner alt text in the correct language
+
+        Args:
+            language (str): Language to retrieve the alt text in
+
+        Returns:
+            str: Banner alt text in the correct language
+        """
 
-class PropertyImage(models.Model):
+        return getattr(self, f"banner_alt_{language}", "")
+
+    @classmethod
+    def update_banners(cls, property_ids=None):
+        """Copy the first image (by id), its alt texts and variants of the
+        properties to the banner columns, in a single update query
+
+        Args:
+            property_ids (iterable): Ids (or ids queryset) of the properties
+                to update. None updates all the properties
+        """
+
+        first_image = PropertyImage.objects.filter(
+            property=OuterRef("pk")
+        ).order_by("id")[:1]
+        properties = cls.objects.all()
+        if property_ids is not None:
+            properties = properties.filter(id__in=property_ids)
+        properties.update(
+            banner_image=Coalesce(Subquery(first_image.values("image")), Value("")),
+            banner_alt_es=Coalesce(
+                Subquery(first_image.values("alt_text__es")), Value("")
+            ),
+            banner_alt_en=Coalesce(
+                Subquery(first_image.values("alt_text__en")), Value("")
+            ),
+            banner_variants=Coalesce(
+                Subquery(first_image.values("image_variants")),
+                Value({}, output_field=models.JSONField()),
+            ),
+        )
+
+
+class PropertyImage(ImageVariantsMixin, models.Model):
     id = models.AutoField(primary_key=True)
     property = models.ForeignKey(
         Property, on_delete=models.CASCADE, verbose_name="Propiedad"
     )
     image = models.ImageField(upload_to="property-images/", verbose_name="Imagen")
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes de la imagen",
+    )
     alt_text = models.OneToOneField(
         Translation,
         on_delete=models.CASCADE,
@@ -467,6 +681,8 @@ class PropertyImage(models.Model):
         auto_now=True, verbose_name="Fecha de actualización"
     )
 
+    IMAGE_VARIANTS_FIELDS = {"image": "image_variants"}
+
     class Meta:
         verbose_name_plural = "Imágenes"
         verbose_name = "Imagen"
@@ -474,6 +690,10 @@ class PropertyImage(models.Model):
     def __str__(self):
         return f"{self.property} - {self.alt_text.key}"
 
+    def image_variants_updated(self):
+        """Copy the variants to the property banner columns"""
+        Property.update_banners([self.property_id])
+
     def get_alt_text(self, language: str) -> str:
         """Retrieve alt text in the correct language
 
@@ -483,4 +703,171 @@ class PropertyImage(models.Model):
         Returns:
             str: Alt text in the correct language
         """
-        return getattr(self.alt_text, language)
+        return get_translation(self.alt_text_id, language)
+
+
+class RelatedProperty(models.Model):
+    """Precomputed related properties of each property, ranked by shared
+    tags and company (rebuilt by signals and the
+    rebuild_related_properties command)
+    """
+
+    LIMIT = 6
+
+    id = models.AutoField(primary_key=True)
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        verbose_name="Propiedad",
+        related_name="related_index",
+    )
+    related = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        verbose_name="Propiedad relacionada",
+        related_name="related_index_entries",
+    )
+    score = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Puntuación",
+        help_text="Etiquetas en común más 1 si es de la misma empresa",
+    )
+    position = models.PositiveSmallIntegerField(default=0, verbose_name="Posición")
+
+    class Meta:
+        verbose_name_plural = "Propiedades relacionadas"
+        verbose_name = "Propiedad relacionada"
+        ordering = ["property", "position"]
+        unique_together = ["property", "related"]
+
+    def __str__(self):
+        return f"{self.property} -> {self.related}"
+
+    @classmethod
+    def get_candidates(cls, property: Property):
+        """Retrieve the active properties related to the given one
+        (one or more tags in common or same company) with their score
+
+        Args:
+            property (Property): Property to find related properties for
+
+        Returns:
+            QuerySet: Properties annotated with "score"
+        """
+
+        tag_ids = list(property.tags.values_list("id", flat=True))
+        shared_tags = (
+            Property.tags.through.objects.filter(
+                property_id=OuterRef("pk"), tag_id__in=tag_ids
+            )
+            .values("property_id")
+            .annotate(total=Count("tag_id"))
+            .values("total")
+        )
+        same_company = Case(
+            When(company_id=property.company_id, then=Value(1)),
+            default=Value(0),
+        )
+        return (
+            Property.objects.filter(active=True)
+            .exclude(id=property.id)
+            .annotate(shared_tags=Coalesce(Subquery(shared_tags), Value(0)))
+            .filter(Q(company_id=property.company_id) | Q(shared_tags__gt=0))
+            .annotate(score=F("shared_tags") + same_company)
+        )
+
+    @classmethod
+    def get_ranked_properties(cls, property: Property) -> list:
+        """Retrieve the related properties of the given one, best ranked first
+
+        Args:
+            property (Property): Property to find related properties for
+
+        Returns:
+            list: Tuples (property id, score) of the related properties
+        """
+
+        related_properties = cls.get_candidates(property).order_by(
+            "-score", "-updated_at", "-id"
+        )
+        return list(related_properties.values_list("id", "score")[: cls.LIMIT])
+
+    @classmethod
+    def rebuild(cls, property_ids: list):
+        """Rebuild the related properties of the given properties
+
+        Args:
+            property_ids (list): Ids of the properties to rebuild
+        """
+
+        properties = Property.objects.filter(id__in=set(property_ids))
+        with transaction.atomic():
+            cls.objects.filter(property_id__in=set(property_ids)).delete()
+            entries = []
+            for property in properties:
+                if not property.active:
+                    continue
+                ranked = cls.get_ranked_properties(property)
+                for position, (related_id, score) in enumerate(ranked):
+                    entries.append(
+                        cls(
+                            property=property,
+                            related_id=related_id,
+                            score=score,
+                            position=position,
+                        )
+                    )
+            cls.objects.bulk_create(entries)
+
+    @classmethod
+    def get_affected_ids(cls, property_ids: set) -> set:
+        """Retrieve the properties whose related properties can change
+        after the given properties changed: themselves, the properties
+        that list them and the properties whose list they can enter
+        (with free positions or a score not lower than the last one;
+        the changed property is the newest, so it wins the ties)
+
+        Args:
+            property_ids (set): Ids of the properties changed
+
+        Returns:
+            set: Ids of the properties to rebuild
+        """
+
+        linked = cls.objects.filter(related_id__in=property_ids).values_list(
+            "property_id", flat=True
+        )
+        affected_ids = {*property_ids, *linked}
+
+        entries = (
+            cls.objects.filter(property_id=OuterRef("pk"))
+            .values("property_id")
+            .annotate(total=Count("id"), min_score=Min("score"))
+        )
+        for property in Property.objects.filter(id__in=property_ids, active=True):
+            entering = (
+                cls.get_candidates(property)
+                .annotate(
+                    entries=Coalesce(Subquery(entries.values("total")), Value(0)),
+                    min_score=Subquery(entries.values("min_score")),
+                )
+                .filter(Q(entries__lt=cls.LIMIT) | Q(min_score__lte=F("score")))
+            )
+            affected_ids |= set(entering.values_list("id", flat=True))
+        return affected_ids
+
+    @classmethod
+    def update_index(cls, property_ids: set = (), rebuild_ids: set = ()):
+        """Update the index after changes of the properties (see
+        get_affected_ids), plus the properties to rebuild directly (like
+        the ones that listed a deleted property)
+
+        Args:
+            property_ids (set): Ids of the properties changed
+            rebuild_ids (set): Ids of other properties to rebuild
+        """
+
+        affected_ids = set(rebuild_ids)
+        if property_ids:
+            affected_ids |= cls.get_affected_ids(set(property_ids))
+        cls.rebuild(affected_ids)
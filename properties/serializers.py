@@ -1,6 +1,8 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 
 from properties import models
+from utils.images import get_image_metadata, get_image_srcset
 from utils.media import get_media_url
 from utils.whatsapp import get_whatsapp_link
 from core.serializers import BaseModelTranslationsSerializer, BaseSearchSerializer
@@ -92,8 +94,27 @@ class PropertyListItemSerializer(BaseModelTranslationsSerializer):
             "updated_at",
             "featured",
             "google_maps_src",
+            "geo_cell",
+            "banner_image",
+            "banner_alt_es",
+            "banner_alt_en",
+            "banner_variants",
         ]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load foreign keys and tags in a fixed number of queries
+        (banner is read from the property columns)
+        """
+
+        return queryset.select_related(
+            "company",
+            "seller",
+            "location",
+            "category",
+            "short_description",
+        ).prefetch_related("tags")
+
     def get_location(self, obj) -> str:
         """Retrieve location name in the correct language
 
@@ -103,23 +124,29 @@ class PropertyListItemSerializer(BaseModelTranslationsSerializer):
 
         return obj.location.get_name(self.__get_language__())
 
-    def get_banner(self, obj) -> str:
-        """Retrieve banner url
+    def get_banner(self, obj) -> dict:
+        """Retrieve banner url, alt text, resized variants and metadata
+        (size, dominant color and placeholder)
 
         Returns:
-            str: Banner url
+            dict: Banner data
         """
 
-        all_images = models.PropertyImage.objects.filter(property=obj)
-        try:
-            banner = all_images[0]
-            banner_url = get_media_url(banner.image)
-            banner_alt = banner.get_alt_text(self.__get_language__())
-        except Exception:
-            banner_url = ""
-            banner_alt = ""
+        # Banner columns are kept in sync with the first image
+        if not obj.banner_image:
+            return {
+                "url": "",
+                "alt": "",
+                "srcset": [],
+                **get_image_metadata({}),
+            }
 
-        return {"url": banner_url, "alt": banner_alt}
+        return {
+            "url": get_media_url(obj.banner_image),
+            "alt": obj.get_banner_alt(self.__get_language__()),
+            "srcset": get_image_srcset(obj.banner_variants),
+            **get_image_metadata(obj.banner_variants),
+        }
 
     def get_price(self, obj) -> str:
         """Retrieve price in correct format: 1,000,000.00
@@ -166,7 +193,38 @@ class PropertyDetailSerializer(PropertyListItemSerializer):
 
     class Meta:
         model = models.Property
-        exclude = ["active", "description_es", "description_en"]
+        exclude = [
+            "active",
+            "description_es",
+            "description_en",
+            "geo_cell",
+            "banner_image",
+            "banner_alt_es",
+            "banner_alt_en",
+            "banner_variants",
+        ]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load list data plus all the property images and the
+        related properties from the precomputed index
+        """
+        queryset = super().setup_eager_loading(queryset)
+        related_properties = PropertyListItemSerializer.setup_eager_loading(
+            models.Property.objects.all()
+        )
+        return queryset.prefetch_related(
+            Prefetch(
+                "propertyimage_set",
+                queryset=models.PropertyImage.objects.order_by("id"),
+            ),
+            Prefetch(
+                "related_index",
+                queryset=models.RelatedProperty.objects.order_by(
+                    "position"
+                ).prefetch_related(Prefetch("related", queryset=related_properties)),
+            ),
+        )
 
     def get_images(self, obj) -> list:
         """Retrieve all images for the property
@@ -175,12 +233,20 @@ class PropertyDetailSerializer(PropertyListItemSerializer):
             list: List of images
         """
 
-        all_images = models.PropertyImage.objects.filter(property=obj)
+        all_images = obj.propertyimage_set.all()
         images = []
         for image in all_images:
             image_url = get_media_url(image.image)
             image_alt = image.get_alt_text(self.__get_language__())
-            images.append({"id": image.id, "url": image_url, "alt": image_alt})
+            images.append(
+                {
+                    "id": image.id,
+                    "url": image_url,
+                    "alt": image_alt,
+                    "srcset": image.get_srcset("image"),
+                    **image.get_metadata("image"),
+                }
+            )
         return images
 
     def get_description(self, obj) -> str:
@@ -199,40 +265,46 @@ class PropertyDetailSerializer(PropertyListItemSerializer):
             list: List of related properties
         """
 
-        # get related properties that have one or more tags in common and company
-        tags = obj.tags.all()
-        company = obj.company
-        properties = models.Property.objects.filter(active=True).order_by("-updated_at")
-        related_properties_tags = (
-            properties.filter(tags__in=tags).exclude(id=obj.id).distinct()[:6]
-        )
-        related_properties_company = properties.filter(
-            company=company, active=True
-        ).exclude(id=obj.id)
-
-        # get last 6 properties from the same company and with the same tags
-        related_properties = (
-            related_properties_tags | related_properties_company
-        ).distinct()[:6]
-
-        # Complete with random properties if not enough related properties found
-        if related_properties.count() < 6:
-            random_properties = (
-                properties.exclude(
-                    id__in=related_properties.values_list("id", flat=True)
-                )
-                .exclude(id=obj.id)
-                .distinct()[: 6 - related_properties.count()]
-            )
-            related_properties = related_properties | random_properties
+        # Read related properties from the precomputed index
+        related_properties = [
+            related_index.related
+            for related_index in obj.related_index.all()
+            if related_index.related.active
+        ][: models.RelatedProperty.LIMIT]
+
+        # Complete with latest properties if not enough related properties found
+        if len(related_properties) < models.RelatedProperty.LIMIT:
+            excluded_ids = {obj.id} | {property.id for property in related_properties}
+            for property in self.__get_latest_properties__():
+                if len(related_properties) >= models.RelatedProperty.LIMIT:
+                    break
+                if property.id not in excluded_ids:
+                    related_properties.append(property)
 
         # Serialize the related properties
-        if not related_properties:
-            return []
         return PropertyListItemSerializer(
             related_properties, many=True, context=self.context
         ).data
 
+    def __get_latest_properties__(self) -> list:
+        """Retrieve (once per serializer) the latest active properties,
+        used to complete the related properties
+
+        Returns:
+            list: Latest active properties
+        """
+
+        if not hasattr(self, "_latest_properties"):
+            properties = models.Property.objects.filter(active=True).order_by(
+                "-updated_at"
+            )
+            self._latest_properties = list(
+                PropertyListItemSerializer.setup_eager_loading(properties)[
+                    : models.RelatedProperty.LIMIT * 2
+                ]
+            )
+        return self._latest_properties
+
 
 class PropertySummarySerializer(BaseModelTranslationsSerializer):
     """Return only the property's names"""
@@ -245,6 +317,11 @@ class PropertySummarySerializer(BaseModelTranslationsSerializer):
         fields = ("id", "name", "slug", "updated_at", "company", "location")
         page_size = 1000
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load company and location in the same query"""
+        return queryset.select_related("company", "location")
+
     def get_location(self, obj) -> str:
         """Retrieve location name in the correct language
 
@@ -269,6 +346,11 @@ class PropertySearchSerializer(BaseSearchSerializer):
     class Meta(BaseSearchSerializer.Meta):
         model = models.Property
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load short description in the same query"""
+        return queryset.select_related("short_description")
+
     def get_image(self, obj) -> str:
         """Retrieve first property image found
 
@@ -276,10 +358,9 @@ class PropertySearchSerializer(BaseSearchSerializer):
             str: Image url
         """
 
-        property_images = models.PropertyImage.objects.filter(property=obj)
-        if property_images.exists():
-            return get_media_url(property_images[0].image)
-        return ""
+        if not obj.banner_image:
+            return ""
+        return get_media_url(obj.banner_image)
 
     def get_description(self, obj) -> str:
         """Retrieve description in the correct language
@@ -304,6 +385,7 @@ class CompanyDetailSerializer(BaseModelTranslationsSerializer):
 
     location = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
+    logo_metadata = serializers.SerializerMethodField()
     related_properties = PropertyListItemSerializer(many=True, read_only=True)
 
     class Meta:
@@ -311,8 +393,23 @@ class CompanyDetailSerializer(BaseModelTranslationsSerializer):
         exclude = [
             "description_es",
             "description_en",
+            "geo_cell",
+            "logo_variants",
+            "banner_variants",
         ]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load location and the company properties with their list data"""
+        return queryset.select_related("location").prefetch_related(
+            Prefetch(
+                "related_properties",
+                queryset=PropertyListItemSerializer.setup_eager_loading(
+                    models.Property.objects.all()
+                ),
+            )
+        )
+
     def get_location(self, obj) -> str:
         """Retrieve location name in the correct language
 
@@ -324,6 +421,14 @@ class CompanyDetailSerializer(BaseModelTranslationsSerializer):
             return ""
         return obj.location.get_name(self.__get_language__())
 
+    def get_logo_metadata(self, obj) -> dict:
+        """Retrieve the logo size, dominant color and placeholder
+
+        Returns:
+            dict: Logo metadata
+        """
+        return obj.get_metadata("logo")
+
     def get_description(self, obj) -> str:
         """Retrieve description in the correct language
 
@@ -350,6 +455,7 @@ class CompanySummarySerializer(BaseModelTranslationsSerializer):
 
     # properties = PropertySummarySerializer(many=True, read_only=True)
     location = serializers.SerializerMethodField()
+    logo_metadata = serializers.SerializerMethodField()
 
     class Meta:
         model = models.Company
@@ -359,10 +465,16 @@ class CompanySummarySerializer(BaseModelTranslationsSerializer):
             "type",
             "slug",
             "logo",
+            "logo_metadata",
             "banner",
             "location",
         ]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load location in the same query"""
+        return queryset.select_related("location")
+
     def get_location(self, obj) -> str:
         """Retrieve location name in the correct language
 
@@ -373,3 +485,11 @@ class CompanySummarySerializer(BaseModelTranslationsSerializer):
         if obj.location is None:
             return ""
         return obj.location.get_name(self.__get_language__())
+
+    def get_logo_metadata(self, obj) -> dict:
+        """Retrieve the logo size, dominant color and placeholder
+
+        Returns:
+            dict: Logo metadata
+        """
+        return obj.get_metadata("logo")
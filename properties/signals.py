@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from properties import models
+from translations.models import Translation
+
+
+class PendingRelatedUpdate:
+    """Properties changed in the current transaction, updated once in the
+    related properties index when it is committed (like the save and the
+    tags change of an admin form)
+    """
+
+    def __init__(self):
+        self.property_ids = set()
+        self.rebuild_ids = set()
+        self.done = False
+
+    def run(self):
+        self.done = True
+        models.RelatedProperty.update_index(self.property_ids, self.rebuild_ids)
+
+
+def schedule_related_update(property_ids: set = (), rebuild_ids: set = ()):
+    """Add properties to the related properties update of the current
+    transaction (run immediately without transaction)
+
+    Args:
+        property_ids (set): Ids of the properties changed
+        rebuild_ids (set): Ids of other properties to rebuild
+    """
+
+    # Reuse the update while it is waiting in the transaction (callbacks
+    # are discarded on rollback)
+    connection = transaction.get_connection()
+    pending = getattr(connection, "related_pending_update", None)
+    registered = (
+        pending is not None
+        and not pending.done
+        and any(callback[1] == pending.run for callback in connection.run_on_commit)
+    )
+    if not registered:
+        pending = PendingRelatedUpdate()
+        connection.related_pending_update = pending
+
+    pending.property_ids |= set(property_ids)
+    pending.rebuild_ids |= set(rebuild_ids)
+    if not registered:
+        transaction.on_commit(pending.run)
+
+
+@receiver(post_save, sender=models.Property)
+def update_related_on_save(sender, instance, raw=False, **kwargs):
+    """Update related properties index when a property is saved"""
+    if raw:
+        return
+    schedule_related_update(property_ids={instance.id})
+
+
+@receiver(pre_delete, sender=models.Property)
+def collect_related_on_delete(sender, instance, **kwargs):
+    """Save the properties that list the property before it is deleted"""
+    instance._related_linked_ids = set(
+        models.RelatedProperty.objects.filter(related_id=instance.id).values_list(
+            "property_id", flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=models.Property)
+def update_related_on_delete(sender, instance, **kwargs):
+    """Rebuild the properties that listed a deleted property"""
+    linked_ids = getattr(instance, "_related_linked_ids", set())
+    schedule_related_update(rebuild_ids=linked_ids - {instance.id})
+
+
+@receiver(m2m_changed, sender=models.Property.tags.through)
+def update_related_on_tags_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Update related properties index when the tags of a property change"""
+
+    # Save current properties of the tag before clear it
+    if action == "pre_clear" and reverse:
+        instance._related_property_ids = set(
+            instance.properties.values_list("id", flat=True)
+        )
+        return
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+
+    # Get properties changed (tag.properties.add or property.tags.add)
+    if not reverse:
+        property_ids = {instance.id}
+    elif action == "post_clear":
+        property_ids = getattr(instance, "_related_property_ids", set())
+    else:
+        property_ids = pk_set
+    schedule_related_update(property_ids=property_ids)
+
+
+@receiver(pre_delete, sender=models.Tag)
+def collect_related_on_tag_delete(sender, instance, **kwargs):
+    """Save the properties of the tag before it is deleted"""
+    instance._related_property_ids = set(
+        instance.properties.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=models.Tag)
+def update_related_on_tag_delete(sender, instance, **kwargs):
+    """Update related properties index of the properties of a deleted tag"""
+    schedule_related_update(
+        property_ids=getattr(instance, "_related_property_ids", set())
+    )
+
+
+@receiver(post_save, sender=models.PropertyImage)
+@receiver(post_delete, sender=models.PropertyImage)
+def update_banner_on_image_change(sender, instance, raw=False, **kwargs):
+    """Update the banner columns of the property of the image"""
+    if raw:
+        return
+    models.Property.update_banners([instance.property_id])
+
+
+@receiver(post_save, sender=Translation)
+def update_banner_on_alt_text_change(sender, instance, raw=False, **kwargs):
+    """Update the banner alt texts of the property using the translation"""
+    if raw:
+        return
+    models.Property.update_banners(
+        models.PropertyImage.objects.filter(alt_text=instance).values("property_id")
+    )
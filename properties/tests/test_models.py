@@ -1,6 +1,18 @@
+import importlib
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image
+
 from properties import models
 from translations import models as translations_models
 from core.test_base.test_models import TestPropertiesModelsBase
+from utils.geo import get_geo_cell
+from utils.google_maps import get_maps_coordinates
+from utils.media import get_media_url, get_storage_url, get_test_image
 
 
 class LocationTestCase(TestPropertiesModelsBase):
@@ -82,6 +94,44 @@ class PropertyTestCase(TestPropertiesModelsBase):
             self.property.get_description("en"), self.property.description_en
         )
 
+    def test_save_coordinates(self):
+        """Validate reading the coordinates and grid cell of the maps src"""
+
+        self.property.google_maps_src = (
+            "https://www.google.com/maps/embed?pb=!1m18!1m12!1m3!1d3762.6"
+            "!2d-99.1332!3d19.4326!2m3!1f0!2f0!3f0"
+        )
+        self.property.save()
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.latitude, 19.4326)
+        self.assertEqual(self.property.longitude, -99.1332)
+        self.assertEqual(self.property.geo_cell, get_geo_cell(19.4326, -99.1332))
+
+        # Src without coordinates
+        self.property.google_maps_src = "https://www.google.com/maps/embed?pb=!1m"
+        self.property.save()
+        self.assertIsNone(self.property.latitude)
+        self.assertIsNone(self.property.geo_cell)
+
+    def test_get_maps_coordinates(self):
+        """Validate the coordinates formats of the maps urls"""
+
+        base = "https://www.google.com/maps"
+        cases = [
+            (f"{base}/embed?pb=!1m18!2d-99.13!3d19.43!4m5!3m4", (19.43, -99.13)),
+            (
+                f"{base}/embed?pb=!2d-99.13!3d19.43!3m2!1s0x0!3d19.5!4d-99.2",
+                (19.5, -99.2),
+            ),
+            (f"{base}/place/Casa/@21.16,-86.85,15z", (21.16, -86.85)),
+            (f"{base}?q=20.96,-89.62", (20.96, -89.62)),
+            (f"{base}?q=120.5,-89.62", None),
+            (f"{base}/embed?pb=!1m18", None),
+            (None, None),
+        ]
+        for src, coordinates in cases:
+            self.assertEqual(get_maps_coordinates(src), coordinates)
+
     def test_get_price_str(self):
         """Validate retrieving the price as a string"""
 
@@ -176,6 +226,35 @@ class CompanyTestCase(TestPropertiesModelsBase):
         self.company.save()
         self.assertEqual(self.company.slug, "this-is-a-test-name")
 
+    def test_save_slug_conflict(self):
+        """Validate companies with names of the same slug get unique slugs
+        that are kept while the name does not change
+        """
+
+        company = self.create_company(name="Company Test!")
+        self.assertEqual(company.slug, f"{self.company.slug}-1")
+        company.save()
+        self.assertEqual(company.slug, f"{self.company.slug}-1")
+
+    def test_backfill_slugs(self):
+        """Validate filling the missing slugs of companies and properties"""
+
+        property = self.create_property(company=self.company)
+        models.Company.objects.filter(id=self.company.id).update(slug=None)
+        models.Property.objects.filter(id=property.id).update(slug=None)
+
+        call_command(
+            "backfill_slugs",
+            "--models",
+            "properties.Property",
+            "properties.Company",
+        )
+
+        self.company.refresh_from_db()
+        property.refresh_from_db()
+        self.assertEqual(self.company.slug, self.company.get_base_slug())
+        self.assertEqual(property.slug, property.get_base_slug())
+
     def test_save_google_maps_no_change_src(self):
         """Validate that the google maps src is not changed if it is already correct"""
 
@@ -219,3 +298,416 @@ class CompanyTestCase(TestPropertiesModelsBase):
 
         self.company.refresh_from_db()
         self.assertNotEqual(self.company.google_maps_src, src)
+
+
+class RelatedPropertyTestCase(TestPropertiesModelsBase):
+    """Validate related properties index maintained by signals"""
+
+    def setUp(self):
+
+        # Property required models
+        self.location = self.create_location()
+        self.category = self.create_category()
+        self.seller = self.create_seller()
+        self.company_a = self.create_company("Company A", location=self.location)
+        self.company_b = self.create_company("Company B", location=self.location)
+        self.tag = self.create_tag("Tag related")
+
+    def create_related_property(self, name: str, company: models.Company):
+        """Create a property with the shared base models"""
+
+        return self.create_property(
+            name=name,
+            company=company,
+            location=self.location,
+            category=self.category,
+            seller=self.seller,
+        )
+
+    def get_related_ids(self, property: models.Property) -> list:
+        """Retrieve the related properties ids from the index"""
+
+        return list(property.related_index.values_list("related_id", flat=True))
+
+    def test_same_company(self):
+        """Validate properties of the same company are linked on save"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            property_1 = self.create_related_property("Property 1", self.company_a)
+            property_2 = self.create_related_property("Property 2", self.company_a)
+            property_3 = self.create_related_property("Property 3", self.company_b)
+
+        self.assertEqual(self.get_related_ids(property_1), [property_2.id])
+        self.assertEqual(self.get_related_ids(property_2), [property_1.id])
+        self.assertEqual(self.get_related_ids(property_3), [])
+
+    def test_shared_tags_ranked_first(self):
+        """Validate properties with tags in common and same company
+        are ranked before properties of the same company only
+        """
+
+        with self.captureOnCommitCallbacks(execute=True):
+            property_1 = self.create_related_property("Property 1", self.company_a)
+            property_2 = self.create_related_property("Property 2", self.company_a)
+            property_3 = self.create_related_property("Property 3", self.company_a)
+        with self.captureOnCommitCallbacks(execute=True):
+            property_1.tags.add(self.tag)
+            property_2.tags.add(self.tag)
+
+        self.assertEqual(
+            self.get_related_ids(property_1), [property_2.id, property_3.id]
+        )
+        self.assertEqual(property_1.related_index.first().score, 2)
+
+    def test_tag_removed(self):
+        """Validate index is updated when tags are removed"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            property_1 = self.create_related_property("Property 1", self.company_a)
+            property_2 = self.create_related_property("Property 2", self.company_b)
+            property_1.tags.add(self.tag)
+            property_2.tags.add(self.tag)
+        self.assertEqual(self.get_related_ids(property_1), [property_2.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.properties.clear()
+        self.assertEqual(self.get_related_ids(property_1), [])
+        self.assertEqual(self.get_related_ids(property_2), [])
+
+    def test_inactive_and_deleted_properties(self):
+        """Validate inactive and deleted properties are removed from the index"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            property_1 = self.create_related_property("Property 1", self.company_a)
+            property_2 = self.create_related_property("Property 2", self.company_a)
+            property_3 = self.create_related_property("Property 3", self.company_a)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            property_2.active = False
+            property_2.save()
+        self.assertEqual(self.get_related_ids(property_1), [property_3.id])
+        self.assertEqual(self.get_related_ids(property_2), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            property_3.delete()
+        self.assertEqual(self.get_related_ids(property_1), [])
+
+    def test_single_update_per_transaction(self):
+        """Validate the save and the tags change of a property (like the
+        admin form) update the index once, after the commit
+        """
+
+        with self.captureOnCommitCallbacks(execute=True):
+            property_1 = self.create_related_property("Property 1", self.company_a)
+            property_2 = self.create_related_property("Property 2", self.company_b)
+
+        with mock.patch.object(
+            models.RelatedProperty,
+            "update_index",
+            wraps=models.RelatedProperty.update_index,
+        ) as update_index:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                property_1.name = "Property 1 updated"
+                property_1.save()
+                property_1.tags.set([self.tag])
+                property_2.tags.add(self.tag)
+
+                # Nothing updated before the commit
+                update_index.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        update_index.assert_called_once()
+        self.assertEqual(self.get_related_ids(property_1), [property_2.id])
+        self.assertEqual(self.get_related_ids(property_2), [property_1.id])
+
+    def test_affected_properties(self):
+        """Validate only the properties whose list can change are rebuilt:
+        the changed one, the ones that list it and the ones with free
+        positions or lower scores
+        """
+
+        with self.captureOnCommitCallbacks(execute=True):
+            company_c = self.create_company("Company C", location=self.location)
+            changed = self.create_related_property("Changed", self.company_a)
+            same_company = self.create_related_property("Same", self.company_a)
+            other_company = self.create_related_property("Other", self.company_b)
+
+            # Full list of properties with 2 shared tags
+            tag_2 = self.create_tag("Tag related 2")
+            full = self.create_related_property("Full", company_c)
+            full.tags.add(self.tag, tag_2)
+            for index in range(models.RelatedProperty.LIMIT):
+                property = self.create_related_property(f"Full {index}", company_c)
+                property.tags.add(self.tag, tag_2)
+            changed.tags.add(self.tag)
+
+        affected_ids = models.RelatedProperty.get_affected_ids({changed.id})
+        self.assertIn(changed.id, affected_ids)
+        self.assertIn(same_company.id, affected_ids)
+        self.assertNotIn(other_company.id, affected_ids)
+        self.assertNotIn(full.id, affected_ids)
+
+    def test_rebuild(self):
+        """Validate rebuild restores the index of the given properties"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            property_1 = self.create_related_property("Property 1", self.company_a)
+            property_2 = self.create_related_property("Property 2", self.company_a)
+        models.RelatedProperty.objects.all().delete()
+
+        models.RelatedProperty.rebuild([property_1.id, property_2.id])
+        self.assertEqual(self.get_related_ids(property_1), [property_2.id])
+        self.assertEqual(self.get_related_ids(property_2), [property_1.id])
+
+
+class PropertyBannerTestCase(TestPropertiesModelsBase):
+    """Validate banner columns maintained by signals"""
+
+    def setUp(self):
+        self.property = self.create_property()
+
+    def create_image(self, image: str, alt_text_es: str) -> models.PropertyImage:
+        """Create a property image with a new alt text translation"""
+
+        return models.PropertyImage.objects.create(
+            property=self.property,
+            image=f"property-images/{image}",
+            alt_text=self.create_translation(
+                f"banner {image}", alt_text_es, f"{alt_text_es} en"
+            ),
+        )
+
+    def test_banner_first_image(self):
+        """Validate banner is the first image created"""
+
+        self.create_image("banner-1.webp", "Portada")
+        self.create_image("banner-2.webp", "Segunda")
+        self.property.refresh_from_db()
+
+        self.assertEqual(
+            self.property.banner_image.name, "property-images/banner-1.webp"
+        )
+        self.assertEqual(self.property.get_banner_alt("es"), "Portada")
+        self.assertEqual(self.property.get_banner_alt("en"), "Portada en")
+
+    def test_banner_image_deleted(self):
+        """Validate banner changes to the next image or empty"""
+
+        image_1 = self.create_image("banner-1.webp", "Portada")
+        image_2 = self.create_image("banner-2.webp", "Segunda")
+
+        image_1.delete()
+        self.property.refresh_from_db()
+        self.assertEqual(
+            self.property.banner_image.name, "property-images/banner-2.webp"
+        )
+        self.assertEqual(self.property.get_banner_alt("es"), "Segunda")
+
+        image_2.delete()
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.banner_image.name, "")
+        self.assertEqual(self.property.get_banner_alt("es"), "")
+
+    def test_banner_alt_text_updated(self):
+        """Validate banner alt texts follow the translation changes"""
+
+        image = self.create_image("banner-1.webp", "Portada")
+        image.alt_text.es = "Portada actualizada"
+        image.alt_text.save()
+        self.property.refresh_from_db()
+
+        self.assertEqual(self.property.get_banner_alt("es"), "Portada actualizada")
+
+    def test_update_banners(self):
+        """Validate backfill of all the properties banners"""
+
+        self.create_image("banner-1.webp", "Portada")
+        models.Property.objects.update(banner_image="", banner_alt_es="")
+
+        models.Property.update_banners()
+        self.property.refresh_from_db()
+        self.assertEqual(
+            self.property.banner_image.name, "property-images/banner-1.webp"
+        )
+        self.assertEqual(self.property.get_banner_alt("es"), "Portada")
+
+
+class PropertyImageVariantsTestCase(TestPropertiesModelsBase):
+    """Validate resized webp variants of the property images"""
+
+    def setUp(self):
+        self.property = self.create_property()
+        self.property_image = self.create_property_image(property=self.property)
+
+    def test_update_image_variants(self):
+        """Validate variants smaller than the original are created and
+        copied to the property banner
+        """
+
+        self.assertEqual(self.property_image.get_outdated_image_fields(), ["image"])
+        self.assertTrue(self.property_image.update_image_variants())
+
+        # Original width is 1280
+        storage = self.property_image.image.storage
+        srcset = self.property_image.get_srcset("image")
+        self.assertEqual([variant["width"] for variant in srcset], [320, 640, 1024])
+        for width, name in self.property_image.image_variants["widths"].items():
+            with storage.open(name) as file, Image.open(file) as image:
+                self.assertEqual(image.format, "WEBP")
+                self.assertEqual(image.width, int(width))
+
+        # Metadata of the original
+        metadata = self.property_image.get_metadata("image")
+        self.assertEqual(metadata["width"], 1280)
+        self.assertEqual(metadata["height"], 720)
+        self.assertRegex(metadata["color"], r"^#[0-9a-f]{6}$")
+        self.assertTrue(metadata["placeholder"].startswith("data:image/webp;base64,"))
+
+        self.property.refresh_from_db()
+        self.assertEqual(
+            self.property.banner_variants, self.property_image.image_variants
+        )
+
+        # Already updated
+        self.assertEqual(self.property_image.get_outdated_image_fields(), [])
+        self.assertFalse(self.property_image.update_image_variants())
+
+    def test_update_image_variants_image_changed(self):
+        """Validate variants of the previous image are deleted"""
+
+        self.property_image.update_image_variants()
+        storage = self.property_image.image.storage
+        old_names = list(self.property_image.image_variants["widths"].values())
+
+        self.property_image.image = get_test_image("test2.webp")
+        self.property_image.save()
+        self.property_image.update_image_variants()
+
+        for name in old_names:
+            self.assertFalse(storage.exists(name))
+        for name in self.property_image.image_variants["widths"].values():
+            self.assertTrue(storage.exists(name))
+
+    def test_update_image_variants_invalid_image(self):
+        """Validate invalid images are served without variants"""
+
+        models.PropertyImage.objects.filter(id=self.property_image.id).update(
+            image="property-images/missing.webp"
+        )
+        self.property_image.refresh_from_db()
+        self.assertTrue(self.property_image.update_image_variants())
+        self.assertEqual(self.property_image.get_srcset("image"), [])
+        self.assertIsNone(self.property_image.get_metadata("image")["width"])
+        self.assertEqual(self.property_image.get_outdated_image_fields(), [])
+
+    @override_settings(IMAGE_VARIANTS_THREAD=True)
+    def test_variants_scheduled_on_save(self):
+        """Validate variants are scheduled after the upload is committed"""
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.property_image.save()
+        self.assertEqual(len(callbacks), 1)
+
+        # Unchanged images are not scheduled again
+        self.property_image.update_image_variants()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.property_image.save()
+        self.assertEqual(len(callbacks), 0)
+
+    def test_generate_image_variants_command(self):
+        """Validate the command fills the variants and metadata missing
+        (like images with variants created before the metadata)
+        """
+
+        company = self.property.company
+        self.property_image.update_image_variants()
+        variants = dict(self.property_image.image_variants)
+        for key in ["width", "height", "color", "placeholder"]:
+            variants.pop(key)
+        models.PropertyImage.objects.filter(id=self.property_image.id).update(
+            image_variants=variants
+        )
+
+        call_command("generate_image_variants", "--workers", "1")
+
+        self.property_image.refresh_from_db()
+        self.assertEqual(self.property_image.get_metadata("image")["width"], 1280)
+        company.refresh_from_db()
+        self.assertEqual(company.get_outdated_image_fields(), [])
+        self.assertIsNotNone(company.get_metadata("logo")["width"])
+
+
+class MediaUrlTestCase(TestPropertiesModelsBase):
+    """Validate memoized media urls of the property images"""
+
+    def setUp(self):
+        self.property_image = self.create_property_image()
+
+    def test_storage_url_cached(self):
+        """Validate the storage url is generated once per image"""
+
+        file = self.property_image.image
+        with mock.patch.object(
+            FileSystemStorage,
+            "url",
+            autospec=True,
+            side_effect=lambda storage, name: f"/media/{name}",
+        ) as storage_url:
+            url = get_media_url(file)
+            self.assertEqual(get_media_url(file), url)
+        self.assertEqual(storage_url.call_count, 1)
+        self.assertEqual(url, f"{settings.HOST}/media/{file.name}")
+
+    def test_signed_urls_not_cached(self):
+        """Validate signed urls (expire) are generated each time"""
+
+        storage = mock.Mock(custom_domain=None, querystring_auth=True)
+        storage.url.side_effect = [
+            "https://bucket/a?sign=1",
+            "https://bucket/a?sign=2",
+        ]
+        self.assertEqual(get_storage_url(storage, "a"), "https://bucket/a?sign=1")
+        self.assertEqual(get_storage_url(storage, "a"), "https://bucket/a?sign=2")
+
+    def test_custom_domain_url(self):
+        """Validate absolute urls (cdn custom domain) are not prefixed"""
+
+        storage = mock.Mock(custom_domain="cdn.example.com", querystring_auth=True)
+        storage.url.return_value = "https://cdn.example.com/media/a.webp"
+        url = get_storage_url(storage, "a.webp")
+        self.assertEqual(get_media_url(url), "https://cdn.example.com/media/a.webp")
+        get_storage_url(storage, "a.webp")
+        self.assertEqual(storage.url.call_count, 1)
+
+    @override_settings(
+        AWS_ACCESS_KEY_ID="key",
+        AWS_SECRET_ACCESS_KEY="secret",
+        AWS_STORAGE_BUCKET_NAME="bucket",
+        AWS_S3_REGION_NAME="us-east-1",
+        STATIC_LOCATION="static",
+        PUBLIC_MEDIA_LOCATION="media",
+        PRIVATE_MEDIA_LOCATION="private",
+    )
+    def test_s3_storage_urls(self):
+        """Validate public s3 media urls are unsigned and memoized, and
+        private urls are signed each time (default AWS_QUERYSTRING_AUTH)
+        """
+
+        storage_backends = importlib.import_module("project.storage_backends")
+
+        storage = storage_backends.PublicMediaStorage()
+        url = get_storage_url(storage, "property-images/a.webp")
+        self.assertTrue(url.startswith("https://"))
+        self.assertIn("media/property-images/a.webp", url)
+        self.assertNotIn("Signature", url)
+        self.assertEqual(get_media_url(url), url)
+        with mock.patch.object(storage, "url") as storage_url:
+            self.assertEqual(get_storage_url(storage, "property-images/a.webp"), url)
+        storage_url.assert_not_called()
+
+        private_storage = storage_backends.PrivateMediaStorage()
+        url = get_storage_url(private_storage, "leads/a.pdf")
+        self.assertIn("Signature", url)
+        with mock.patch.object(private_storage, "url") as storage_url:
+            get_storage_url(private_storage, "leads/a.pdf")
+        storage_url.assert_called_once()
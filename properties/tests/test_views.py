@@ -1,7 +1,26 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from core.test_base.test_views import TestPropertiesViewsBase
+from core.queries import get_repeated_queries, normalize_sql
 
 from properties import models
+from translations.cache import load_translations
+from utils import benchmark
+from utils.snapshot import SNAPSHOT_USERNAME, create_snapshot
 from utils.whatsapp import get_whatsapp_link
 
 
@@ -100,6 +119,29 @@ class PropertyViewSetTestCase(TestPropertiesViewsBase):
         self.assertIn(".webp", result["banner"]["url"])
         self.assertEqual(result["banner"]["alt"], property_image.get_alt_text("es"))
 
+    def test_property_banner_srcset(self):
+        """Validate banner and detail images return the resized variants"""
+
+        self.property_2.delete()
+        property_image = self.create_property_image(property=self.property_1)
+
+        # Original only before the variants are created
+        response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+        self.assertEqual(response.json()["results"][0]["banner"]["srcset"], [])
+
+        property_image.update_image_variants()
+        response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+        srcset = response.json()["results"][0]["banner"]["srcset"]
+        self.assertEqual([variant["width"] for variant in srcset], [320, 640, 1024])
+        self.assertIn("/media/variants/property-images/", srcset[0]["url"])
+        self.assertEqual(response.json()["results"][0]["banner"]["width"], 1280)
+
+        response = self.client.get(
+            f"{self.endpoint}{self.property_1.id}/?details",
+            HTTP_ACCEPT_LANGUAGE="es",
+        )
+        self.assertEqual(response.json()["images"][0]["srcset"], srcset)
+
     def test_property_banner_with_many_images(self):
         """Validate response with property images"""
 
@@ -160,6 +202,13 @@ class PropertyViewSetTestCase(TestPropertiesViewsBase):
         self.assertEqual(json_data["count"], 1)
         self.assertEqual(len(json_data["results"]), 1)
 
+        # Any value, even empty
+        for query in ["?featured", "?featured=", "?featured=false"]:
+            response = self.client.get(
+                self.endpoint + query, HTTP_ACCEPT_LANGUAGE="es"
+            )
+            self.assertEqual(response.json()["count"], 1, query)
+
     def test_page_size_1(self):
         """Test if the page size is set to 1"""
 
@@ -444,44 +493,45 @@ class PropertyViewSetTestCase(TestPropertiesViewsBase):
         Expect 6 properties from the same company
         """
 
-        # Delete all properties
-        models.Property.objects.all().delete()
-
-        properties_related_ids = []
-        properties_no_related_ids = []
+        with self.captureOnCommitCallbacks(execute=True):
+            # Delete all properties
+            models.Property.objects.all().delete()
 
-        location = models.Location.objects.all().first()
-        category = models.Category.objects.all().first()
-        seller = models.Seller.objects.all().first()
+            properties_related_ids = []
+            properties_no_related_ids = []
 
-        company_a = self.create_company(
-            "Company single property test A", location=location
-        )
-        company_b = self.create_company(
-            "Company single property test B", location=location
-        )
+            location = models.Location.objects.all().first()
+            category = models.Category.objects.all().first()
+            seller = models.Seller.objects.all().first()
 
-        # Create a set of properties with the same company
-        for id in range(7):
-            property = self.create_property(
-                name=f"Property test {id}",
-                company=company_a,
-                location=location,
-                category=category,
-                seller=seller,
+            company_a = self.create_company(
+                "Company single property test A", location=location
             )
-            properties_related_ids.append(property.id)
-
-        # Create second set of properties with the same company
-        for id in range(7, 13):
-            property = self.create_property(
-                name=f"Property test {id}",
-                company=company_b,
-                location=location,
-                category=category,
-                seller=seller,
+            company_b = self.create_company(
+                "Company single property test B", location=location
             )
-            properties_no_related_ids.append(property.id)
+
+            # Create a set of properties with the same company
+            for id in range(7):
+                property = self.create_property(
+                    name=f"Property test {id}",
+                    company=company_a,
+                    location=location,
+                    category=category,
+                    seller=seller,
+                )
+                properties_related_ids.append(property.id)
+
+            # Create second set of properties with the same company
+            for id in range(7, 13):
+                property = self.create_property(
+                    name=f"Property test {id}",
+                    company=company_b,
+                    location=location,
+                    category=category,
+                    seller=seller,
+                )
+                properties_no_related_ids.append(property.id)
 
         # Make request
         first_property = models.Property.objects.first()
@@ -548,50 +598,51 @@ class PropertyViewSetTestCase(TestPropertiesViewsBase):
         Expect 6 properties with the same tag
         """
 
-        # Delete all properties
-        models.Property.objects.all().delete()
-        models.Tag.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            # Delete all properties
+            models.Property.objects.all().delete()
+            models.Tag.objects.all().delete()
 
-        properties_related_ids = []
-        properties_no_related_ids = []
+            properties_related_ids = []
+            properties_no_related_ids = []
 
-        location = models.Location.objects.all().first()
-        category = models.Category.objects.all().first()
-        seller = models.Seller.objects.all().first()
+            location = models.Location.objects.all().first()
+            category = models.Category.objects.all().first()
+            seller = models.Seller.objects.all().first()
 
-        # Create a set of properties with the same tags
-        tag_a = self.create_tag("Tag single property test A", "A")
-        tag_b = self.create_tag("Tag single property test B", "B")
+            # Create a set of properties with the same tags
+            tag_a = self.create_tag("Tag single property test A", "A")
+            tag_b = self.create_tag("Tag single property test B", "B")
 
-        for id in range(7):
-            company = self.create_company(
-                f"Company single property test {id}", location=location
-            )
-            property = self.create_property(
-                name=f"Property single test {id}",
-                company=company,
-                location=location,
-                category=category,
-                seller=seller,
-            )
-            property.tags.add(tag_a)
-            property.save()
-            properties_related_ids.append(property.id)
+            for id in range(7):
+                company = self.create_company(
+                    f"Company single property test {id}", location=location
+                )
+                property = self.create_property(
+                    name=f"Property single test {id}",
+                    company=company,
+                    location=location,
+                    category=category,
+                    seller=seller,
+                )
+                property.tags.add(tag_a)
+                property.save()
+                properties_related_ids.append(property.id)
 
-        for id in range(7, 13):
-            company = self.create_company(
-                f"Company single property test {id}", location=location
-            )
-            property = self.create_property(
-                name=f"Property single test {id}",
-                company=company,
-                location=location,
-                category=category,
-                seller=seller,
-            )
-            property.tags.add(tag_b)
-            property.save()
-            properties_no_related_ids.append(property.id)
+            for id in range(7, 13):
+                company = self.create_company(
+                    f"Company single property test {id}", location=location
+                )
+                property = self.create_property(
+                    name=f"Property single test {id}",
+                    company=company,
+                    location=location,
+                    category=category,
+                    seller=seller,
+                )
+                property.tags.add(tag_b)
+                property.save()
+                properties_no_related_ids.append(property.id)
 
         # Make request
         first_property = models.Property.objects.first()
@@ -618,74 +669,75 @@ class PropertyViewSetTestCase(TestPropertiesViewsBase):
         Expect 2 properties from the same company and 4 properties with the same tag
         """
 
-        # Delete all properties
-        models.Property.objects.all().delete()
-        models.Tag.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            # Delete all properties
+            models.Property.objects.all().delete()
+            models.Tag.objects.all().delete()
 
-        properties_related_ids = []
-        properties_no_related_ids = []
+            properties_related_ids = []
+            properties_no_related_ids = []
 
-        location = models.Location.objects.all().first()
-        category = models.Category.objects.all().first()
-        seller = models.Seller.objects.all().first()
+            location = models.Location.objects.all().first()
+            category = models.Category.objects.all().first()
+            seller = models.Seller.objects.all().first()
 
-        # base companies and tags
-        company_a = self.create_company(
-            "Company single property test A", location=location
-        )
-        company_b = self.create_company(
-            "Company single property test B", location=location
-        )
-        company_c = self.create_company(
-            "Company single property test C", location=location
-        )
-        tag_a = self.create_tag("Tag single property test A")
-        tag_b = self.create_tag("Tag single property test B")
-        tag_c = self.create_tag("Tag single property test C")
-
-        # Create 3 properties with tag_a and company_a
-        for id in range(3):
-            property = self.create_property(
-                name=f"Property test {id}",
-                company=company_a,
-                location=location,
-                category=category,
-                seller=seller,
+            # base companies and tags
+            company_a = self.create_company(
+                "Company single property test A", location=location
             )
-            property.tags.add(tag_a)
-            property.save()
-            properties_related_ids.append(property.id)
-
-        # Create 4 properties with tag_b and company_b
-        for id in range(3, 7):
-            property = self.create_property(
-                name=f"Property test {id}",
-                company=company_b,
-                location=location,
-                category=category,
-                seller=seller,
+            company_b = self.create_company(
+                "Company single property test B", location=location
             )
-            property.tags.add(tag_b)
-            property.save()
-            properties_related_ids.append(property.id)
-
-        # Create 2 properties with tag_c and company_c
-        for id in range(7, 9):
-            property = self.create_property(
-                name=f"Property test {id}",
-                company=company_c,
-                location=location,
-                category=category,
-                seller=seller,
+            company_c = self.create_company(
+                "Company single property test C", location=location
             )
-            property.tags.add(tag_c)
-            property.save()
-            properties_no_related_ids.append(property.id)
+            tag_a = self.create_tag("Tag single property test A")
+            tag_b = self.create_tag("Tag single property test B")
+            tag_c = self.create_tag("Tag single property test C")
+
+            # Create 3 properties with tag_a and company_a
+            for id in range(3):
+                property = self.create_property(
+                    name=f"Property test {id}",
+                    company=company_a,
+                    location=location,
+                    category=category,
+                    seller=seller,
+                )
+                property.tags.add(tag_a)
+                property.save()
+                properties_related_ids.append(property.id)
+
+            # Create 4 properties with tag_b and company_b
+            for id in range(3, 7):
+                property = self.create_property(
+                    name=f"Property test {id}",
+                    company=company_b,
+                    location=location,
+                    category=category,
+                    seller=seller,
+                )
+                property.tags.add(tag_b)
+                property.save()
+                properties_related_ids.append(property.id)
+
+            # Create 2 properties with tag_c and company_c
+            for id in range(7, 9):
+                property = self.create_property(
+                    name=f"Property test {id}",
+                    company=company_c,
+                    location=location,
+                    category=category,
+                    seller=seller,
+                )
+                property.tags.add(tag_c)
+                property.save()
+                properties_no_related_ids.append(property.id)
 
-        # Change first property to company_b
-        first_property = models.Property.objects.first()
-        first_property.company = company_b
-        first_property.save()
+            # Change first property to company_b
+            first_property = models.Property.objects.first()
+            first_property.company = company_b
+            first_property.save()
 
         # Make request
         response = self.client.get(
@@ -926,6 +978,178 @@ class PropertyViewSetTestCase(TestPropertiesViewsBase):
         self.assertIsNone(json_data["previous"])
         self.assertEqual(len(json_data["results"]), 0)
 
+    def __get_filtered_names__(self, query: str) -> set:
+        """Request the properties list with filters and retrieve the names"""
+        response = self.client.get(
+            f"{self.endpoint}?page-size=100&{query}", HTTP_ACCEPT_LANGUAGE="es"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {property["name"] for property in response.json()["results"]}
+
+    def test_filters(self):
+        """Test filter by multiple locations, category, company, company
+        type, tags (any and all) and open ranges
+        """
+
+        location_2 = self.create_location("Ubicación 2", "Location 2")
+        category_2 = models.Category.objects.create(
+            name=self.create_translation("category_test_2", "Categoría 2")
+        )
+        company_2 = self.create_company(
+            name="Company 2", type="condo", logo_name="logo.webp"
+        )
+        tag_3 = self.create_tag(name="Test tag 3", es="Etiqueta 3", en="Tag 3")
+        property_3 = self.create_property(
+            name="Test property 3",
+            company=company_2,
+            location=location_2,
+            category=category_2,
+            seller=self.seller,
+            price=5000,
+            meters=300,
+        )
+        property_3.tags.add(self.tag1, tag_3)
+        self.property_2.tags.add(self.tag2)
+        names_1_2 = {self.property_1.name, self.property_2.name}
+        all_names = names_1_2 | {property_3.name}
+
+        self.assertEqual(
+            self.__get_filtered_names__(f"ubicacion={location_2.id}"),
+            {property_3.name},
+        )
+        self.assertEqual(
+            self.__get_filtered_names__(
+                f"ubicacion={self.location.id},{location_2.id}"
+            ),
+            all_names,
+        )
+        self.assertEqual(
+            self.__get_filtered_names__(f"categoria={self.category.id}"),
+            names_1_2,
+        )
+        self.assertEqual(
+            self.__get_filtered_names__(f"empresa={company_2.id}"),
+            {property_3.name},
+        )
+        self.assertEqual(
+            self.__get_filtered_names__("tipo-empresa=condo,villa"),
+            {property_3.name},
+        )
+
+        # Tags: no duplicates with any, only properties with all
+        response = self.client.get(
+            f"{self.endpoint}?etiquetas={self.tag1.id},{self.tag2.id}",
+            HTTP_ACCEPT_LANGUAGE="es",
+        )
+        self.assertEqual(response.json()["count"], 3)
+        self.assertEqual(
+            self.__get_filtered_names__(f"etiquetas={tag_3.id}"),
+            {property_3.name},
+        )
+        self.assertEqual(
+            self.__get_filtered_names__(
+                f"etiquetas-todas={self.tag1.id},{self.tag2.id}"
+            ),
+            {self.property_1.name},
+        )
+
+        # Open ranges
+        self.assertEqual(
+            self.__get_filtered_names__("precio-desde=2000"), {property_3.name}
+        )
+        self.assertEqual(self.__get_filtered_names__("metros-hasta=150"), names_1_2)
+        self.assertEqual(
+            self.__get_filtered_names__(
+                f"precio-hasta=6000&categoria={category_2.id}"
+            ),
+            {property_3.name},
+        )
+
+    def test_filters_map(self):
+        """Test filter by map area and radius, and map markers"""
+
+        # Mexico City, Toluca (about 50 km) and Cancun (about 1300 km)
+        coordinates = {
+            self.property_1: (19.4326, -99.1332),
+            self.property_2: (19.2826, -99.6557),
+        }
+        property_3 = self.create_property(
+            name="Test property 3",
+            company=self.company,
+            location=self.location,
+            category=self.category,
+            seller=self.seller,
+        )
+        coordinates[property_3] = (21.1619, -86.8515)
+        for property, (latitude, longitude) in coordinates.items():
+            property.google_maps_src = (
+                "https://www.google.com/maps/embed?pb=!1m18"
+                f"!2d{longitude}!3d{latitude}!2m3"
+            )
+            property.save()
+        property_4 = self.create_property(
+            name="Test property 4",
+            company=self.company,
+            location=self.location,
+            category=self.category,
+            seller=self.seller,
+        )
+
+        self.assertEqual(
+            self.__get_filtered_names__("bbox=-100,19,-99,20"),
+            {self.property_1.name, self.property_2.name},
+        )
+        self.assertEqual(
+            self.__get_filtered_names__("bbox=-99.5,19,-99,20"),
+            {self.property_1.name},
+        )
+        self.assertEqual(
+            self.__get_filtered_names__("bbox=-120,10,-80,30"),
+            {self.property_1.name, self.property_2.name, property_3.name},
+        )
+        self.assertEqual(
+            self.__get_filtered_names__("cerca=19.4326,-99.1332,10"),
+            {self.property_1.name},
+        )
+        self.assertEqual(
+            self.__get_filtered_names__("cerca=19.4326,-99.1332,60"),
+            {self.property_1.name, self.property_2.name},
+        )
+
+        # Markers: only properties with coordinates, filtered
+        response = self.client.get(
+            f"{self.endpoint}markers/?cerca=19.4326,-99.1332,2000",
+            HTTP_ACCEPT_LANGUAGE="es",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        markers = response.json()
+        self.assertEqual(len(markers), 3)
+        self.assertNotIn(property_4.id, [marker["id"] for marker in markers])
+        self.assertIn(
+            {
+                "id": self.property_1.id,
+                "lat": 19.4326,
+                "lng": -99.1332,
+                "price": float(self.property_1.price),
+            },
+            markers,
+        )
+
+        for query in ["bbox=1,2,3", "cerca=19,-99", "cerca=19,-99,0"]:
+            response = self.client.get(
+                f"{self.endpoint}?{query}", HTTP_ACCEPT_LANGUAGE="es"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filters_invalid(self):
+        """Test invalid filter values are rejected"""
+
+        for query in ["ubicacion=abc", "precio-desde=cheap", "etiquetas=1,a"]:
+            response = self.client.get(
+                f"{self.endpoint}?{query}", HTTP_ACCEPT_LANGUAGE="es"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_filter_size(self):
         """Test filter by from and to size"""
 
@@ -1015,6 +1239,435 @@ class PropertyViewSetTestCase(TestPropertiesViewsBase):
         self.assertEqual(len(json_data["results"]), 0)
 
 
+    def test_query_count_constant(self):
+        """Validate the number of queries does not grow with the page size
+        in list, details and summary responses
+        """
+
+        # Create more properties with tags and images
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(8):
+                property = self.create_property(
+                    name=f"Property query count {index}",
+                    company=self.company,
+                    location=self.location,
+                    category=self.category,
+                    seller=self.seller,
+                )
+                property.tags.add(self.tag1, self.tag2)
+                for image_index in range(2):
+                    models.PropertyImage.objects.create(
+                        property=property,
+                        image=f"property-images/test{image_index}.webp",
+                        alt_text=self.create_translation(
+                            f"alt text query count {index} {image_index}"
+                        ),
+                    )
+
+        # Translations are loaded once per process
+        load_translations()
+
+        for query_param in ["", "&details=true", "&summary=true"]:
+
+            # Count queries with small and big pages
+            queries_count = []
+            for page_size in [2, 10]:
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(
+                        f"{self.endpoint}?page-size={page_size}{query_param}",
+                        HTTP_ACCEPT_LANGUAGE="es",
+                    )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(response.json()["results"]), page_size)
+                queries_count.append(len(queries))
+
+            # Validate same number of queries
+            self.assertEqual(queries_count[0], queries_count[1])
+
+
+    def test_cache_hit(self):
+        """Validate second request is returned from cache without queries"""
+
+        response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        with CaptureQueriesContext(connection) as queries:
+            response_cached = self.client.get(
+                self.endpoint, HTTP_ACCEPT_LANGUAGE="es"
+            )
+        self.assertEqual(response_cached["X-Cache"], "HIT")
+        self.assertEqual(response_cached.json(), response.json())
+
+        # Only authentication queries
+        self.assertLessEqual(len(queries), 2)
+
+    @override_settings(API_CACHE_ENABLED=False)
+    def test_cache_disabled(self):
+        """Validate responses are not cached nor conditional without a
+        shared cache
+        """
+
+        for _ in range(2):
+            response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("X-Cache", response)
+            self.assertNotIn("ETag", response)
+
+    def test_cache_by_language_and_query_params(self):
+        """Validate cached responses are not shared between languages
+        and query params
+        """
+
+        self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+
+        response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="en")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(
+            response.json()["results"][0]["location"], self.location.get_name("en")
+        )
+
+        response = self.client.get(
+            self.endpoint + "?page-size=1", HTTP_ACCEPT_LANGUAGE="es"
+        )
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_cache_invalidation(self):
+        """Validate cached responses are invalidated when related data changes"""
+
+        self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+
+        # Update property
+        self.property_1.name = "Updated name cache"
+        self.property_1.save()
+        response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["name"], "Updated name cache")
+
+        # Update location translation
+        self.location.name.es = "Ubicación actualizada"
+        self.location.name.save()
+        response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(
+            response.json()["results"][0]["location"], "Ubicación actualizada"
+        )
+
+        # Remove tags
+        self.property_1.tags.clear()
+        response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["tags"], [])
+
+    def test_cache_invalidation_other_models(self):
+        """Validate changes of models not used by the cached views (like
+        users) do not write versions in the cache
+        """
+
+        with mock.patch("core.signals.bump_model_version") as bump_version:
+            User.objects.create(username="cache-test-user")
+            self.property_1.save()
+        bumped_models = [call.args[0] for call in bump_version.call_args_list]
+        self.assertIn(models.Property, bumped_models)
+        self.assertNotIn(User, bumped_models)
+
+    def test_conditional_get_list(self):
+        """Validate unchanged list returns 304 with a single aggregate query
+        and changed data returns a new ETag
+        """
+
+        response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.endpoint, HTTP_ACCEPT_LANGUAGE="es", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        # Authentication and aggregate queries
+        self.assertEqual(len(queries), 2)
+        self.assertIn("MAX(", queries.captured_queries[-1]["sql"])
+
+        # Different language and related data changes
+        response = self.client.get(
+            self.endpoint, HTTP_ACCEPT_LANGUAGE="en", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.location.name.es = "Ubicación actualizada"
+        self.location.name.save()
+        response = self.client.get(
+            self.endpoint, HTTP_ACCEPT_LANGUAGE="es", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_conditional_get_detail(self):
+        """Validate detail route supports ETag and If-Modified-Since"""
+
+        endpoint = f"{self.endpoint}{self.property_1.id}/"
+        response = self.client.get(endpoint, {"details": True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_etag = self.client.get(
+            endpoint, {"details": True}, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response_etag.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response_date = self.client.get(
+            endpoint,
+            {"details": True},
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(response_date.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Not found properties
+        response = self.client.get(f"{self.endpoint}0/", HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+    def test_filters_use_indexes(self):
+        """Validate list filters do not scan the whole properties table"""
+
+        # Large catalog of inactive properties (bulk create skips signals)
+        models.Property.objects.bulk_create(
+            [
+                models.Property(
+                    name=f"Inactive property {index}",
+                    slug=f"inactive-property-{index}",
+                    company=self.company,
+                    location=self.location,
+                    seller=self.seller,
+                    category=self.category,
+                    short_description=self.property_1.short_description,
+                    price=index,
+                    meters=index,
+                    active=False,
+                    description_es="Descripción",
+                    description_en="Description",
+                )
+                for index in range(500)
+            ]
+        )
+
+        for query_params in [
+            "",
+            "?featured=true",
+            f"?ubicacion={self.location.id}",
+            "?metros-desde=10&metros-hasta=100",
+            "?precio-desde=10&precio-hasta=100",
+        ]:
+            self.validate_no_sequential_scan(
+                self.endpoint + query_params, ["properties_property"]
+            )
+
+
+    def test_export_csv(self):
+        """Validate properties streamed as csv with the list filters"""
+
+        self.property_1.featured = True
+        self.property_1.save()
+        response = self.client.get(f"{self.endpoint}export/?featured=true")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("attachment", response["Content-Disposition"])
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = list(csv.reader(lines))
+        self.assertEqual(rows[0], models.Property.EXPORT_FIELDS)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], self.property_1.name)
+
+    def test_export_ndjson(self):
+        """Validate properties streamed as ndjson"""
+
+        response = self.client.get(
+            f"{self.endpoint}export/", {"export-format": "ndjson"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(
+            {row["name"] for row in rows},
+            {self.property_1.name, self.property_2.name},
+        )
+        self.assertEqual(rows[0]["location__name__es"], self.location.get_name("es"))
+
+        # Invalid format
+        response = self.client.get(f"{self.endpoint}export/", {"export-format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_admin_only(self):
+        """Validate only admin users can export"""
+
+        user = User.objects.create_user(username="no-admin", password="test pass")
+        self.client.force_authenticate(user)
+        response = self.client.get(f"{self.endpoint}export/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+    def test_facets(self):
+        """Validate facets counts and histograms of the filtered properties"""
+
+        models.Property.objects.filter(id=self.property_2.id).update(
+            price=3000, meters=200
+        )
+        endpoint = f"{self.endpoint}facets/"
+
+        self.validate_query_budget(
+            endpoint, max_queries=6, HTTP_ACCEPT_LANGUAGE="es"
+        )
+        response = self.client.get(endpoint, HTTP_ACCEPT_LANGUAGE="es")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        data = response.json()
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(
+            data["locations"],
+            [
+                {
+                    "id": self.location.id,
+                    "name": self.location.get_name("es"),
+                    "count": 2,
+                }
+            ],
+        )
+        self.assertEqual(data["categories"][0]["count"], 2)
+        self.assertEqual(
+            {tag["id"]: tag["count"] for tag in data["tags"]},
+            {self.tag1.id: 1, self.tag2.id: 1},
+        )
+        self.assertEqual(data["tags"][0]["name"], self.tag1.get_name("es"))
+        self.assertEqual(
+            data["company_types"][0]["value"], self.company.type
+        )
+        self.assertEqual(data["company_types"][0]["count"], 2)
+
+        price = data["price"]
+        self.assertEqual(price["min"], 1000)
+        self.assertEqual(price["max"], 3000)
+        self.assertEqual(len(price["buckets"]), 8)
+        self.assertEqual(price["buckets"][0]["from"], 1000)
+        self.assertEqual(price["buckets"][-1]["to"], 3000)
+        self.assertEqual(
+            [bucket["count"] for bucket in price["buckets"]],
+            [1, 0, 0, 0, 0, 0, 0, 1],
+        )
+        meters_counts = [bucket["count"] for bucket in data["meters"]["buckets"]]
+        self.assertEqual(sum(meters_counts), 2)
+
+        # Filters
+        response = self.client.get(
+            endpoint,
+            {"precio-desde": 2000, "precio-hasta": 4000},
+            HTTP_ACCEPT_LANGUAGE="es",
+        )
+        data = response.json()
+        self.assertEqual(data["total"], 1)
+        self.assertEqual(data["tags"], [])
+        self.assertEqual(
+            data["price"]["buckets"], [{"from": 3000, "to": 3000, "count": 1}]
+        )
+
+        # No results
+        response = self.client.get(
+            endpoint, {"ubicacion": 0}, HTTP_ACCEPT_LANGUAGE="es"
+        )
+        data = response.json()
+        self.assertEqual(data["total"], 0)
+        self.assertEqual(data["locations"], [])
+        self.assertEqual(data["price"], {"min": None, "max": None, "buckets": []})
+
+    def test_query_budget(self):
+        """Validate list and details do not repeat queries per property"""
+
+        for property in [self.property_1, self.property_2]:
+            property.tags.add(self.tag1, self.tag2)
+            for image_index in range(2):
+                models.PropertyImage.objects.create(
+                    property=property,
+                    image=f"property-images/test{image_index}.webp",
+                    alt_text=self.create_translation(
+                        f"alt text query budget {property.id} {image_index}"
+                    ),
+                )
+        load_translations()
+
+        self.validate_query_budget(
+            self.endpoint, max_queries=5, HTTP_ACCEPT_LANGUAGE="es"
+        )
+
+        # Tags are prefetched for the property, the related properties
+        # and the latest properties (fixed, not per property)
+        self.validate_query_budget(
+            f"{self.endpoint}{self.property_1.id}/?details",
+            max_queries=10,
+            max_repeats=3,
+            HTTP_ACCEPT_LANGUAGE="es",
+        )
+
+    def test_cursor_pagination(self):
+        """Validate cursor pages follow the updated_at ordering (with ties)
+        without count queries
+        """
+
+        for index in range(5):
+            self.create_property(
+                name=f"Cursor property {index}",
+                company=self.company,
+                location=self.location,
+                category=self.category,
+                seller=self.seller,
+            )
+
+        # Same date in some properties (sorted by id)
+        updated_at = models.Property.objects.order_by("id").first().updated_at
+        models.Property.objects.filter(id__in=models.Property.objects.order_by(
+            "id"
+        ).values("id")[:4]).update(updated_at=updated_at)
+
+        expected = list(
+            models.Property.objects.filter(active=True)
+            .order_by("-updated_at", "-id")
+            .values_list("id", flat=True)
+        )
+        self.validate_cursor_pagination(
+            f"{self.endpoint}?cursor=&page-size=2",
+            expected,
+            HTTP_ACCEPT_LANGUAGE="es",
+        )
+
+    def test_cursor_pagination_invalid_cursor(self):
+        """Validate invalid cursors return not found"""
+
+        response = self.client.get(self.endpoint, {"cursor": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Crafted cursors: short, long and wrong types
+        date = "2024-01-01T00:00:00+00:00"
+        self.validate_invalid_cursors(
+            self.endpoint,
+            [
+                {"p": [date], "r": False},
+                {"p": [], "r": False},
+                {"p": [date, 1, 2], "r": False},
+                {"p": [20240101, 1], "r": False},
+                {"p": ["yesterday", 1], "r": False},
+                {"p": [date, "1"], "r": False},
+                {"p": {"updated_at": date}, "r": False},
+                {"p": [date, 1], "r": "yes"},
+                {"p": [date, 1]},
+                [date, 1],
+            ],
+        )
+
+
 class LocationViewSetTestCase(TestPropertiesViewsBase):
 
     def setUp(self):
@@ -1171,6 +1824,31 @@ class CompanyViewSetTestCase(TestPropertiesViewsBase):
                     ),
                 )
 
+    def test_query_budget(self):
+        """Validate list and details do not repeat queries per company
+        or per related property
+        """
+
+        company = models.Company.objects.first()
+        for index in range(3):
+            self.create_property(
+                name=f"Budget property {index}",
+                company=company,
+                location=self.location,
+                category=self.category,
+                seller=self.seller,
+            )
+        load_translations()
+
+        self.validate_query_budget(
+            f"{self.endpoint}?page-size=100", max_queries=5, HTTP_ACCEPT_LANGUAGE="es"
+        )
+        self.validate_query_budget(
+            f"{self.endpoint}{company.id}/?details",
+            max_queries=8,
+            HTTP_ACCEPT_LANGUAGE="es",
+        )
+
     def test_get_summary(self):
         """test enpoint list view response"""
 
@@ -1426,3 +2104,338 @@ class CompanyViewSetTestCase(TestPropertiesViewsBase):
         # Check response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.json()["results"]), 1)
+
+
+class SnapshotTestCase(TestPropertiesViewsBase):
+    """Testing static json snapshots of the api"""
+
+    def setUp(self):
+        super().setUp(endpoint="/api/properties/")
+        self.output = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.output)
+
+    def test_create_snapshot(self):
+        """Validate all the endpoints are rendered by language"""
+
+        summary = create_snapshot(self.output)
+        self.assertEqual(summary["reused"], 0)
+        version_dir = os.path.join(self.output, summary["version"])
+
+        for language in ["es", "en"]:
+            for path in [
+                "properties/list/1.json",
+                "properties/summary/1.json",
+                "companies/list/1.json",
+                f"companies/{self.company.id}.json",
+                "posts/list/1.json",
+                "locations.json",
+                "best-developments-images.json",
+            ]:
+                self.assertTrue(
+                    os.path.exists(os.path.join(version_dir, language, path))
+                )
+
+            # Same data as the api
+            property_path = f"properties/{self.property_1.id}.json"
+            with open(os.path.join(version_dir, language, property_path)) as file:
+                data = json.load(file)
+            response = self.client.get(
+                f"{self.endpoint}{self.property_1.id}/?details",
+                HTTP_ACCEPT_LANGUAGE=language,
+            )
+            self.assertEqual(data, response.json())
+
+        with open(os.path.join(self.output, "latest")) as file:
+            self.assertEqual(file.read(), summary["version"])
+
+        # Service user and token removed
+        self.assertFalse(User.objects.filter(username=SNAPSHOT_USERNAME).exists())
+        self.assertFalse(
+            Token.objects.filter(user__username=SNAPSHOT_USERNAME).exists()
+        )
+
+    def test_create_snapshot_error(self):
+        """Validate the service user is removed when the render fails"""
+
+        with mock.patch(
+            "utils.snapshot.render_tasks", side_effect=ValueError("render error")
+        ):
+            with self.assertRaises(ValueError):
+                create_snapshot(self.output)
+        self.assertFalse(User.objects.filter(username=SNAPSHOT_USERNAME).exists())
+
+    def test_create_snapshot_incremental(self):
+        """Validate only the details with changed inputs are rendered again"""
+
+        first_summary = create_snapshot(self.output)
+
+        # Property details (es and en) reused
+        summary = create_snapshot(self.output)
+        self.assertEqual(summary["reused"], 4)
+        self.assertEqual(summary["rendered"], first_summary["rendered"] - 4)
+
+        # Property 2 details include property 1 as related property
+        self.property_1.name = "Updated name"
+        self.property_1.save()
+        summary = create_snapshot(self.output)
+        self.assertEqual(summary["reused"], 0)
+        version_dir = os.path.join(self.output, summary["version"])
+        with open(
+            os.path.join(version_dir, "es", f"properties/{self.property_2.id}.json")
+        ) as file:
+            related_names = [
+                related["name"] for related in json.load(file)["related_properties"]
+            ]
+        self.assertIn("Updated name", related_names)
+
+        # Related data without dates (like translations) changes the version
+        summary = create_snapshot(self.output)
+        self.assertEqual(summary["reused"], 4)
+        self.tag1.name.es = "Etiqueta actualizada"
+        self.tag1.name.save()
+        summary = create_snapshot(self.output)
+        self.assertEqual(summary["reused"], 0)
+        version_dir = os.path.join(self.output, summary["version"])
+        with open(
+            os.path.join(version_dir, "es", f"properties/{self.property_1.id}.json")
+        ) as file:
+            tag_names = [tag["name"] for tag in json.load(file)["tags"]]
+        self.assertIn("Etiqueta actualizada", tag_names)
+
+        # Full snapshot
+        summary = create_snapshot(self.output, full=True)
+        self.assertEqual(summary["reused"], 0)
+
+    @override_settings(API_CACHE_ENABLED=False)
+    def test_create_snapshot_without_shared_cache(self):
+        """Validate all the files are rendered without the models versions"""
+
+        create_snapshot(self.output)
+        summary = create_snapshot(self.output)
+        self.assertEqual(summary["reused"], 0)
+
+
+class BenchmarkTestCase(TestPropertiesViewsBase):
+    """Testing the api benchmark tools"""
+
+    def setUp(self):
+        super().setUp(endpoint="/api/properties/")
+        self.output = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.output)
+
+    def test_create_catalog(self):
+        """Validate the synthetic rows are created and deleted"""
+
+        initial_counts = benchmark.get_catalog_counts()
+        counts = benchmark.create_catalog(
+            properties_num=3,
+            images_per_property=2,
+            posts_num=2,
+            stdout=lambda message: None,
+        )
+
+        self.assertEqual(counts["properties"], initial_counts["properties"] + 3)
+        self.assertEqual(
+            counts["property_images"], initial_counts["property_images"] + 6
+        )
+        self.assertEqual(counts["posts"], initial_counts["posts"] + 2)
+        self.assertEqual(counts["locations"], initial_counts["locations"] + 50)
+        self.assertTrue(models.RelatedProperty.objects.exists())
+
+        # Original rows are kept
+        counts = benchmark.delete_catalog(stdout=lambda message: None)
+        self.assertEqual(counts, initial_counts)
+        self.assertTrue(models.Property.objects.filter(id=self.property_1.id).exists())
+
+    def test_run_benchmark(self):
+        """Validate the measures of each request and the user cleanup"""
+
+        report = benchmark.run_benchmark(iterations=2, stdout=lambda message: None)
+
+        names = {result["name"] for result in report["results"]}
+        for name in ["properties", "property-detail", "company-detail", "search"]:
+            self.assertIn(name, names)
+        for result in report["results"]:
+            self.assertEqual(result["status"], status.HTTP_200_OK, result["name"])
+            self.assertGreater(result["queries"], 0)
+            self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+        self.assertEqual(report["catalog"]["properties"], 2)
+        self.assertFalse(
+            User.objects.filter(username=benchmark.BENCHMARK_USERNAME).exists()
+        )
+
+    def test_compare_reports(self):
+        """Validate the differences of the requests in both reports"""
+
+        measures = {"p50_ms": 10, "p95_ms": 20, "queries": 5, "peak_memory_kb": 100}
+        previous_report = {
+            "results": [
+                {"name": "properties", "language": "es", **measures},
+                {"name": "removed", "language": "es", **measures},
+            ]
+        }
+        report = {
+            "results": [
+                {
+                    "name": "properties",
+                    "language": "es",
+                    "p50_ms": 8.5,
+                    "p95_ms": 21,
+                    "queries": 3,
+                    "peak_memory_kb": 100,
+                },
+                {"name": "properties", "language": "en", **measures},
+            ]
+        }
+
+        self.assertEqual(
+            benchmark.compare_reports(report, previous_report),
+            [
+                {
+                    "name": "properties",
+                    "language": "es",
+                    "p50_ms": -1.5,
+                    "p95_ms": 1,
+                    "queries": -2,
+                    "peak_memory_kb": 0,
+                }
+            ],
+        )
+
+    @override_settings(DEBUG=True, BENCHMARK_DISPOSABLE_DATABASE=False)
+    def test_is_disposable_database(self):
+        """Validate only sqlite or marked databases are disposable
+        (not any database in debug mode)
+        """
+
+        self.assertTrue(benchmark.is_disposable_database())
+        with mock.patch("utils.benchmark.connection") as mock_connection:
+            mock_connection.vendor = "postgresql"
+            self.assertFalse(benchmark.is_disposable_database())
+            with override_settings(BENCHMARK_DISPOSABLE_DATABASE=True):
+                self.assertTrue(benchmark.is_disposable_database())
+
+    @mock.patch("utils.benchmark.is_disposable_database", return_value=False)
+    def test_command_disposable_database(self, mock_is_disposable):
+        """Validate the command only runs in a disposable database"""
+
+        output = os.path.join(self.output, "report.json")
+        options = ["--iterations", "1", "--output", output]
+        with self.assertRaises(CommandError):
+            call_command("benchmark_api", *options)
+        self.assertFalse(os.path.exists(output))
+
+        stdout = io.StringIO()
+        call_command(
+            "benchmark_api", *options, "--i-know-this-is-disposable", stdout=stdout
+        )
+        self.assertTrue(os.path.exists(output))
+        self.assertIn("Report saved", stdout.getvalue())
+
+
+class PerformanceMiddlewareTestCase(TestPropertiesViewsBase):
+    """Testing per request performance metrics"""
+
+    def setUp(self):
+        super().setUp(endpoint="/api/properties/")
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=1.0)
+    def test_metrics(self):
+        """Validate metrics in Server-Timing header and json logs"""
+
+        with self.assertLogs("performance", level="INFO") as logs:
+            response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+            cached_response = self.client.get(
+                self.endpoint, HTTP_ACCEPT_LANGUAGE="es"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        server_timing = response["Server-Timing"]
+        self.assertRegex(server_timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(server_timing, r"serializer;dur=[\d.]+")
+        self.assertIn('cache;desc="miss"', server_timing)
+        self.assertRegex(server_timing, r"total;dur=[\d.]+$")
+        self.assertIn('cache;desc="hit"', cached_response["Server-Timing"])
+
+        data = json.loads(logs.records[0].getMessage())
+        self.assertEqual(data["view"], "properties-list")
+        self.assertEqual(data["status"], 200)
+        self.assertGreater(data["queries"], 0)
+        self.assertEqual(data["size"], len(response.content))
+        self.assertEqual(data["cache"], "miss")
+        self.assertLessEqual(data["sql_ms"], data["total_ms"])
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0.0)
+    def test_not_sampled(self):
+        """Validate requests out of the sample are not measured"""
+
+        response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+        self.assertNotIn("Server-Timing", response)
+
+
+class QueryBudgetMiddlewareTestCase(TestPropertiesViewsBase):
+    """Testing query budget warnings of the staging middleware"""
+
+    def setUp(self):
+        super().setUp(endpoint="/api/properties/")
+
+    @override_settings(
+        QUERY_BUDGET_ENABLED=True,
+        QUERY_BUDGET_MAX_QUERIES=1,
+        QUERY_BUDGET_MAX_REPEATS=0,
+        QUERY_BUDGET_SLOW_MS=-1,
+    )
+    def test_warnings(self):
+        """Validate requests over the budget are logged"""
+
+        with self.assertLogs("queries", level="WARNING") as logs:
+            response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        messages = [record.getMessage() for record in logs.records]
+        self.assertTrue(
+            any(
+                message.startswith("GET /api/properties/: ")
+                and "queries (budget 1)" in message
+                for message in messages
+            )
+        )
+        self.assertTrue(
+            any("query repeated 1 times" in message for message in messages)
+        )
+        self.assertTrue(any("slow query" in message for message in messages))
+
+    @override_settings(QUERY_BUDGET_ENABLED=True)
+    def test_in_budget(self):
+        """Validate requests in the budget are not logged"""
+
+        with self.assertNoLogs("queries", level="WARNING"):
+            response = self.client.get(self.endpoint, HTTP_ACCEPT_LANGUAGE="es")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_normalize_sql(self):
+        """Validate queries with other params have the same template"""
+
+        queries = [
+            "SELECT * FROM \"tag\" WHERE \"id\" = 1 AND \"name\" = 'a'",
+            "SELECT * FROM \"tag\" WHERE \"id\" = 25 AND \"name\" = 'it''s'",
+            "SELECT * FROM \"tag\" WHERE \"id\" IN (1, 2, 3)",
+            "SELECT * FROM \"tag\" WHERE \"id\" IN (4)",
+        ]
+        self.assertEqual(
+            normalize_sql(queries[0]),
+            'SELECT * FROM "tag" WHERE "id" = ? AND "name" = ?',
+        )
+        self.assertEqual(
+            get_repeated_queries(queries, max_repeats=1),
+            [
+                ('SELECT * FROM "tag" WHERE "id" = ? AND "name" = ?', 2),
+                ('SELECT * FROM "tag" WHERE "id" IN (...)', 2),
+            ],
+        )
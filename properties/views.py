@@ -1,41 +1,58 @@
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 
+from core.cache import cache_response
+from core.views import (
+    CachedResponseMixin,
+    ConditionalResponseMixin,
+    EagerLoadingMixin,
+)
 from properties import serializers
 from properties import models
+from properties.filters import PropertyFilter
+from translations.models import Translation
+from utils.export import get_export_format, get_export_response
+from utils.facets import get_property_facets
 
+# Models used in properties and companies responses
+PROPERTIES_CACHE_MODELS = [
+    models.Property,
+    models.Company,
+    models.Location,
+    models.Category,
+    models.Tag,
+    models.ShortDescription,
+    models.Seller,
+    models.PropertyImage,
+    models.RelatedProperty,
+    Translation,
+]
 
-class PropertyViewSet(viewsets.ReadOnlyModelViewSet):
+
+class PropertyViewSet(
+    ConditionalResponseMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ Api viewset for Property model """
     queryset = models.Property.objects.filter(active=True)
     serializer_class = serializers.PropertyListItemSerializer
-    
+    cache_models = PROPERTIES_CACHE_MODELS
+
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PropertyFilter
+
+    # Sort key of the cursor pagination (see core.pagination)
+    keyset_fields = ["updated_at", "id"]
+
     def get_queryset(self):
-        """ filter with get parameters """
-        queryset = models.Property.objects.filter(active=True).order_by('-updated_at')
-        
-        # Filter by featured
-        featured = self.request.query_params.get('featured', None)
-        if featured is not None:
-            queryset = queryset.filter(featured=True)
-            
-        # Filter by location
-        location = self.request.query_params.get('ubicacion', None)
-        if location is not None:
-            queryset = queryset.filter(location__id=location)
-            
-        size_from = self.request.query_params.get('metros-desde', None)
-        size_to = self.request.query_params.get('metros-hasta', None)
-        if size_from is not None and size_to is not None:
-            queryset = queryset.filter(meters__gte=size_from, meters__lte=size_to)
-            
-        price_from = self.request.query_params.get('precio-desde', None)
-        price_to = self.request.query_params.get('precio-hasta', None)
-        if price_from is not None and price_to is not None:
-            queryset = queryset.filter(price__gte=price_from, price__lte=price_to)
-            
-        # return queryset
-        return queryset
-    
+        """ Active properties, latest first (filtered by PropertyFilter) """
+        return models.Property.objects.filter(active=True).order_by('-updated_at')
+
     def get_serializer_class(self, *args, **kwargs):
         """ Return serializer class """
         if "details" in self.request.query_params:
@@ -44,12 +61,58 @@ class PropertyViewSet(viewsets.ReadOnlyModelViewSet):
             return serializers.PropertySummarySerializer
         return self.serializer_class
 
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream the filtered properties as csv or ndjson (admins only)"""
+        return get_export_response(
+            self.filter_queryset(self.get_queryset()),
+            models.Property.EXPORT_FIELDS,
+            get_export_format(request),
+            "properties",
+        )
+
+    @action(detail=False, methods=["get"])
+    @cache_response
+    def facets(self, request):
+        """Counts by location, category, tag and company type, and price
+        and meters histograms of the filtered properties (cached by
+        filters and language)
+        """
+        language = request.headers.get("Accept-Language", "es")
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(get_property_facets(queryset, language))
+
+    @action(detail=False, methods=["get"])
+    @cache_response
+    def markers(self, request):
+        """Id, coordinates and price of all the filtered properties with
+        coordinates (without pagination), to draw the map
+        """
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            latitude__isnull=False
+        )
+        markers = [
+            {
+                "id": property_id,
+                "lat": latitude,
+                "lng": longitude,
+                "price": float(price),
+            }
+            for property_id, latitude, longitude, price in queryset.values_list(
+                "id", "latitude", "longitude", "price"
+            )
+        ]
+        return Response(markers)
+
 
-class LocationViewSet(viewsets.ReadOnlyModelViewSet):
+class LocationViewSet(
+    CachedResponseMixin, EagerLoadingMixin, viewsets.ReadOnlyModelViewSet
+):
     """ Api viewset for Location model """
     queryset = models.Location.objects.all()
     serializer_class = serializers.LocationSerializer
     pagination_class = None
+    cache_models = [models.Location, models.Property, Translation]
     
     def get_queryset(self):
         """ filter locations only with properties """
@@ -59,10 +122,18 @@ class LocationViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset_sorted
 
 
-class CompanyViewSet(viewsets.ReadOnlyModelViewSet):
+class CompanyViewSet(
+    ConditionalResponseMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ Api viewset for Company model """
     queryset = models.Company.objects.all()
     serializer_class = serializers.CompanySummarySerializer
+    cache_models = PROPERTIES_CACHE_MODELS
+    # Company changes (no updated_at) are tracked by the models versions
+    conditional_date_field = None
 
     def get_serializer_class(self, *args, **kwargs):
         """ Return serializer class """
@@ -5,3 +5,7 @@ class TranslationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'translations'
     verbose_name = 'Traducciones'
+
+    def ready(self):
+        """Connect signals"""
+        import translations.signals  # noqa: F401
@@ -0,0 +1,106 @@
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import get_model_version_key
+from translations.models import Translation
+
+
+class TranslationsSnapshot(NamedTuple):
+    """Translations loaded in memory. Replaced in a single assignment, so
+    the request threads never read a partially updated snapshot
+    """
+
+    # Translations texts: id -> {"es": ..., "en": ...}
+    values: dict
+
+    # Shared Translation version (bumped by core.signals) read before loading
+    version: int
+
+    # Load time, to reload after TRANSLATIONS_MAX_AGE (changes by other
+    # processes without a shared cache)
+    loaded_at: float
+
+
+# Process-wide snapshot of the translations table (None: not loaded)
+_snapshot = None
+
+
+def get_translations_version() -> int:
+    """Retrieve the shared version of the Translation model
+
+    Returns:
+        int: Current version (0 if no changes registered yet)
+    """
+    return cache.get(get_model_version_key(Translation), 0)
+
+
+def load_translations() -> dict:
+    """Load all the translations in memory with a single query
+
+    Returns:
+        dict: Translations texts by id
+    """
+    global _snapshot
+
+    # Read version before the query: concurrent changes force a reload
+    version = get_translations_version()
+    values = {
+        translation_id: {"es": es, "en": en}
+        for translation_id, es, en in Translation.objects.values_list("id", "es", "en")
+    }
+    _snapshot = TranslationsSnapshot(values, version, time.monotonic())
+    return values
+
+
+def clear_translations():
+    """Discard the translations in memory (reloaded on next lookup)"""
+    global _snapshot
+    _snapshot = None
+
+
+def sync_translations():
+    """Discard the translations in memory if other process changed them
+    or they are older than TRANSLATIONS_MAX_AGE (called once per request)
+    """
+    snapshot = _snapshot
+    if snapshot is None:
+        return
+    age = time.monotonic() - snapshot.loaded_at
+    if age > settings.TRANSLATIONS_MAX_AGE:
+        clear_translations()
+    elif snapshot.version != get_translations_version():
+        clear_translations()
+
+
+def get_translation(translation_id: int, language: str) -> str:
+    """Retrieve the text of a translation from memory
+
+    Args:
+        translation_id (int): Translation id (foreign key value)
+        language (str): Language to retrieve the text in
+
+    Returns:
+        str: Translation text, empty if the translation does not exist
+    """
+
+    if translation_id is None:
+        return ""
+
+    snapshot = _snapshot
+    values = snapshot.values if snapshot is not None else load_translations()
+
+    # Translations created after the load (by other process)
+    if translation_id not in values:
+        row = (
+            Translation.objects.filter(id=translation_id)
+            .values_list("es", "en")
+            .first()
+        )
+        if row is None:
+            return ""
+        values[translation_id] = {"es": row[0], "en": row[1]}
+
+    return values[translation_id].get(language, "")
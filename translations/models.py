@@ -18,6 +18,13 @@ class TranslationGroup(models.Model):
 
 
 class Translation(models.Model):
+
+    # Full text search fields for each language (see utils.search)
+    SEARCH_FIELDS = {
+        "es": ("es",),
+        "en": ("en",),
+    }
+
     id = models.AutoField(primary_key=True)
     group = models.ForeignKey(
         TranslationGroup,
@@ -0,0 +1,19 @@
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from translations.cache import clear_translations, sync_translations
+from translations.models import Translation
+
+
+@receiver(request_started)
+def sync_translations_cache(sender, **kwargs):
+    """Discard translations in memory changed by other processes"""
+    sync_translations()
+
+
+@receiver(post_save, sender=Translation)
+@receiver(post_delete, sender=Translation)
+def clear_translations_cache(sender, **kwargs):
+    """Discard translations in memory of the current process"""
+    clear_translations()
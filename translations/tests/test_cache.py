@@ -0,0 +1,111 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from core.cache import bump_model_version
+from core.test_base.test_models import TestPropertiesModelsBase
+from translations import cache as translations_cache
+from translations.models import Translation
+
+
+class TranslationsCacheTestCase(TestPropertiesModelsBase):
+    """Validate in memory translations lookups"""
+
+    def setUp(self):
+
+        # Create translations
+        self.translation_1 = self.create_translation("cache-1", "Casa", "House")
+        self.translation_2 = self.create_translation("cache-2", "Lote", "Lot")
+
+    def test_single_query(self):
+        """Validate all translations are loaded in a single query"""
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                translations_cache.get_translation(self.translation_1.id, "es"), "Casa"
+            )
+            self.assertEqual(
+                translations_cache.get_translation(self.translation_2.id, "en"), "Lot"
+            )
+            self.assertEqual(
+                translations_cache.get_translation(self.translation_1.id, "en"), "House"
+            )
+
+    def test_missing_translations(self):
+        """Validate empty text for null or not found translations"""
+
+        self.assertEqual(translations_cache.get_translation(None, "es"), "")
+        self.assertEqual(translations_cache.get_translation(0, "es"), "")
+
+    def test_invalidation_on_save(self):
+        """Validate translations changed in the current process are reloaded"""
+
+        translations_cache.get_translation(self.translation_1.id, "es")
+        self.translation_1.es = "Casa actualizada"
+        self.translation_1.save()
+
+        self.assertEqual(
+            translations_cache.get_translation(self.translation_1.id, "es"),
+            "Casa actualizada",
+        )
+
+    def test_invalidation_by_version(self):
+        """Validate translations changed by other process are reloaded
+        after the version changes
+        """
+
+        translations_cache.get_translation(self.translation_1.id, "es")
+
+        # Update without signals (like other process) and bump version
+        Translation.objects.filter(id=self.translation_1.id).update(es="Otra casa")
+        translations_cache.sync_translations()
+        self.assertEqual(
+            translations_cache.get_translation(self.translation_1.id, "es"), "Casa"
+        )
+
+        bump_model_version(Translation)
+        translations_cache.sync_translations()
+        self.assertEqual(
+            translations_cache.get_translation(self.translation_1.id, "es"),
+            "Otra casa",
+        )
+
+    def test_clear_during_sync(self):
+        """Validate a clear by other thread while syncing does not fail"""
+
+        translations_cache.get_translation(self.translation_1.id, "es")
+        loaded_at = translations_cache._snapshot.loaded_at
+
+        def clear_and_get_time():
+            translations_cache.clear_translations()
+            return loaded_at
+
+        with mock.patch("time.monotonic", side_effect=clear_and_get_time):
+            translations_cache.sync_translations()
+        self.assertEqual(
+            translations_cache.get_translation(self.translation_1.id, "es"), "Casa"
+        )
+
+    def test_invalidation_by_age(self):
+        """Validate translations changed by other process without a shared
+        version are reloaded after TRANSLATIONS_MAX_AGE
+        """
+
+        translations_cache.get_translation(self.translation_1.id, "es")
+        Translation.objects.filter(id=self.translation_1.id).update(es="Otra casa")
+        loaded_at = translations_cache._snapshot.loaded_at
+
+        with override_settings(TRANSLATIONS_MAX_AGE=30):
+            with mock.patch("time.monotonic", return_value=loaded_at + 10):
+                translations_cache.sync_translations()
+            self.assertEqual(
+                translations_cache.get_translation(self.translation_1.id, "es"),
+                "Casa",
+            )
+
+            with mock.patch("time.monotonic", return_value=loaded_at + 31):
+                translations_cache.sync_translations()
+            self.assertEqual(
+                translations_cache.get_translation(self.translation_1.id, "es"),
+                "Otra casa",
+            )
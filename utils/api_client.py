@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+
+def get_client(username: str) -> APIClient:
+    """Create an in-process api client authenticated with the token of a
+    service user (used to render or measure the api without a server)
+
+    Args:
+        username (str): User that sends the requests (created if missing)
+
+    Returns:
+        APIClient: Client used to send the requests
+    """
+    user, _ = User.objects.get_or_create(username=username)
+    token, _ = Token.objects.get_or_create(user=user)
+
+    # Use an allowed host (test client default host is "testserver")
+    hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"]
+    client = APIClient(SERVER_NAME=hosts[0] if hosts else "testserver")
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    return client
@@ -0,0 +1,597 @@
+import json
+import math
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from blog import models as blog_models
+from content import models as content_models
+from core.cache import bump_model_version, is_cache_model
+from properties import models as properties_models
+from translations import models as translations_models
+from translations.cache import clear_translations
+from utils.api_client import get_client
+from utils.media import get_media_url
+from utils.search import rebuild_search_index
+
+# Prefix of the names and keys of the synthetic catalog rows
+BENCHMARK_PREFIX = "benchmark"
+
+# Service user that sends the benchmark requests
+BENCHMARK_USERNAME = f"{BENCHMARK_PREFIX}-user"
+
+# Words used to build searchable texts
+WORDS = [
+    "casa", "departamento", "terreno", "playa", "jardin", "alberca", "centro",
+    "norte", "privada", "lujo", "familia", "inversion", "vista", "mar", "selva",
+]
+
+
+def is_disposable_database() -> bool:
+    """Check if the benchmark can write in the database: a sqlite scratch
+    database or one marked as disposable with the
+    BENCHMARK_DISPOSABLE_DATABASE setting (DEBUG is not enough)
+
+    Returns:
+        bool: True if the database is disposable
+    """
+    return connection.vendor == "sqlite" or settings.BENCHMARK_DISPOSABLE_DATABASE
+
+
+def clear_api_cache():
+    """Invalidate the cached api responses and conditional validators
+    (bump the data version of the models of the cached views) without
+    removing other keys of the shared cache, and reload the translations
+    """
+    for model in apps.get_models():
+        if is_cache_model(model):
+            bump_model_version(model)
+    clear_translations()
+
+
+def get_text(words_num: int = 8) -> str:
+    """Build a random text with the benchmark words
+
+    Args:
+        words_num (int): Number of words in the text
+
+    Returns:
+        str: Random text
+    """
+    return " ".join(random.choice(WORDS) for _ in range(words_num))
+
+
+def create_translations(keys: list, batch_size: int) -> list:
+    """Create a translation with random texts for each key
+
+    Args:
+        keys (list): Unique keys (without prefix)
+        batch_size (int): Rows inserted per query
+
+    Returns:
+        list: Translations created
+    """
+    return translations_models.Translation.objects.bulk_create(
+        [
+            translations_models.Translation(
+                key=f"{BENCHMARK_PREFIX}-{key}",
+                es=get_text(3),
+                en=get_text(3),
+            )
+            for key in keys
+        ],
+        batch_size=batch_size,
+    )
+
+
+def create_catalog(
+    properties_num: int = 50000,
+    images_per_property: int = 4,
+    posts_num: int = 10000,
+    batch_size: int = 1000,
+    stdout=print,
+) -> dict:
+    """Create a synthetic catalog with bulk inserts (signals are skipped,
+    so the derived data is rebuilt at the end). Use a disposable database
+
+    Args:
+        properties_num (int): Properties to create
+        images_per_property (int): Images of each property
+        posts_num (int): Blog posts to create
+        batch_size (int): Rows inserted per query
+        stdout (callable): Function used to print progress
+
+    Returns:
+        dict: Number of rows of each model after the creation
+    """
+
+    random.seed(properties_num)
+    run_id = int(time.time())
+    prefix = f"{BENCHMARK_PREFIX}-{run_id}"
+
+    # Base models
+    stdout("Creating base models")
+    locations = properties_models.Location.objects.bulk_create(
+        [
+            properties_models.Location(name=name)
+            for name in create_translations(
+                [f"{run_id}-location-{index}" for index in range(50)], batch_size
+            )
+        ]
+    )
+    categories = properties_models.Category.objects.bulk_create(
+        [
+            properties_models.Category(name=name)
+            for name in create_translations(
+                [f"{run_id}-category-{index}" for index in range(10)], batch_size
+            )
+        ]
+    )
+    tags = properties_models.Tag.objects.bulk_create(
+        [
+            properties_models.Tag(name=name)
+            for name in create_translations(
+                [f"{run_id}-tag-{index}" for index in range(30)], batch_size
+            )
+        ]
+    )
+    short_descriptions = properties_models.ShortDescription.objects.bulk_create(
+        [
+            properties_models.ShortDescription(description=description)
+            for description in create_translations(
+                [f"{run_id}-short-description-{index}" for index in range(500)],
+                batch_size,
+            )
+        ]
+    )
+    sellers = properties_models.Seller.objects.bulk_create(
+        [
+            properties_models.Seller(
+                first_name="Benchmark",
+                last_name=f"Seller {index}",
+                phone=f"{run_id}{index:04d}",
+                email=f"{prefix}-seller-{index}@example.com",
+            )
+            for index in range(200)
+        ]
+    )
+    companies = properties_models.Company.objects.bulk_create(
+        [
+            properties_models.Company(
+                name=f"{prefix} company {index}",
+                slug=f"{prefix}-company-{index}",
+                type=random.choice(properties_models.Company.PROPERTY_TYPE_CHOICES)[0],
+                logo="company-photos/logo.webp",
+                location=random.choice(locations),
+                description_es=get_text(),
+                description_en=get_text(),
+            )
+            for index in range(200)
+        ]
+    )
+
+    # Properties, with tags and images
+    stdout(f"Creating {properties_num} properties")
+    properties = properties_models.Property.objects.bulk_create(
+        [
+            properties_models.Property(
+                name=f"{prefix} property {index} {get_text(2)}",
+                slug=f"{prefix}-property-{index}",
+                company=random.choice(companies),
+                location=random.choice(locations),
+                seller=random.choice(sellers),
+                category=random.choice(categories),
+                short_description=random.choice(short_descriptions),
+                price=random.randint(100000, 10000000),
+                meters=random.randint(40, 5000),
+                active=random.random() < 0.9,
+                featured=random.random() < 0.05,
+                description_es=get_text(40),
+                description_en=get_text(40),
+            )
+            for index in range(properties_num)
+        ],
+        batch_size=batch_size,
+    )
+    properties_models.Property.tags.through.objects.bulk_create(
+        [
+            properties_models.Property.tags.through(property=property, tag=tag)
+            for property in properties
+            for tag in random.sample(tags, 3)
+        ],
+        batch_size=batch_size,
+    )
+
+    stdout(f"Creating {properties_num * images_per_property} property images")
+    for start in range(0, len(properties), batch_size):
+        batch_properties = properties[start:start + batch_size]
+        alt_texts = create_translations(
+            [
+                f"{run_id}-image-{property.id}-{index}"
+                for property in batch_properties
+                for index in range(images_per_property)
+            ],
+            batch_size,
+        )
+        properties_models.PropertyImage.objects.bulk_create(
+            [
+                properties_models.PropertyImage(
+                    property=property,
+                    image=f"property-images/{prefix}-{property.id}-{index}.webp",
+                    alt_text=alt_texts[position * images_per_property + index],
+                )
+                for position, property in enumerate(batch_properties)
+                for index in range(images_per_property)
+            ],
+            batch_size=batch_size,
+        )
+
+    # Posts
+    stdout(f"Creating {posts_num} posts")
+    blog_models.Post.objects.bulk_create(
+        [
+            blog_models.Post(
+                title=f"{prefix} post {index} {get_text(3)}",
+                slug=f"{prefix}-post-{index}",
+                lang=random.choice(["es", "en"]),
+                description=get_text(20),
+                keywords=", ".join(random.sample(WORDS, 3)),
+                content=get_text(300),
+            )
+            for index in range(posts_num)
+        ],
+        batch_size=batch_size,
+    )
+
+    # Derived data maintained by signals in normal saves
+    stdout("Rebuilding search indexes, banners and related properties")
+    for model in [
+        blog_models.Post,
+        properties_models.Property,
+        translations_models.Translation,
+    ]:
+        rebuild_search_index(model)
+    property_ids = [property.id for property in properties]
+    for start in range(0, len(property_ids), batch_size):
+        batch_ids = property_ids[start:start + batch_size]
+        properties_models.Property.update_banners(batch_ids)
+        properties_models.RelatedProperty.rebuild(batch_ids)
+        stdout(f"Rebuilt {start + len(batch_ids)}/{len(property_ids)} properties")
+    clear_api_cache()
+
+    return get_catalog_counts()
+
+
+def delete_catalog(stdout=print) -> dict:
+    """Delete the synthetic catalog rows (all the runs) and the benchmark
+    user. Locations, categories, tags, properties and images are removed
+    in cascade with their translations
+
+    Args:
+        stdout (callable): Function used to print progress
+
+    Returns:
+        dict: Number of rows of each model after the deletion
+    """
+
+    stdout("Deleting the synthetic catalog")
+    translations_models.Translation.objects.filter(
+        key__startswith=f"{BENCHMARK_PREFIX}-"
+    ).delete()
+    properties_models.Company.objects.filter(
+        slug__startswith=f"{BENCHMARK_PREFIX}-"
+    ).delete()
+    properties_models.Seller.objects.filter(
+        email__startswith=f"{BENCHMARK_PREFIX}-"
+    ).delete()
+    blog_models.Post.objects.filter(slug__startswith=f"{BENCHMARK_PREFIX}-").delete()
+    User.objects.filter(username=BENCHMARK_USERNAME).delete()
+    clear_api_cache()
+
+    return get_catalog_counts()
+
+
+def get_catalog_counts() -> dict:
+    """Retrieve the number of rows of the main models
+
+    Returns:
+        dict: Number of rows by model name
+    """
+    return {
+        "properties": properties_models.Property.objects.count(),
+        "property_images": properties_models.PropertyImage.objects.count(),
+        "companies": properties_models.Company.objects.count(),
+        "locations": properties_models.Location.objects.count(),
+        "posts": blog_models.Post.objects.count(),
+        "translations": translations_models.Translation.objects.count(),
+        "search_links": content_models.SearchLink.objects.count(),
+    }
+
+
+def get_benchmark_requests() -> list:
+    """Retrieve the endpoints and query params variants to measure
+
+    Returns:
+        list: Dicts with name, path, params and language
+    """
+
+    property = properties_models.Property.objects.filter(active=True).first()
+    company = properties_models.Company.objects.first()
+    location = properties_models.Location.objects.first()
+
+    requests = [
+        ("properties", "/api/properties/", {}),
+        ("properties-featured", "/api/properties/", {"featured": "true"}),
+        ("properties-summary", "/api/properties/", {"summary": "true"}),
+        ("properties-details", "/api/properties/", {"details": "true"}),
+        ("properties-page-size-100", "/api/properties/", {"page-size": "100"}),
+        ("properties-last-page", "/api/properties/", {"page": "last"}),
+        (
+            "properties-meters",
+            "/api/properties/",
+            {"metros-desde": "100", "metros-hasta": "500"},
+        ),
+        (
+            "properties-price",
+            "/api/properties/",
+            {"precio-desde": "100000", "precio-hasta": "1000000"},
+        ),
+        ("locations", "/api/locations/", {}),
+        ("companies", "/api/companies/", {}),
+        ("companies-details", "/api/companies/", {"details": "true"}),
+        ("posts", "/api/posts/", {}),
+        ("posts-details", "/api/posts/", {"details": "true"}),
+        ("best-developments-images", "/api/best-developments-images/", {}),
+        ("search", "/api/search/", {"q": "casa"}),
+        ("search-multiple-words", "/api/search/", {"q": "casa playa"}),
+        ("search-empty", "/api/search/", {}),
+    ]
+    if location:
+        requests.append(
+            ("properties-location", "/api/properties/", {"ubicacion": location.id})
+        )
+    if property:
+        requests.append(
+            ("property-detail", f"/api/properties/{property.id}/", {"details": "true"})
+        )
+    if company:
+        requests.append(
+            ("company-detail", f"/api/companies/{company.id}/", {"details": "true"})
+        )
+
+    requests = [
+        {"name": name, "path": path, "params": params, "language": language}
+        for name, path, params in requests
+        for language in ["es", "en"]
+    ]
+
+    # Posts are filtered by the request language
+    for language in ["es", "en"]:
+        post = blog_models.Post.objects.filter(lang=language).first()
+        if post:
+            requests.append(
+                {
+                    "name": "post-detail",
+                    "path": f"/api/posts/{post.slug}/",
+                    "params": {"details": "true"},
+                    "language": language,
+                }
+            )
+
+    return requests
+
+
+def get_percentile(values: list, percentile: float) -> float:
+    """Calculate the nearest rank percentile
+
+    Args:
+        values (list): Measured values
+        percentile (float): Percentile from 0 to 100
+
+    Returns:
+        float: Value of the percentile
+    """
+    sorted_values = sorted(values)
+    rank = max(math.ceil(percentile / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def measure_request(
+    client: APIClient, request: dict, iterations: int, use_cache: bool
+) -> dict:
+    """Send the request several times and measure latency, queries and memory
+
+    Args:
+        client (APIClient): Authenticated client
+        request (dict): Request data (see get_benchmark_requests)
+        iterations (int): Times to send the request
+        use_cache (bool): Keep the api responses cache between iterations
+
+    Returns:
+        dict: Request data with the measures
+    """
+
+    latencies = []
+    queries = []
+    peak_memory = 0
+    for _ in range(iterations):
+        if not use_cache:
+            clear_api_cache()
+
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as captured_queries:
+            start = time.perf_counter()
+            response = client.get(
+                request["path"],
+                request["params"],
+                HTTP_ACCEPT_LANGUAGE=request["language"],
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        queries.append(len(captured_queries))
+
+    return {
+        **request,
+        "status": response.status_code,
+        "response_kb": round(len(response.content) / 1024, 2),
+        "p50_ms": round(get_percentile(latencies, 50), 2),
+        "p95_ms": round(get_percentile(latencies, 95), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "queries": max(queries),
+        "peak_memory_kb": round(peak_memory / 1024, 2),
+    }
+
+
+def get_git_commit() -> str:
+    """Retrieve the current git commit (empty outside a repository)
+
+    Returns:
+        str: Commit hash
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def get_media_url_uncached(file) -> str:
+    """Previous media url implementation (storage url on each call),
+    used as the baseline of measure_media_urls
+    """
+    url = file.url
+    if "s3.amazonaws.com" not in url and "digitaloceanspaces" not in url:
+        return f"{settings.HOST}{url}"
+    return url
+
+
+def measure_media_urls(images_num: int = 1000, iterations: int = 20) -> dict:
+    """Measure the cost per image of the media urls, generating the
+    storage url on each call (before) and with the memoized urls (after)
+
+    Args:
+        images_num (int): Different images names
+        iterations (int): Times each image url is requested
+
+    Returns:
+        dict: Microseconds per image before and after
+    """
+
+    files = [
+        properties_models.PropertyImage(
+            image=f"property-images/{BENCHMARK_PREFIX}-{index}.webp"
+        ).image
+        for index in range(images_num)
+    ]
+    measures = {"images": images_num, "iterations": iterations}
+    for name, function in [
+        ("before", get_media_url_uncached),
+        ("after", get_media_url),
+    ]:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for file in files:
+                function(file)
+        elapsed = time.perf_counter() - start
+        measures[f"{name}_us"] = round(elapsed * 1e6 / (images_num * iterations), 3)
+    return measures
+
+
+def run_benchmark(iterations: int = 20, use_cache: bool = False, stdout=print) -> dict:
+    """Measure all the benchmark requests
+
+    Args:
+        iterations (int): Times to send each request
+        use_cache (bool): Keep the api responses cache between iterations
+        stdout (callable): Function used to print progress
+
+    Returns:
+        dict: Report with the environment and the measures of each request
+    """
+
+    client = get_client(BENCHMARK_USERNAME)
+    results = []
+    try:
+        for request in get_benchmark_requests():
+            result = measure_request(client, request, iterations, use_cache)
+            stdout(
+                f"{result['name']} ({result['language']}): "
+                f"p50 {result['p50_ms']}ms p95 {result['p95_ms']}ms "
+                f"{result['queries']} queries"
+            )
+            results.append(result)
+    finally:
+        # Remove the service user and its token
+        User.objects.filter(username=BENCHMARK_USERNAME).delete()
+
+    media_urls = measure_media_urls(iterations=iterations)
+    stdout(
+        f"media urls: {media_urls['before_us']}us per image before, "
+        f"{media_urls['after_us']}us after"
+    )
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "commit": get_git_commit(),
+        "database": connection.vendor,
+        "iterations": iterations,
+        "use_cache": use_cache,
+        "catalog": get_catalog_counts(),
+        "results": results,
+        "media_urls": media_urls,
+    }
+
+
+def compare_reports(report: dict, previous_report: dict) -> list:
+    """Calculate the changes of each request measures between two reports
+
+    Args:
+        report (dict): Current report
+        previous_report (dict): Report to compare with (like other commit)
+
+    Returns:
+        list: Dicts with name, language and the difference of each measure
+    """
+
+    previous_results = {
+        (result["name"], result["language"]): result
+        for result in previous_report["results"]
+    }
+    changes = []
+    for result in report["results"]:
+        previous = previous_results.get((result["name"], result["language"]))
+        if not previous:
+            continue
+        changes.append(
+            {
+                "name": result["name"],
+                "language": result["language"],
+                **{
+                    measure: round(result[measure] - previous[measure], 2)
+                    for measure in ["p50_ms", "p95_ms", "queries", "peak_memory_kb"]
+                },
+            }
+        )
+    return changes
+
+
+def save_report(report: dict, path: str):
+    """Save the report as a json file
+
+    Args:
+        report (dict): Benchmark report
+        path (str): File path
+    """
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
@@ -0,0 +1,113 @@
+import csv
+import json
+
+from django.contrib import admin
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+# Content type of each export format
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Rows fetched from the database per query
+EXPORT_CHUNK_SIZE = 2000
+
+
+class EchoBuffer:
+    """File like object that returns the written value (used to get
+    the csv lines without keeping them in memory)
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def get_export_lines(queryset, fields: list, file_format: str):
+    """Generate the lines of the export, reading the queryset in chunks
+    (values projection, without loading model instances)
+
+    Args:
+        queryset (QuerySet): Rows to export
+        fields (list): Fields or lookups to export (like "company__name")
+        file_format (str): "csv" or "ndjson"
+
+    Yields:
+        str: Export lines
+    """
+
+    rows = queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    if file_format == "csv":
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([row[field] for field in fields])
+        return
+
+    for row in rows:
+        yield json.dumps(row, default=str, ensure_ascii=False) + "\n"
+
+
+def get_export_response(
+    queryset, fields: list, file_format: str, name: str
+) -> StreamingHttpResponse:
+    """Stream the queryset as a csv or ndjson file download
+
+    Args:
+        queryset (QuerySet): Rows to export
+        fields (list): Fields or lookups to export
+        file_format (str): "csv" or "ndjson"
+        name (str): File name without extension
+
+    Returns:
+        StreamingHttpResponse: File download response
+    """
+
+    response = StreamingHttpResponse(
+        get_export_lines(queryset, fields, file_format),
+        content_type=EXPORT_FORMATS[file_format],
+    )
+    date = timezone.now().strftime("%Y-%m-%d")
+    response["Content-Disposition"] = (
+        f'attachment; filename="{name}-{date}.{file_format}"'
+    )
+    return response
+
+
+def get_export_format(request) -> str:
+    """Retrieve the export format from the "export-format" query param
+
+    Args:
+        request (Request): Api request
+
+    Returns:
+        str: "csv" (default) or "ndjson"
+    """
+
+    file_format = request.query_params.get("export-format", "csv")
+    if file_format not in EXPORT_FORMATS:
+        raise ValidationError(
+            {"export-format": [f"Formatos válidos: {', '.join(EXPORT_FORMATS)}"]}
+        )
+    return file_format
+
+
+@admin.action(description="Exportar seleccionados a CSV")
+def export_csv(modeladmin, request, queryset):
+    """Admin action: download the selected rows as csv (model EXPORT_FIELDS)"""
+    model = modeladmin.model
+    return get_export_response(
+        queryset, model.EXPORT_FIELDS, "csv", model._meta.model_name
+    )
+
+
+@admin.action(description="Exportar seleccionados a NDJSON")
+def export_ndjson(modeladmin, request, queryset):
+    """Admin action: download the selected rows as ndjson (model EXPORT_FIELDS)"""
+    model = modeladmin.model
+    return get_export_response(
+        queryset, model.EXPORT_FIELDS, "ndjson", model._meta.model_name
+    )
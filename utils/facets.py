@@ -0,0 +1,164 @@
+from collections import defaultdict
+
+from django.db.models import Count, Max, Min, Q
+
+from properties import models
+from translations.cache import get_translation
+
+# Buckets of the price and meters histograms
+FACET_BUCKETS = 8
+
+# Numeric fields with histogram facets
+FACET_RANGE_FIELDS = ["price", "meters"]
+
+
+def get_count_facet(counts: dict, names: dict, language: str) -> list:
+    """Format the counts of a facet, most common first
+
+    Args:
+        counts (dict): Properties count by value id
+        names (dict): Name translation id by value id
+        language (str): Language of the names
+
+    Returns:
+        list: Values like {"id": 1, "name": "...", "count": 3}
+    """
+    return [
+        {
+            "id": value_id,
+            "name": get_translation(names[value_id], language),
+            "count": count,
+        }
+        for value_id, count in sorted(
+            counts.items(), key=lambda item: (-item[1], item[0])
+        )
+    ]
+
+
+def get_histogram_buckets(min_value, max_value, buckets: int) -> list:
+    """Split a range in buckets of the same width
+
+    Args:
+        min_value (Decimal): Range start
+        max_value (Decimal): Range end (included in the last bucket)
+        buckets (int): Number of buckets (limits rounded to 2 decimals)
+
+    Returns:
+        list: (start, end) tuples, a single bucket if the range is empty
+    """
+    if min_value is None:
+        return []
+    if min_value == max_value:
+        return [(min_value, max_value)]
+    width = (max_value - min_value) / buckets
+    limits = [round(min_value + width * index, 2) for index in range(buckets)]
+    return list(zip(limits, limits[1:] + [max_value]))
+
+
+def get_property_facets(queryset, language: str, buckets: int = FACET_BUCKETS) -> dict:
+    """Count the filtered properties by location, category, tag and
+    company type, and build the price and meters histograms, with a
+    fixed number of queries (grouped counts, tags counts, ranges and
+    histograms)
+
+    Args:
+        queryset (QuerySet): Filtered properties
+        language (str): Language of the names
+        buckets (int): Buckets of each histogram
+
+    Returns:
+        dict: Total and facets of the properties
+    """
+
+    queryset = queryset.order_by()
+
+    # Location, category and company type counts in a single grouped query
+    groups = queryset.values(
+        "location_id",
+        "location__name_id",
+        "category_id",
+        "category__name_id",
+        "company__type",
+    ).annotate(count=Count("id"))
+
+    total = 0
+    locations = defaultdict(int)
+    location_names = {}
+    categories = defaultdict(int)
+    category_names = {}
+    company_types = defaultdict(int)
+    for group in groups:
+        total += group["count"]
+        locations[group["location_id"]] += group["count"]
+        location_names[group["location_id"]] = group["location__name_id"]
+        categories[group["category_id"]] += group["count"]
+        category_names[group["category_id"]] = group["category__name_id"]
+        company_types[group["company__type"]] += group["count"]
+
+    # Tags counts from the many to many table
+    tags = {}
+    tag_names = {}
+    tag_groups = (
+        models.Property.tags.through.objects.filter(
+            property_id__in=queryset.values("id")
+        )
+        .values("tag_id", "tag__name_id")
+        .annotate(count=Count("property_id"))
+        .order_by()
+    )
+    for group in tag_groups:
+        tags[group["tag_id"]] = group["count"]
+        tag_names[group["tag_id"]] = group["tag__name_id"]
+
+    # Histograms: ranges, then the buckets counts in a single aggregate
+    ranges = queryset.aggregate(
+        **{f"{field}_min": Min(field) for field in FACET_RANGE_FIELDS},
+        **{f"{field}_max": Max(field) for field in FACET_RANGE_FIELDS},
+    )
+    field_buckets = {
+        field: get_histogram_buckets(
+            ranges[f"{field}_min"], ranges[f"{field}_max"], buckets
+        )
+        for field in FACET_RANGE_FIELDS
+    }
+    bucket_counts = {}
+    for field, field_ranges in field_buckets.items():
+        for index, (start, end) in enumerate(field_ranges):
+            last = index == len(field_ranges) - 1
+            end_filter = {f"{field}__lte" if last else f"{field}__lt": end}
+            bucket_counts[f"{field}_{index}"] = Count(
+                "id", filter=Q(**{f"{field}__gte": start}, **end_filter)
+            )
+    counts = queryset.aggregate(**bucket_counts) if bucket_counts else {}
+
+    company_type_names = dict(models.Company.PROPERTY_TYPE_CHOICES)
+    facets = {
+        "total": total,
+        "locations": get_count_facet(locations, location_names, language),
+        "categories": get_count_facet(categories, category_names, language),
+        "tags": get_count_facet(tags, tag_names, language),
+        "company_types": [
+            {
+                "value": company_type,
+                "name": company_type_names.get(company_type, company_type),
+                "count": count,
+            }
+            for company_type, count in sorted(
+                company_types.items(), key=lambda item: (-item[1], item[0])
+            )
+        ],
+    }
+    for field, field_ranges in field_buckets.items():
+        facets[field] = {
+            "min": ranges[f"{field}_min"],
+            "max": ranges[f"{field}_max"],
+            "buckets": [
+                {
+                    "from": start,
+                    "to": end,
+                    "count": counts[f"{field}_{index}"],
+                }
+                for index, (start, end) in enumerate(field_ranges)
+            ],
+        }
+    return facets
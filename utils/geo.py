@@ -0,0 +1,161 @@
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ACos, Cos, Least, Radians, Sin
+
+from utils.google_maps import get_maps_coordinates
+
+# Size in degrees of the grid cells (about 11 km): the indexed "geo_cell"
+# column narrows the map searches before comparing the coordinates
+GEO_CELL_SIZE = 0.1
+GEO_CELLS_PER_ROW = round(360 / GEO_CELL_SIZE)
+
+# Max cells listed in a query (bigger areas only use the coordinates)
+MAX_GEO_CELLS = 400
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def get_cell_index(value: float, min_value: float) -> int:
+    """Position of a coordinate in the grid rows or columns"""
+    return math.floor((value - min_value) / GEO_CELL_SIZE)
+
+
+def get_geo_cell(latitude: float, longitude: float) -> int:
+    """Calculate the grid cell of a point
+
+    Args:
+        latitude (float): Point latitude
+        longitude (float): Point longitude
+
+    Returns:
+        int: Cell number, None without coordinates
+    """
+    if latitude is None or longitude is None:
+        return None
+    row = get_cell_index(latitude, -90)
+    column = min(get_cell_index(longitude, -180), GEO_CELLS_PER_ROW - 1)
+    return row * GEO_CELLS_PER_ROW + column
+
+
+def get_bbox_cells(bbox: tuple) -> list:
+    """Retrieve the grid cells that cover a bounding box
+
+    Args:
+        bbox (tuple): (min_latitude, min_longitude, max_latitude, max_longitude)
+
+    Returns:
+        list: Cells numbers, None if the box has more than MAX_GEO_CELLS
+    """
+    min_latitude, min_longitude, max_latitude, max_longitude = bbox
+    first_cell = get_geo_cell(min_latitude, min_longitude)
+    last_cell = get_geo_cell(max_latitude, max_longitude)
+    first_row, first_column = divmod(first_cell, GEO_CELLS_PER_ROW)
+    last_row, last_column = divmod(last_cell, GEO_CELLS_PER_ROW)
+
+    rows = range(first_row, last_row + 1)
+    columns = range(first_column, last_column + 1)
+    if len(rows) * len(columns) > MAX_GEO_CELLS:
+        return None
+    return [row * GEO_CELLS_PER_ROW + column for row in rows for column in columns]
+
+
+def get_bbox_filter(bbox: tuple) -> Q:
+    """Build the filter of the points inside a bounding box (grid cells
+    for the index plus the exact coordinates)
+
+    Args:
+        bbox (tuple): (min_latitude, min_longitude, max_latitude, max_longitude)
+
+    Returns:
+        Q: Filter of the "latitude", "longitude" and "geo_cell" fields
+    """
+    min_latitude, min_longitude, max_latitude, max_longitude = bbox
+    bbox_filter = Q(
+        latitude__gte=min_latitude,
+        latitude__lte=max_latitude,
+        longitude__gte=min_longitude,
+        longitude__lte=max_longitude,
+    )
+    cells = get_bbox_cells(bbox)
+    if cells is not None:
+        bbox_filter &= Q(geo_cell__in=cells)
+    return bbox_filter
+
+
+def get_radius_bbox(latitude: float, longitude: float, radius_km: float) -> tuple:
+    """Calculate the bounding box of a circle (limited to valid coordinates)
+
+    Args:
+        latitude (float): Center latitude
+        longitude (float): Center longitude
+        radius_km (float): Circle radius
+
+    Returns:
+        tuple: (min_latitude, min_longitude, max_latitude, max_longitude)
+    """
+    latitude_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    latitude_cos = max(math.cos(math.radians(latitude)), 0.01)
+    longitude_delta = min(latitude_delta / latitude_cos, 180)
+    return (
+        max(latitude - latitude_delta, -90),
+        max(longitude - longitude_delta, -180),
+        min(latitude + latitude_delta, 90),
+        min(longitude + longitude_delta, 180),
+    )
+
+
+def get_distance_expression(latitude: float, longitude: float):
+    """Build the distance in km from a point to the "latitude" and
+    "longitude" fields (spherical law of cosines, sqlite and postgres)
+
+    Args:
+        latitude (float): Point latitude
+        longitude (float): Point longitude
+
+    Returns:
+        Func: Distance expression
+    """
+    point_latitude = Value(math.radians(latitude), output_field=FloatField())
+    point_longitude = Value(math.radians(longitude), output_field=FloatField())
+    cosine = Cos(point_latitude) * Cos(Radians(F("latitude"))) * Cos(
+        Radians(F("longitude")) - point_longitude
+    ) + Sin(point_latitude) * Sin(Radians(F("latitude")))
+    return ACos(Least(cosine, Value(1.0))) * EARTH_RADIUS_KM
+
+
+def filter_radius(queryset, latitude: float, longitude: float, radius_km: float):
+    """Filter the points of a queryset inside a circle
+
+    Args:
+        queryset (QuerySet): Model with "latitude", "longitude" and "geo_cell"
+        latitude (float): Center latitude
+        longitude (float): Center longitude
+        radius_km (float): Circle radius
+
+    Returns:
+        QuerySet: Points in the circle, annotated with "distance" (km)
+    """
+    bbox = get_radius_bbox(latitude, longitude, radius_km)
+    return (
+        queryset.filter(get_bbox_filter(bbox))
+        .annotate(distance=get_distance_expression(latitude, longitude))
+        .filter(distance__lte=radius_km)
+    )
+
+
+class GeoPointMixin:
+    """Model mixin that saves the coordinates of the "google_maps_src"
+    field in "latitude", "longitude" and its grid cell in "geo_cell"
+    """
+
+    def update_coordinates(self):
+        """Read the coordinates of the maps src"""
+        coordinates = get_maps_coordinates(self.google_maps_src) or (None, None)
+        self.latitude, self.longitude = coordinates
+        self.geo_cell = get_geo_cell(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        """Update the coordinates before saving"""
+        self.update_coordinates()
+        super().save(*args, **kwargs)
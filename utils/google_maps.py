@@ -1,3 +1,17 @@
+import re
+
+# Coordinates in the Google Maps urls (most precise first): place marker
+# ("!3d<lat>!4d<lng>"), embed center ("!2d<lng>!3d<lat>"), map center
+# ("@<lat>,<lng>") and query params ("q=<lat>,<lng>")
+NUMBER_PATTERN = r"(-?\d+(?:\.\d+)?)"
+COORDINATES_PATTERNS = [
+    (re.compile(rf"!3d{NUMBER_PATTERN}!4d{NUMBER_PATTERN}"), False),
+    (re.compile(rf"!2d{NUMBER_PATTERN}!3d{NUMBER_PATTERN}"), True),
+    (re.compile(rf"@{NUMBER_PATTERN},{NUMBER_PATTERN}"), False),
+    (re.compile(rf"[?&](?:q|ll|center)={NUMBER_PATTERN},{NUMBER_PATTERN}"), False),
+]
+
+
 def get_maps_src(code: str) -> str:
     """
     Get the src attribute of the Google Maps iframe from the given code.
@@ -24,3 +38,29 @@ def get_maps_src(code: str) -> str:
 
     # Return current src
     return code
+
+
+def get_maps_coordinates(src: str) -> tuple:
+    """
+    Get the latitude and longitude of the Google Maps src.
+
+    Args:
+        src (str): Google Maps src (see get_maps_src)
+
+    Returns:
+        tuple: (latitude, longitude) floats, or None if not found.
+    """
+
+    if not src:
+        return None
+
+    for pattern, longitude_first in COORDINATES_PATTERNS:
+        match = pattern.search(src)
+        if not match:
+            continue
+        first, second = float(match.group(1)), float(match.group(2))
+        latitude, longitude = (second, first) if longitude_first else (first, second)
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+
+    return None
@@ -0,0 +1,313 @@
+import base64
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+from core.cache import bump_model_version
+from utils.media import get_media_url, get_storage_url
+
+# Widths of the resized variants (only smaller than the original)
+IMAGE_VARIANTS_WIDTHS = [320, 640, 1024, 1600]
+IMAGE_VARIANTS_QUALITY = 80
+
+# Storage folder of the variants (same structure as the originals)
+IMAGE_VARIANTS_FOLDER = "variants"
+
+# Max size of the blurred placeholder shown while the image loads
+IMAGE_PLACEHOLDER_SIZE = 16
+
+# Worker used to create the variants after the upload (IMAGE_VARIANTS_THREAD)
+images_executor = ThreadPoolExecutor(max_workers=1)
+
+
+def get_variant_name(name: str, width: int) -> str:
+    """Build the storage name of a variant
+
+    Args:
+        name (str): Original image name, like "property-images/house.jpg"
+        width (int): Variant width
+
+    Returns:
+        str: Variant name, like "variants/property-images/house-320w.webp"
+    """
+    root = os.path.splitext(name)[0]
+    return f"{IMAGE_VARIANTS_FOLDER}/{root}-{width}w.webp"
+
+
+def read_image_metadata(image: Image.Image) -> dict:
+    """Compute the dimensions, dominant color and placeholder of an image
+
+    Args:
+        image (Image): Opened image (RGB or RGBA)
+
+    Returns:
+        dict: width, height, color (hex) and placeholder (tiny webp data uri)
+    """
+
+    # Most frequent color of a 4 colors palette of a thumbnail
+    thumbnail = image.convert("RGB")
+    thumbnail.thumbnail((64, 64))
+    palette_image = thumbnail.quantize(colors=4)
+    _, color_index = max(palette_image.getcolors())
+    palette = palette_image.getpalette()
+    red, green, blue = palette[color_index * 3:color_index * 3 + 3]
+
+    placeholder = image.copy()
+    placeholder.thumbnail((IMAGE_PLACEHOLDER_SIZE, IMAGE_PLACEHOLDER_SIZE))
+    content = BytesIO()
+    placeholder.save(content, "WEBP", quality=40)
+    placeholder_data = base64.b64encode(content.getvalue()).decode()
+
+    return {
+        "width": image.width,
+        "height": image.height,
+        "color": f"#{red:02x}{green:02x}{blue:02x}",
+        "placeholder": f"data:image/webp;base64,{placeholder_data}",
+    }
+
+
+def create_image_variants(file) -> dict:
+    """Save resized webp copies of the image in the file storage and
+    compute its metadata
+
+    Args:
+        file (FieldFile): Original image
+
+    Returns:
+        dict: Variants data: original name ("source"), variants names
+            by width ("widths") and metadata (see read_image_metadata)
+    """
+
+    variants = {
+        "source": file.name,
+        "widths": {},
+        "width": None,
+        "height": None,
+        "color": "",
+        "placeholder": "",
+    }
+    try:
+        file.open("rb")
+        with Image.open(file) as image:
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, Image.DecompressionBombError):
+        # Missing or invalid image: the original is served
+        return variants
+    finally:
+        file.close()
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    variants.update(read_image_metadata(image))
+
+    for width in IMAGE_VARIANTS_WIDTHS:
+        if width >= image.width:
+            break
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        content = BytesIO()
+        resized.save(content, "WEBP", quality=IMAGE_VARIANTS_QUALITY)
+
+        name = get_variant_name(file.name, width)
+        if file.storage.exists(name):
+            file.storage.delete(name)
+        variants["widths"][str(width)] = file.storage.save(
+            name, ContentFile(content.getvalue())
+        )
+
+    return variants
+
+
+def delete_image_variants(storage, variants: dict, keep: dict = None):
+    """Delete the variants files from the storage
+
+    Args:
+        storage (Storage): Images storage
+        variants (dict): Variants data to delete
+        keep (dict): Variants data with files to keep
+    """
+    keep_names = set((keep or {}).get("widths", {}).values())
+    for name in (variants or {}).get("widths", {}).values():
+        if name not in keep_names:
+            storage.delete(name)
+
+
+def get_image_srcset(variants: dict) -> list:
+    """Retrieve the urls of the variants sorted by width
+
+    Args:
+        variants (dict): Variants data of the image
+
+    Returns:
+        list: Variants like {"width": 320, "url": "..."}
+    """
+    widths = (variants or {}).get("widths", {})
+    return [
+        {
+            "width": int(width),
+            "url": get_media_url(get_storage_url(default_storage, name)),
+        }
+        for width, name in sorted(widths.items(), key=lambda item: int(item[0]))
+    ]
+
+
+def get_image_metadata(variants: dict) -> dict:
+    """Retrieve the metadata of an image from its variants data
+
+    Args:
+        variants (dict): Variants data of the image
+
+    Returns:
+        dict: width, height, color and placeholder (empty if not computed)
+    """
+    variants = variants or {}
+    return {
+        "width": variants.get("width"),
+        "height": variants.get("height"),
+        "color": variants.get("color", ""),
+        "placeholder": variants.get("placeholder", ""),
+    }
+
+
+def update_image_variants_in_thread(model, pk: int):
+    """Create the variants of a saved image in the background thread
+
+    Args:
+        model (Model): Model class with ImageVariantsMixin
+        pk (int): Id of the saved instance
+    """
+
+    def update():
+        try:
+            instance = model.objects.filter(pk=pk).first()
+            if instance is not None:
+                instance.update_image_variants()
+        finally:
+            connection.close()
+
+    images_executor.submit(update)
+
+
+class ImageVariantsMixin:
+    """Model mixin that keeps resized webp variants and metadata (size,
+    dominant color and placeholder) of the image fields, created in a
+    background thread after each upload (and by the
+    "generate_image_variants" command)
+
+    IMAGE_VARIANTS_FIELDS maps each image field to its variants json field
+    """
+
+    IMAGE_VARIANTS_FIELDS = {}
+
+    def save(self, *args, **kwargs):
+        """Schedule the variants creation of the changed images"""
+        super().save(*args, **kwargs)
+        if settings.IMAGE_VARIANTS_THREAD and self.get_outdated_image_fields():
+            transaction.on_commit(
+                partial(update_image_variants_in_thread, type(self), self.pk)
+            )
+
+    def get_outdated_image_fields(self) -> list:
+        """Retrieve the image fields without variants or metadata of
+        the current file
+
+        Returns:
+            list: Image fields names
+        """
+        outdated_fields = []
+        for image_field, variants_field in self.IMAGE_VARIANTS_FIELDS.items():
+            file = getattr(self, image_field)
+            variants = getattr(self, variants_field) or {}
+            if (file.name or None) != variants.get("source"):
+                outdated_fields.append(image_field)
+            elif file and "width" not in variants:
+                outdated_fields.append(image_field)
+        return outdated_fields
+
+    def update_image_variants(self) -> bool:
+        """Create the variants of the outdated image fields and delete the
+        variants of the previous images (saved without signals)
+
+        Returns:
+            bool: True if any variants field changed
+        """
+
+        updates = {}
+        for image_field in self.get_outdated_image_fields():
+            variants_field = self.IMAGE_VARIANTS_FIELDS[image_field]
+            file = getattr(self, image_field)
+            variants = create_image_variants(file) if file else {}
+            delete_image_variants(
+                file.storage, getattr(self, variants_field), keep=variants
+            )
+            setattr(self, variants_field, variants)
+            updates[variants_field] = variants
+
+        if not updates:
+            return False
+
+        model = type(self)
+        model.objects.filter(pk=self.pk).update(**updates)
+        bump_model_version(model)
+        self.image_variants_updated()
+        return True
+
+    def image_variants_updated(self):
+        """Hook called after the variants are saved"""
+        pass
+
+    def get_srcset(self, image_field: str) -> list:
+        """Retrieve the variants urls of an image field (see get_image_srcset)"""
+        return get_image_srcset(
+            getattr(self, self.IMAGE_VARIANTS_FIELDS[image_field])
+        )
+
+    def get_metadata(self, image_field: str) -> dict:
+        """Retrieve the metadata of an image field (see get_image_metadata)"""
+        return get_image_metadata(
+            getattr(self, self.IMAGE_VARIANTS_FIELDS[image_field])
+        )
+
+    @classmethod
+    def update_missing_image_variants(cls, workers: int = 1, stdout=print) -> int:
+        """Create the variants and metadata of all the outdated images
+        of the model
+
+        Args:
+            workers (int): Threads used to process the images
+            stdout (callable): Progress output function
+
+        Returns:
+            int: Instances updated
+        """
+
+        instances = [
+            instance
+            for instance in cls.objects.order_by("pk").iterator()
+            if instance.get_outdated_image_fields()
+        ]
+
+        def update(instance) -> bool:
+            try:
+                updated = instance.update_image_variants()
+            finally:
+                if workers > 1:
+                    connection.close()
+            if updated:
+                stdout(f"{cls.__name__} {instance.pk}: variants created")
+            return updated
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(update, instances))
+        else:
+            results = [update(instance) for instance in instances]
+        return sum(results)
@@ -1,7 +1,66 @@
 import os
+from functools import lru_cache
 
 from django.conf import settings
+from django.core.signals import setting_changed
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, empty
+
+# Max media urls kept in memory (least recently used are discarded)
+MEDIA_URLS_CACHE_SIZE = 10000
+
+
+def is_url_cacheable(storage) -> bool:
+    """Check if the urls of the storage are always the same for a name:
+    local files, custom domain (cdn) or public (unsigned) s3 urls.
+    Signed s3 urls expire, so they are generated each time
+
+    Args:
+        storage (Storage): Files storage
+
+    Returns:
+        bool: True if the urls can be cached
+    """
+    if getattr(storage, "custom_domain", None):
+        return True
+    return not getattr(storage, "querystring_auth", False)
+
+
+@lru_cache(maxsize=MEDIA_URLS_CACHE_SIZE)
+def _get_cached_storage_url(storage, name: str) -> str:
+    """Generate the url of a file once (see get_storage_url)"""
+    return storage.url(name)
+
+
+@receiver(setting_changed)
+def clear_storage_urls(setting, **kwargs):
+    """Discard the cached urls when the media settings change (tests)"""
+    if setting.startswith(("MEDIA_", "STORAGES", "AWS_", "DEFAULT_FILE_STORAGE")):
+        _get_cached_storage_url.cache_clear()
+
+
+def get_storage_url(storage, name: str) -> str:
+    """Retrieve the url of a stored file, memoized by storage and name
+    (s3 urls with custom domain are built without boto calls)
+
+    Args:
+        storage (Storage): Files storage
+        name (str): File name in the storage
+
+    Returns:
+        str: File url (relative for local files)
+    """
+
+    # Use the real storage as key (default_storage is a lazy proxy)
+    if isinstance(storage, LazyObject):
+        if storage._wrapped is empty:
+            storage._setup()
+        storage = storage._wrapped
+
+    if not is_url_cacheable(storage):
+        return storage.url(name)
+    return _get_cached_storage_url(storage, name)
 
 
 def get_media_url(object_or_url: object) -> str:
@@ -19,11 +78,12 @@ def get_media_url(object_or_url: object) -> str:
     if type(object_or_url) is str:
         url_str = object_or_url
     else:
-        url_str = object_or_url.url
+        url_str = get_storage_url(object_or_url.storage, object_or_url.name)
 
-    if "s3.amazonaws.com" not in url_str and "digitaloceanspaces" not in url_str:
-        return f"{settings.HOST}{url_str}"
-    return url_str
+    # Local files urls are relative
+    if url_str.startswith(("https://", "http://", "//")):
+        return url_str
+    return f"{settings.HOST}{url_str}"
 
 
 def get_test_image(image_name: str = "test.webp") -> SimpleUploadedFile:
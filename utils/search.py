@@ -0,0 +1,440 @@
+import heapq
+import re
+from itertools import islice
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce, Greatest
+
+from core.pagination import get_keyset_filter
+
+# Postgres text search config for each language
+SEARCH_CONFIGS = {
+    "es": "spanish",
+    "en": "english",
+}
+
+
+def get_search_tokens(query: str) -> list:
+    """Split the user query in clean words (no search operators)
+
+    Args:
+        query (str): Text submitted by the user
+
+    Returns:
+        list: Lowercase words in the query
+    """
+    return re.findall(r"\w+", query.lower())
+
+
+def get_search_columns(search_fields: dict) -> list:
+    """Retrieve the unique columns of the search fields of all languages
+
+    Args:
+        search_fields (dict): Fields to search for each language
+
+    Returns:
+        list: Columns names without duplicates
+    """
+    columns = []
+    for fields in search_fields.values():
+        for field in fields:
+            if field not in columns:
+                columns.append(field)
+    return columns
+
+
+def get_fts_table(model) -> str:
+    """Retrieve the name of the SQLite FTS5 table of the model
+
+    Args:
+        model (Model): Model class
+
+    Returns:
+        str: FTS5 table name
+    """
+    return f"{model._meta.db_table}_fts"
+
+
+def get_index_name(model, language: str) -> str:
+    """Retrieve the name of the Postgres GIN index of the model
+
+    Args:
+        model (Model): Model class
+        language (str): Language of the index
+
+    Returns:
+        str: Index name (max 30 chars)
+    """
+    return f"{model._meta.db_table[:20]}_fts_{language}"
+
+
+def create_search_index(schema_editor, model, search_fields: dict):
+    """Create the full text search index of the model (used in migrations)
+
+    Postgres: GIN index over to_tsvector with the language config
+    SQLite: FTS5 table filled with the current rows
+    Other databases: nothing (search fallbacks to icontains)
+
+    Args:
+        schema_editor (BaseDatabaseSchemaEditor): Migration schema editor
+        model (Model): Model class
+        search_fields (dict): Fields to search for each language
+    """
+
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for language, fields in search_fields.items():
+            index = GinIndex(
+                SearchVector(*fields, config=SEARCH_CONFIGS[language]),
+                name=get_index_name(model, language),
+            )
+            schema_editor.add_index(model, index)
+
+    elif vendor == "sqlite":
+        fts_table = get_fts_table(model)
+        columns = ", ".join(get_search_columns(search_fields))
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+            f"{columns}, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {fts_table} (rowid, {columns}) "
+            f"SELECT id, {columns} FROM {model._meta.db_table}"
+        )
+
+
+def delete_search_index(schema_editor, model, search_fields: dict):
+    """Delete the full text search index of the model (used in migrations)
+
+    Args:
+        schema_editor (BaseDatabaseSchemaEditor): Migration schema editor
+        model (Model): Model class
+        search_fields (dict): Fields to search for each language
+    """
+
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for language in search_fields:
+            schema_editor.execute(
+                f"DROP INDEX IF EXISTS {get_index_name(model, language)}"
+            )
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {get_fts_table(model)}")
+
+
+def update_search_document(instance):
+    """Save the instance text in the SQLite FTS5 table
+    (Postgres indexes are updated by the database)
+
+    Args:
+        instance (Model): Instance with SEARCH_FIELDS saved
+    """
+
+    if connection.vendor != "sqlite":
+        return
+
+    fts_table = get_fts_table(type(instance))
+    columns = get_search_columns(instance.SEARCH_FIELDS)
+    values = [getattr(instance, column) or "" for column in columns]
+    placeholders = ", ".join(["%s"] * len(columns))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {fts_table} WHERE rowid = %s", [instance.pk])
+        cursor.execute(
+            f"INSERT INTO {fts_table} (rowid, {', '.join(columns)}) "
+            f"VALUES (%s, {placeholders})",
+            [instance.pk, *values],
+        )
+
+
+def delete_search_document(instance):
+    """Delete the instance text from the SQLite FTS5 table
+
+    Args:
+        instance (Model): Instance with SEARCH_FIELDS deleted
+    """
+
+    if connection.vendor != "sqlite":
+        return
+
+    fts_table = get_fts_table(type(instance))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {fts_table} WHERE rowid = %s", [instance.pk])
+
+
+def rebuild_search_index(model):
+    """Refill the SQLite FTS5 table of the model from the model table
+
+    Args:
+        model (Model): Model class with SEARCH_FIELDS
+    """
+
+    if connection.vendor != "sqlite":
+        return
+
+    fts_table = get_fts_table(model)
+    columns = ", ".join(get_search_columns(model.SEARCH_FIELDS))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {fts_table}")
+        cursor.execute(
+            f"INSERT INTO {fts_table} (rowid, {columns}) "
+            f"SELECT id, {columns} FROM {model._meta.db_table}"
+        )
+
+
+def get_search_filter(model, query: str) -> Q:
+    """Build the filter of the rows of the model matching the query,
+    using the full text search index of the database
+
+    Args:
+        model (Model): Model class with SEARCH_FIELDS
+        query (str): Text submitted by the user
+
+    Returns:
+        Q: Filter to apply to a queryset of the model
+    """
+
+    tokens = get_search_tokens(query)
+    if not tokens:
+        return Q()
+
+    vendor = connection.vendor
+    if vendor == "postgresql":
+
+        # Prefix search of all the words with the language configs
+        raw_query = " & ".join(f"{token}:*" for token in tokens)
+        search_filter = Q()
+        for language, fields in model.SEARCH_FIELDS.items():
+            config = SEARCH_CONFIGS[language]
+            matches = model.objects.annotate(
+                search_vector=SearchVector(*fields, config=config)
+            ).filter(
+                search_vector=SearchQuery(raw_query, config=config, search_type="raw")
+            )
+            search_filter |= Q(pk__in=matches.values("pk"))
+        return search_filter
+
+    if vendor == "sqlite":
+        fts_table = get_fts_table(model)
+        match_query = " ".join(f'"{token}"*' for token in tokens)
+        return Q(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s",
+                [match_query],
+            )
+        )
+
+    # Fallback: all words in any search field
+    search_filter = Q()
+    for token in tokens:
+        token_filter = Q()
+        for column in get_search_columns(model.SEARCH_FIELDS):
+            token_filter |= Q(**{f"{column}__icontains": token})
+        search_filter &= token_filter
+    return search_filter
+
+
+def get_search_rank(model, query: str):
+    """Build the relevance expression of the rows of the model
+    (higher is more relevant)
+
+    Args:
+        model (Model): Model class with SEARCH_FIELDS
+        query (str): Text submitted by the user
+
+    Returns:
+        Expression: Rank expression to annotate
+    """
+
+    tokens = get_search_tokens(query)
+    if not tokens:
+        return Value(0.0, output_field=FloatField())
+
+    vendor = connection.vendor
+    if vendor == "postgresql":
+        raw_query = " & ".join(f"{token}:*" for token in tokens)
+        ranks = []
+        for language, fields in model.SEARCH_FIELDS.items():
+            config = SEARCH_CONFIGS[language]
+            ranks.append(
+                SearchRank(
+                    SearchVector(*fields, config=config),
+                    SearchQuery(raw_query, config=config, search_type="raw"),
+                )
+            )
+        rank = Greatest(*ranks) if len(ranks) > 1 else ranks[0]
+
+        # ts_rank returns float4 (real): cast it to float8 (like the cursor
+        # values) so the keyset filter matches the rank of the last row
+        return Cast(rank, FloatField())
+
+    if vendor == "sqlite":
+        fts_table = get_fts_table(model)
+        match_query = " ".join(f'"{token}"*' for token in tokens)
+        rank = RawSQL(
+            f"SELECT -bm25({fts_table}) FROM {fts_table} "
+            f"WHERE {fts_table} MATCH %s "
+            f"AND rowid = {model._meta.db_table}.{model._meta.pk.column}",
+            [match_query],
+            output_field=FloatField(),
+        )
+        return Coalesce(rank, Value(0.0, output_field=FloatField()))
+
+    return Value(0.0, output_field=FloatField())
+
+
+def get_related_model(model, lookup: str):
+    """Retrieve the model at the end of a foreign key lookup
+
+    Args:
+        model (Model): Initial model class
+        lookup (str): Foreign keys path like "short_description__description"
+
+    Returns:
+        Model: Related model class
+    """
+    for field_name in lookup.split("__"):
+        model = model._meta.get_field(field_name).related_model
+    return model
+
+
+def search_queryset(queryset, query: str, related_fields: tuple = ()):
+    """Filter the queryset with the full text search query and
+    annotate the relevance as "search_rank"
+
+    Args:
+        queryset (QuerySet): Queryset to search in
+        query (str): Text submitted by the user (empty returns all rows)
+        related_fields (tuple): Foreign keys lookups to models with
+            SEARCH_FIELDS (like translations) to search too
+
+    Returns:
+        QuerySet: Matching rows annotated with search_rank
+    """
+
+    model = queryset.model
+    has_search_fields = hasattr(model, "SEARCH_FIELDS")
+    if has_search_fields:
+        search_rank = get_search_rank(model, query)
+    else:
+        search_rank = Value(0.0, output_field=FloatField())
+    queryset = queryset.annotate(search_rank=search_rank)
+    if not get_search_tokens(query):
+        return queryset
+
+    # Models without SEARCH_FIELDS only match by their related fields
+    if has_search_fields:
+        search_filter = get_search_filter(model, query)
+    else:
+        search_filter = Q(pk__in=[])
+    for lookup in related_fields:
+        related_model = get_related_model(model, lookup)
+        related_matches = related_model.objects.filter(
+            get_search_filter(related_model, query)
+        )
+        search_filter |= Q(**{f"{lookup}__in": related_matches.values("pk")})
+    return queryset.filter(search_filter)
+
+
+class MergedSearchResults:
+    """Lazy list of search results of several querysets, sorted by
+    search_rank and date (newest first), used as the paginator object list
+
+    Only (rank, date, id) tuples up to the end of the requested slice are
+    fetched from each queryset and merged (k-way merge), so the caller
+    only hydrates the rows of the current page
+    """
+
+    def __init__(self, querysets: dict, date_field: str = "updated_at"):
+        """Save querysets
+
+        Args:
+            querysets (dict): Querysets annotated with search_rank, by type name
+            date_field (str): Date field used to sort results with the same rank
+        """
+        self.querysets = querysets
+        self.date_field = date_field
+        self._count = None
+
+        # Position of each row in the cursor pagination (the type name
+        # breaks ties of the same rank, date and id)
+        self.keyset_fields = ["search_rank", date_field, "id", "type"]
+
+    def count(self) -> int:
+        """Total results of all querysets (one count query per queryset)"""
+        if self._count is None:
+            self._count = sum(queryset.count() for queryset in self.querysets.values())
+        return self._count
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, index):
+        """Retrieve the (type, id) tuples of the results in the slice
+
+        Args:
+            index (slice): Slice of results to retrieve
+
+        Returns:
+            list: (type, id) tuples sorted by rank and date
+        """
+
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else self.count()
+        rows = islice(self.__get_merged_rows__(stop), start, stop)
+        return [(row[3], row[2]) for row in rows]
+
+    def __get_merged_rows__(
+        self, limit: int, position: list = None, reverse: bool = False
+    ):
+        """Merge the sorted streams of (rank, date, id, type) of each queryset
+
+        Args:
+            limit (int): Max rows fetched from each queryset
+            position (list): Only rows after this (rank, date, id, type) key
+            reverse (bool): Rows before the position (ascending order)
+
+        Returns:
+            iterator: Merged (rank, date, id, type) rows
+        """
+
+        fields = self.keyset_fields[:3]
+        ordering = fields if reverse else [f"-{field}" for field in fields]
+        streams = []
+        for type_name, queryset in self.querysets.items():
+            if position is not None:
+                # The type name breaks ties of the same (rank, date, id)
+                inclusive = type_name > position[3] if reverse else (
+                    type_name < position[3]
+                )
+                queryset = queryset.filter(
+                    get_keyset_filter(fields, position[:3], reverse, inclusive)
+                )
+            rows = queryset.order_by(*ordering).values_list(*fields)[:limit]
+            streams.append(
+                [(rank, date, id, type_name) for rank, date, id in rows]
+            )
+        return heapq.merge(*streams, reverse=not reverse)
+
+    def get_keyset_page(
+        self, position: list, limit: int, reverse: bool = False
+    ) -> list:
+        """Retrieve the results after (or before) a position, used by
+        the keyset pagination (no count queries)
+
+        Args:
+            position (list): (rank, date, id, type) of the cursor (None: start)
+            limit (int): Max results
+            reverse (bool): Results before the position (ascending order)
+
+        Returns:
+            list: ((type, id), position) tuples
+        """
+        rows = islice(self.__get_merged_rows__(limit, position, reverse), limit)
+        return [((row[3], row[2]), list(row)) for row in rows]
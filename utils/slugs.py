@@ -0,0 +1,217 @@
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from core.cache import bump_model_version
+
+# Saves retried when other request takes the same slug at the same time
+SLUG_SAVE_RETRIES = 3
+
+
+def get_unique_slug(base_slug: str, used_slugs: set) -> str:
+    """Find the first free "<base_slug>-<n>" slug in memory and mark it
+    as used
+
+    Args:
+        base_slug (str): Desired slug
+        used_slugs (set): Slugs already taken (updated in place)
+
+    Returns:
+        str: Unique slug
+    """
+
+    slug = base_slug
+    suffix = 1
+    while slug in used_slugs:
+        slug = f"{base_slug}-{suffix}"
+        suffix += 1
+    used_slugs.add(slug)
+    return slug
+
+
+def get_next_slug(model, base_slug: str, exclude_pk: int = None) -> str:
+    """Find the next free "<base_slug>-<n>" slug of a model in a single
+    query: the max suffix allocated to the instances with the same base
+    slug plus one. Natural numbers (like the "10" of "Test Post 10") are
+    skipped when taken, but never counted as allocated suffixes
+
+    Args:
+        model (Model): Model with "slug" field and UniqueSlugMixin
+        base_slug (str): Desired slug
+        exclude_pk (int): Id of the instance being saved
+
+    Returns:
+        str: base_slug if it is free, else the slug with the next suffix
+    """
+
+    suffix_filter = Q(slug__regex=rf"^{re.escape(base_slug)}-[0-9]{{1,9}}$")
+    queryset = model.objects.filter(Q(slug=base_slug) | suffix_filter).only(
+        "pk", "slug", model.get_slug_source_field()
+    )
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+
+    taken_slugs = set()
+    max_suffix = 0
+    for instance in queryset:
+        taken_slugs.add(instance.slug)
+        if instance.slug != base_slug and instance.get_base_slug() == base_slug:
+            max_suffix = max(max_suffix, int(instance.slug.rsplit("-", 1)[1]))
+
+    if base_slug not in taken_slugs:
+        return base_slug
+    suffix = max_suffix + 1
+    while f"{base_slug}-{suffix}" in taken_slugs:
+        suffix += 1
+    return f"{base_slug}-{suffix}"
+
+
+class UniqueSlugMixin:
+    """Model mixin that sets a unique slug (see get_base_slug) to the
+    instances saved without slug
+
+    If other save takes the same slug first, the unique constraint
+    rejects the save and the next slug is tried
+    """
+
+    # Field of the slug text (default: "name" or "title")
+    slug_source_field = None
+
+    @classmethod
+    def get_slug_source_field(cls) -> str:
+        """Retrieve the field used to build the slug
+
+        Returns:
+            str: Field name
+        """
+        if cls.slug_source_field:
+            return cls.slug_source_field
+        field_names = {field.name for field in cls._meta.get_fields()}
+        for field_name in ["name", "title"]:
+            if field_name in field_names:
+                return field_name
+        raise ImproperlyConfigured(f"{cls.__name__} needs a slug_source_field")
+
+    def get_base_slug(self) -> str:
+        """Build the slug of the instance from its source field
+        (without deduplication)
+
+        Returns:
+            str: Instance slug
+        """
+        return slugify(getattr(self, self.get_slug_source_field()) or "")
+
+    def save(self, *args, **kwargs):
+        """Allocate the slug and retry the save on slug conflicts"""
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        base_slug = self.get_base_slug()
+        for attempt in range(SLUG_SAVE_RETRIES):
+            self.slug = get_next_slug(type(self), base_slug, self.pk)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                taken = (
+                    type(self).objects.filter(slug=self.slug)
+                    .exclude(pk=self.pk).exists()
+                )
+                if not taken or attempt == SLUG_SAVE_RETRIES - 1:
+                    self.slug = None
+                    raise
+
+
+def is_slug_variant(slug: str, base_slug: str) -> bool:
+    """Check if a slug is the base slug or a deduplicated copy of it
+
+    Args:
+        slug (str): Current slug
+        base_slug (str): Desired slug
+
+    Returns:
+        bool: True if slug is like "<base_slug>" or "<base_slug>-<n>"
+    """
+    if not slug:
+        return False
+    return re.fullmatch(rf"{re.escape(base_slug)}(-\d+)?", slug) is not None
+
+
+def get_new_slug(instance, mode: str) -> str:
+    """Build the desired slug of an instance (before deduplication)
+
+    Args:
+        instance (Model): Instance with get_base_slug
+        mode (str): "missing" (only empty slugs), "regenerate" (from the
+            source field) or "prefix-id" (like "<id>-<slug>")
+
+    Returns:
+        str: Desired slug, None if the slug does not change
+    """
+
+    if mode == "missing":
+        return None if instance.slug else instance.get_base_slug()
+    if mode == "regenerate":
+        return instance.get_base_slug()
+    if mode == "prefix-id":
+        slug = instance.slug or instance.get_base_slug()
+        if slug.startswith(f"{instance.id}-"):
+            return None
+        return f"{instance.id}-{slug}"
+    raise ValueError(f"Invalid slug mode: {mode}")
+
+
+def backfill_slugs(
+    model,
+    mode: str = "missing",
+    batch_size: int = 500,
+    dry_run: bool = False,
+    stdout=print,
+) -> int:
+    """Update the slugs of all the instances of a model, with the
+    collisions resolved in memory and bulk updates per transaction
+
+    The current slugs of the other instances are never reused, so each
+    batch can be written without temporary unique conflicts
+
+    Args:
+        model (Model): Model with "slug" field and get_base_slug method
+        mode (str): Slugs to update (see get_new_slug)
+        batch_size (int): Instances updated per transaction
+        dry_run (bool): Only report the changes
+        stdout (callable): Progress output function
+
+    Returns:
+        int: Instances with a new slug
+    """
+
+    used_slugs = set(
+        model.objects.exclude(Q(slug__isnull=True) | Q(slug=""))
+        .values_list("slug", flat=True)
+    )
+
+    changes = []
+    for instance in model.objects.order_by("id").iterator():
+        new_slug = get_new_slug(instance, mode)
+        if new_slug is None or is_slug_variant(instance.slug, new_slug):
+            continue
+        instance.slug = get_unique_slug(new_slug, used_slugs)
+        changes.append(instance)
+
+    for start in range(0, len(changes), batch_size):
+        batch = changes[start:start + batch_size]
+        progress = f"{start + len(batch)}/{len(changes)}"
+        if dry_run:
+            for instance in batch:
+                stdout(f"{model.__name__} {instance.id}: {instance.slug}")
+            continue
+        with transaction.atomic():
+            model.objects.bulk_update(batch, ["slug"])
+        stdout(f"Updating {model.__name__} slugs {progress}")
+
+    if changes and not dry_run:
+        bump_model_version(model)
+    return len(changes)
@@ -0,0 +1,367 @@
+import json
+import os
+import shutil
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import md5
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.utils import timezone
+
+from blog import models as blog_models
+from core.cache import get_models_version
+from properties import models as properties_models
+from properties.views import PROPERTIES_CACHE_MODELS
+from utils.api_client import get_client
+
+# Languages rendered in each snapshot
+SNAPSHOT_LANGUAGES = ["es", "en"]
+
+# Results per page of the list endpoints (api max page size)
+SNAPSHOT_PAGE_SIZE = 1000
+
+# Service user used to request the api
+SNAPSHOT_USERNAME = "snapshot-user"
+
+MANIFEST_NAME = "manifest.json"
+
+# File with the name of the last snapshot version
+LATEST_NAME = "latest"
+
+
+def get_reuse_key(*values) -> str:
+    """Hash the inputs of a rendered file"""
+    return md5("|".join(str(value) for value in values).encode()).hexdigest()
+
+
+def get_property_reuse_keys(property_dates: list) -> dict:
+    """Build the reuse key of each property detail from its inputs: its
+    updated_at, the updated_at of the properties embedded as related (or
+    the latest properties that complete them) and the data version of
+    the other models of the response (see core.cache)
+
+    Args:
+        property_dates (list): (id, updated_at) of the properties
+
+    Returns:
+        dict: Reuse key by property id
+    """
+
+    related = defaultdict(list)
+    related_dates = (
+        properties_models.RelatedProperty.objects.filter(related__active=True)
+        .order_by("property_id", "position")
+        .values_list("property_id", "related_id", "related__updated_at")
+    )
+    for property_id, related_id, updated_at in related_dates:
+        related[property_id].append(f"{related_id}:{updated_at.isoformat()}")
+
+    limit = properties_models.RelatedProperty.LIMIT
+    latest_dates = (
+        properties_models.Property.objects.filter(active=True)
+        .order_by("-updated_at")
+        .values_list("id", "updated_at")[: limit * 2]
+    )
+    latest = [
+        f"{property_id}:{updated_at.isoformat()}"
+        for property_id, updated_at in latest_dates
+    ]
+
+    # Properties changes are covered by the dates
+    dates_models = [properties_models.Property, properties_models.RelatedProperty]
+    version = get_models_version(
+        [model for model in PROPERTIES_CACHE_MODELS if model not in dates_models]
+    )
+
+    keys = {}
+    for property_id, updated_at in property_dates:
+        entries = related[property_id]
+        completed = latest if len(entries) < limit else []
+        keys[property_id] = get_reuse_key(
+            updated_at.isoformat(), *entries, *completed, version
+        )
+    return keys
+
+
+def get_snapshot_tasks(page_size: int = SNAPSHOT_PAGE_SIZE) -> list:
+    """Build the list of files of the full api surface for all languages
+
+    Args:
+        page_size (int): Results per page of the list endpoints
+
+    Returns:
+        list: Tasks (dict) with the file path, the url and params to request,
+            if the url is paginated and the reuse key of the details
+            (hash of the inputs, None: always rendered)
+    """
+
+    properties = properties_models.Property.objects.filter(active=True)
+    property_dates = list(properties.values_list("id", "updated_at"))
+    property_keys = get_property_reuse_keys(property_dates)
+    company_ids = list(
+        properties_models.Company.objects.values_list("id", flat=True)
+    )
+
+    tasks = []
+    for language in SNAPSHOT_LANGUAGES:
+
+        # List endpoints (all pages)
+        for path, url, params in [
+            ("properties/list", "/api/properties/", {}),
+            ("properties/summary", "/api/properties/", {"summary": ""}),
+            ("companies/list", "/api/companies/", {}),
+            ("posts/list", "/api/posts/", {}),
+        ]:
+            tasks.append({
+                "path": f"{language}/{path}",
+                "url": url,
+                "params": {**params, "page-size": page_size},
+                "language": language,
+                "paginated": True,
+                "reuse_key": None,
+            })
+
+        # Endpoints without pagination
+        for path, url in [
+            ("locations.json", "/api/locations/"),
+            ("best-developments-images.json", "/api/best-developments-images/"),
+            ("properties/facets.json", "/api/properties/facets/"),
+            ("properties/markers.json", "/api/properties/markers/"),
+        ]:
+            tasks.append({
+                "path": f"{language}/{path}",
+                "url": url,
+                "params": {},
+                "language": language,
+                "paginated": False,
+                "reuse_key": None,
+            })
+
+        # Details
+        for property_id, _ in property_dates:
+            tasks.append({
+                "path": f"{language}/properties/{property_id}.json",
+                "url": f"/api/properties/{property_id}/",
+                "params": {"details": ""},
+                "language": language,
+                "paginated": False,
+                "reuse_key": property_keys[property_id],
+            })
+        for company_id in company_ids:
+            tasks.append({
+                "path": f"{language}/companies/{company_id}.json",
+                "url": f"/api/companies/{company_id}/",
+                "params": {"details": ""},
+                "language": language,
+                "paginated": False,
+                "reuse_key": None,
+            })
+
+        # Posts are only available in their language (with the title and
+        # slug of the related post)
+        posts = blog_models.Post.objects.filter(lang=language).values_list(
+            "slug", "updated_at", "related_post_id", "related_post__updated_at"
+        )
+        for slug, updated_at, related_id, related_updated_at in posts:
+            tasks.append({
+                "path": f"{language}/posts/{slug}.json",
+                "url": f"/api/posts/{slug}/",
+                "params": {"details": ""},
+                "language": language,
+                "paginated": False,
+                "reuse_key": get_reuse_key(
+                    updated_at.isoformat(), related_id, related_updated_at
+                ),
+            })
+
+    return tasks
+
+
+def render_tasks(output_dir: str, tasks: list) -> list:
+    """Request the api of each task and save the json responses
+    (runs in the pool workers)
+
+    Args:
+        output_dir (str): Snapshot version folder
+        tasks (list): Tasks to render (see get_snapshot_tasks)
+
+    Returns:
+        list: Relative paths of the written files
+    """
+
+    client = get_client(SNAPSHOT_USERNAME)
+    files = []
+    for task in tasks:
+        url = task["url"]
+        params = task["params"]
+        page = 1
+        while url:
+            response = client.get(
+                url, params, HTTP_ACCEPT_LANGUAGE=task["language"]
+            )
+            if response.status_code != 200:
+                raise ValueError(f"{url} returned {response.status_code}")
+
+            path = task["path"]
+            if task["paginated"]:
+                path = f"{path}/{page}.json"
+            full_path = os.path.join(output_dir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "wb") as file:
+                file.write(response.content)
+            files.append(path)
+
+            # Next page link already includes the query params
+            url = response.json().get("next") if task["paginated"] else None
+            params = {}
+            page += 1
+    return files
+
+
+def get_latest_version(output: str) -> str:
+    """Retrieve the name of the last snapshot version
+
+    Args:
+        output (str): Snapshots folder
+
+    Returns:
+        str: Version name, None if there are no snapshots
+    """
+    try:
+        with open(os.path.join(output, LATEST_NAME)) as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_manifest(output: str, version: str) -> dict:
+    """Read the manifest of a snapshot version
+
+    Args:
+        output (str): Snapshots folder
+        version (str): Version name
+
+    Returns:
+        dict: Manifest data, empty if the version does not exist
+    """
+    if not version:
+        return {}
+    try:
+        with open(os.path.join(output, version, MANIFEST_NAME)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def reuse_file(source: str, destination: str):
+    """Hard link (or copy) an unchanged file of the previous snapshot"""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def split_tasks(tasks: list, chunks_num: int) -> list:
+    """Split the tasks in chunks for the pool workers (round robin)"""
+    chunks = [tasks[index::chunks_num] for index in range(chunks_num)]
+    return [chunk for chunk in chunks if chunk]
+
+
+def create_snapshot(
+    output: str,
+    workers: int = 1,
+    page_size: int = SNAPSHOT_PAGE_SIZE,
+    full: bool = False,
+    archive: bool = False,
+) -> dict:
+    """Render the api surface in a new versioned folder of json files,
+    reusing the details of the previous snapshot whose inputs did not
+    change (see get_snapshot_tasks). Without a shared cache the models
+    versions are not known, so all the files are rendered
+
+    Args:
+        output (str): Snapshots folder
+        workers (int): Worker processes (1: render in this process)
+        page_size (int): Results per page of the list endpoints
+        full (bool): Render all files (ignore the previous snapshot)
+        archive (bool): Also save the version as a .tar.gz file
+
+    Returns:
+        dict: Snapshot summary (version, rendered, reused, archive)
+    """
+
+    snapshot_tasks = get_snapshot_tasks(page_size)
+    version = timezone.now().strftime("%Y%m%d-%H%M%S-%f")
+    output_dir = os.path.join(output, version)
+    os.makedirs(output_dir)
+
+    reuse = not full and settings.API_CACHE_ENABLED
+    previous_version = get_latest_version(output) if reuse else None
+    previous_objects = load_manifest(output, previous_version).get("objects", {})
+
+    # Reuse unchanged details
+    tasks = []
+    objects = {}
+    reused = 0
+    for task in snapshot_tasks:
+        path = task["path"]
+        reuse_key = task["reuse_key"]
+        if reuse_key is not None:
+            objects[path] = reuse_key
+            previous_path = os.path.join(output, previous_version or "", path)
+            if previous_objects.get(path) == reuse_key and os.path.exists(
+                previous_path
+            ):
+                reuse_file(previous_path, os.path.join(output_dir, path))
+                reused += 1
+                continue
+        tasks.append(task)
+
+    # Render the other files (the service user is created before the
+    # workers start, so they share it)
+    get_client(SNAPSHOT_USERNAME)
+    try:
+        if workers > 1 and len(tasks) > 1:
+            # Workers open their own database connections
+            connections.close_all()
+            chunks = split_tasks(tasks, workers * 4)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(
+                    render_tasks, [output_dir] * len(chunks), chunks
+                )
+                files = [path for paths in results for path in paths]
+        else:
+            files = render_tasks(output_dir, tasks)
+    finally:
+        # Remove the service user and its token
+        User.objects.filter(username=SNAPSHOT_USERNAME).delete()
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w") as file:
+        json.dump(
+            {
+                "version": version,
+                "previous_version": previous_version,
+                "created_at": timezone.now().isoformat(),
+                "objects": objects,
+            },
+            file,
+            indent=2,
+        )
+
+    archive_path = None
+    if archive:
+        archive_path = shutil.make_archive(output_dir, "gztar", root_dir=output_dir)
+
+    # Publish the version when complete
+    with open(os.path.join(output, LATEST_NAME), "w") as file:
+        file.write(version)
+
+    return {
+        "version": version,
+        "rendered": len(files),
+        "reused": reused,
+        "archive": archive_path,
+    }